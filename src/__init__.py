@@ -1,7 +1,10 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from src.db.db import init_db
+from src.config.settings import Config
+from src.db.redis import principal_cache, revoked_tokens, security_cache
 from src.utils.logger import LOGGER
 from .errors import register_all_errors
 from .middleware import register_middleware
@@ -15,6 +18,7 @@ from src.app.auth.views import (
 )
 from src.app.transactions.views import transaction_router
 from src.app.loans.views import loan_router
+from src.app.internal.views import internal_router
 
 
 version = "v1"
@@ -37,7 +41,15 @@ version_prefix = f"/api/{version}"
 async def life_span(app: FastAPI):
     LOGGER.info("Server is running")
     await init_db()
+    listeners = [
+        asyncio.create_task(revoked_tokens.listen()),
+        asyncio.create_task(principal_cache.listen()),
+    ]
+    if Config.REDIS_CLIENT_CACHE:
+        listeners.append(asyncio.create_task(security_cache.listen()))
     yield
+    for listener in listeners:
+        listener.cancel()
     LOGGER.info("Server has stopped")
 
 
@@ -86,5 +98,8 @@ app.include_router(loan_router, prefix=f"{version_prefix}/loans", tags=["loans"]
 app.include_router(
     transaction_router, prefix=f"{version_prefix}/transactions", tags=["transaction"]
 )
+app.include_router(
+    internal_router, prefix=f"{version_prefix}/internal", tags=["internal"]
+)
 # app.include_router(review_router, prefix=f"{version_prefix}/reviews", tags=["reviews"])
 # app.include_router(tags_router, prefix=f"{version_prefix}/tags", tags=["tags"])
@@ -1,23 +1,31 @@
+import math
+import time
 from typing import Any, List, Annotated
 
 from fastapi import Depends, Request, status
 from fastapi.exceptions import HTTPException
 from fastapi.security import HTTPBearer, OAuth2PasswordBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
+from redis.exceptions import RedisError
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.app.auth.mails import send_blocked_email
-from src.db.db import get_session
+from src.db.db import UnitOfWork, get_session, get_unit_of_work
 from src.app.auth.models import User, UserRole
-from src.db.redis import token_in_blocklist
+from src.config.settings import Config
+from src.db.redis import has_recent_write, hit_rate_limit, token_in_blocklist
+from src.utils.cache import TTLCache
+from src.utils.logger import LOGGER
 
-from .services import UserService
+from .schemas import Principal
+from .services import USER_READ_RELATIONSHIPS, UserService
 from .utils import decode_token, send_verification_code
 from src.errors import (
     InvalidToken,
     RefreshTokenRequired,
     AccessTokenRequired,
     InsufficientPermission,
+    RateLimitExceeded,
 )
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -35,7 +43,7 @@ class TokenBearer(HTTPBearer):
 
         token_data = decode_token(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise InvalidToken()
 
         if await token_in_blocklist(token_data["jti"]):
@@ -45,11 +53,6 @@ class TokenBearer(HTTPBearer):
 
         return token_data
 
-    def token_valid(self, token: oauth2_bearer_dependency) -> bool:  #str
-        token_data = decode_token(token)
-
-        return token_data is not None
-
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please Override this method in child classes")
 
@@ -66,40 +69,151 @@ class RefreshTokenBearer(TokenBearer):
             raise RefreshTokenRequired()
 
 
-async def get_current_user(
-    token_details: dict = Depends(AccessTokenBearer()),
-    session: AsyncSession = Depends(get_session),
-):
-    user_email = token_details["user"]["email"]
+access_token_bearer = AccessTokenBearer()
+
+
+async def get_current_principal(
+    token_details: dict = Depends(access_token_bearer),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+) -> Principal:
+    user_uid = token_details["user"]["user_uid"]
 
-    user = await user_service.get_user_by_email(user_email, session)
+    principal = await user_service.get_principal(user_uid, lambda: uow.session)
 
-    if user.is_blocked:
-        await send_blocked_email(user)
+    if principal is None:
+        raise InvalidToken()
+
+    if principal.is_blocked:
+        await send_blocked_email(principal, uow.session)
+        await uow.session.commit()
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account under surveillance. Please contact customer care or your account manager for rectification.",
         )
 
     # Check if the user has at least one verified email
-    if user is not None and not user.verified_emails:
+    if not principal.has_verified_email:
         # If no verified email, send a verification email
-        await send_verification_code(user, user.domain)
+        await send_verification_code(principal, principal.domain)
         raise HTTPException(
             status_code=403,
             detail="Email not verified. A verification email has been sent to your registered email address.",
         )
 
-    return user
+    uow.principal_uid = principal.uid
+    return principal
+
+
+class CurrentUser:
+    """
+    Loads the authenticated principal as a full `User` for routes that need one.
+
+    Only the relationships named on construction are loaded, so each route opts
+    into exactly the collections it serializes or mutates.
+    """
+
+    def __init__(self, *relationships: str) -> None:
+        self.relationships = relationships
+
+    async def __call__(
+        self,
+        principal: Principal = Depends(get_current_principal),
+        session: AsyncSession = Depends(get_session),
+    ) -> User:
+        user = await user_service.get_user_by_uid(
+            principal.uid, session, load=self.relationships
+        )
+
+        if user is None:
+            raise InvalidToken()
+
+        return user
+
+
+get_current_user = CurrentUser(*USER_READ_RELATIONSHIPS)
+
+
+async def get_read_session(
+    token_details: dict = Depends(access_token_bearer),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+) -> AsyncSession:
+    """
+    Session for read-only routes: the replica, unless the caller wrote recently.
+    """
+    if uow.has_replica and await has_recent_write(token_details["user"]["user_uid"]):
+        uow.prefer_primary = True
+
+    return uow.read_session
 
 
 class RoleChecker:
     def __init__(self, allowed_roles: List[UserRole]) -> None:
         self.allowed_roles = allowed_roles
 
-    async def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
+    async def __call__(
+        self, current_user: Principal = Depends(get_current_principal)
+    ) -> Any:
         # Check if the user has the necessary role
         if current_user.role in self.allowed_roles:
             return True
 
         raise InsufficientPermission()
+
+
+# Clients Redis has already refused, with the monotonic time they may retry at
+refused_clients = TTLCache(maxsize=Config.RATE_LIMIT_PREFILTER_SIZE, ttl=86400)
+
+
+class RateLimiter:
+    """
+    Route dependency enforcing a sliding-window rate limit shared through Redis.
+
+    `policy` is "<requests>/<seconds>". `scope` picks who shares a window:
+    "ip" (the client address), "user" (the bearer token's user) or "domain"
+    (the `domain` query parameter); the last two fall back to the IP when the
+    request carries no token or domain.
+
+    A refused client is remembered by the worker until its retry time, so
+    the rest of its burst is turned away without reaching Redis. Requests are
+    let through if Redis is unavailable.
+    """
+
+    def __init__(self, name: str, policy: str, scope: str = "ip") -> None:
+        limit, _, window = policy.partition("/")
+        self.name = name
+        self.limit = int(limit)
+        self.window = int(window)
+        self.scope = scope
+
+    def identify(self, request: Request) -> str:
+        if self.scope == "user":
+            scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+            token_data = decode_token(token) if scheme.lower() == "bearer" and token else None
+            if token_data is not None:
+                return f"user:{token_data['user']['user_uid']}"
+        elif self.scope == "domain":
+            domain = request.query_params.get("domain")
+            if domain:
+                return f"domain:{domain}"
+
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    async def __call__(self, request: Request) -> None:
+        if not Config.RATE_LIMIT_ENABLED:
+            return
+
+        key = f"{self.name}:{self.identify(request)}"
+
+        retry_at = refused_clients.get(key)
+        if retry_at is not None:
+            raise RateLimitExceeded(retry_after=math.ceil(retry_at - time.monotonic()))
+
+        try:
+            wait = await hit_rate_limit(key, self.limit, self.window)
+        except RedisError as exc:
+            LOGGER.warning(f"Rate limiter unavailable, allowing request: {exc}")
+            return
+
+        if wait > 0:
+            refused_clients.set(key, time.monotonic() + wait, ttl=wait)
+            raise RateLimitExceeded(retry_after=math.ceil(wait))
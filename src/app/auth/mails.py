@@ -1,8 +1,25 @@
+from sqlmodel.ext.asyncio.session import AsyncSession
+
 from src.app.auth.models import BankAccount, User, Card
-from src.celery_tasks import send_email
+from src.app.outbox.services import OutboxService
+
+outbox_service = OutboxService()
+
+
+def queue_email(session: AsyncSession, recipients: list[str], subject: str, body: str):
+    """
+    Queues `send_email` in the outbox; it is sent after the caller commits.
+    """
+    outbox_service.enqueue(
+        session,
+        "src.celery_tasks.send_email",
+        recipients=recipients,
+        subject=subject,
+        body=body,
+    )
 
 
-async def send_blocked_email(user: User):
+async def send_blocked_email(user: User, session: AsyncSession):
     subject = "Email Verification"
     body = f"""
     <html>
@@ -18,10 +35,10 @@ async def send_blocked_email(user: User):
         </body>
     </html>
     """
-    send_email.apply_async(args=[[user.email], subject, body])
+    queue_email(session, [user.email], subject, body)
 
 
-async def send_verification_email(user: User, code: str, domain: str):
+async def send_verification_email(user: User, code: str, domain: str, session: AsyncSession):
     subject = "Email Verification"
     body = f"""
     <html>
@@ -32,10 +49,10 @@ async def send_verification_email(user: User, code: str, domain: str):
         </body>
     </html>
     """
-    send_email.apply_async(args=[[user.email], subject, body])
+    queue_email(session, [user.email], subject, body)
 
 
-async def send_reset_password_email(user: User, domain: str, reset_code: str):
+async def send_reset_password_email(user: User, domain: str, reset_code: str, session: AsyncSession):
     subject = "Reset Your Password"
     body = f"""
     <html>
@@ -48,10 +65,10 @@ async def send_reset_password_email(user: User, domain: str, reset_code: str):
         </body>
     </html>
     """
-    send_email.apply_async(args=[[user.email], subject, body])
+    queue_email(session, [user.email], subject, body)
 
 
-async def send_card_pin(user: User, card: Card):
+async def send_card_pin(user: User, card: Card, session: AsyncSession):
     subject = "Debit Card PIN"
     body = f"""
     <html>
@@ -62,10 +79,10 @@ async def send_card_pin(user: User, card: Card):
         </body>
     </html>
     """
-    send_email.apply_async(args=[[user.email], subject, body])
+    queue_email(session, [user.email], subject, body)
 
 
-async def send_new_bank_account_details(user: User, bank: BankAccount):
+async def send_new_bank_account_details(user: User, bank: BankAccount, session: AsyncSession):
     subject = "New Bank Account"
     body = f"""
     <html>
@@ -81,10 +98,10 @@ async def send_new_bank_account_details(user: User, bank: BankAccount):
         </body>
     </html>
     """
-    send_email.apply_async(args=[[user.email], subject, body])
+    queue_email(session, [user.email], subject, body)
 
 
-async def send_notification_email(user: User, message: str):
+async def send_notification_email(user: User, message: str, session: AsyncSession):
     subject = "Notification"
     body = f"Hello {user.first_name},\n\n{message}"
-    send_email.apply_async(args=[[user.email], subject, body])
+    queue_email(session, [user.email], subject, body)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
 from sqlmodel import SQLModel, Field, Relationship, Column
 import sqlalchemy.dialects.postgresql as pg
@@ -7,6 +8,7 @@ from typing import List, Optional
 
 from src.app.transactions.models import TransactionHistory
 from src.app.loans.models import Loan
+from src.utils.money import MONEY_DIGITS, MONEY_PLACES
 
 
 # Enum for user roles
@@ -59,26 +61,26 @@ class User(SQLModel, table=True):
     )
     is_blocked: bool = Field(default=False)
 
-    # Relationships
+    # Relationships are never loaded implicitly; queries opt in with selectinload
     verified_emails: List["VerifiedEmail"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "selectin"},
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "raise"},
     )
     business_profiles: List["BusinessProfile"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "selectin"},
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "raise"},
     )
     bank_accounts: List["BankAccount"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "selectin"},
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "raise"},
     )
     transactions: List["TransactionHistory"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "selectin"},
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "raise"},
     )
     loans: List["Loan"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "selectin"},
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "raise"},
     )
 
     def __repr__(self) -> str:
@@ -179,7 +181,10 @@ class BankAccount(SQLModel, table=True):
     account_type: Optional[str] = Field(
         nullable=True, max_length=50, default="checking"
     )  # E.g., "checking", "savings"
-    balance: float = Field(default=0.0)  # Initial balance
+    # Cached running balance; the ledger_entries postings are the source of truth
+    balance: Decimal = Field(
+        default=Decimal("0.00"), max_digits=MONEY_DIGITS, decimal_places=MONEY_PLACES
+    )
     bank_name: Optional[str] = Field(nullable=True, max_length=255)
     sort_code: Optional[str] = Field(nullable=True, max_length=10)
     routing_number: Optional[str] = Field(
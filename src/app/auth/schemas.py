@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, constr
+from pydantic import BaseModel, EmailStr, Field, constr, model_validator
 from datetime import datetime
 from typing import Optional, List, Annotated
 from enum import Enum
@@ -6,6 +6,8 @@ import uuid
 
 from src.app.transactions.schemas import TransactionRead
 from src.app.loans.schemas import LoanRead
+from src.config.settings import Config
+from src.utils.money import Money
 
 
 # Enum for user roles
@@ -82,6 +84,29 @@ class UserRead(UserBase):
         from_attributes = True  # Enable ORM mode for SQLModel compatibility
 
 
+class Principal(BaseModel):
+    """
+    Column-only view of the authenticated user used by the auth dependencies.
+
+    It carries what permission checks need without loading any of the user's
+    relationships. It is cached in Redis and in each worker, so it must never
+    hold credentials: hashes are always read from the database.
+    """
+
+    uid: uuid.UUID
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    domain: str
+    role: UserRole
+    ip_address: Optional[str] = None
+    is_blocked: bool
+    has_verified_email: bool
+
+    class Config:
+        from_attributes = True
+
+
 class UserLoginModel(BaseModel):
     email: EmailStr  # Email with validation
     password: str = Field(min_length=8)
@@ -97,6 +122,15 @@ class LoginResponseModel(BaseModel):
 
 class UserPinModel(BaseModel):
     transfer_pin: str = Field(min_length=4, max_length=4)
+    issue_grant: bool = False  # Mint a short-lived transfer grant on success
+    grant_max_amount: Optional[Money] = Field(default=None, gt=0)
+    grant_max_uses: int = Field(default=1, ge=1)
+
+    @model_validator(mode="after")
+    def check_grant_limits(self) -> "UserPinModel":
+        if self.issue_grant and self.grant_max_amount is None:
+            raise ValueError("grant_max_amount is required when issuing a transfer grant")
+        return self
 
 
 class EmailModel(BaseModel):
@@ -200,6 +234,12 @@ class BusinessProfileCreate(BusinessProfileBase):
     pass
 
 
+class BusinessProfileBulkCreate(BaseModel):
+    businesses: List[BusinessProfileCreate] = Field(
+        min_length=1, max_length=Config.BULK_ONBOARDING_MAX_ITEMS
+    )
+
+
 class BusinessProfileUpdate(BaseModel):
     website: Optional[str] = None
     registration_number: Optional[str] = None
@@ -254,7 +294,7 @@ class BankAccountCreate(BaseModel):
 
 
 class BankAccountUpdate(BaseModel):
-    balance: float
+    balance: Money = Field(ge=0)
 
 
 class BankAccountRead(BaseModel):
@@ -264,7 +304,7 @@ class BankAccountRead(BaseModel):
     bank_name: str
     sort_code: str
     routing_number: str
-    balance: float
+    balance: Money
     business_id: uuid.UUID
     user_id: uuid.UUID
     # card_id: uuid.UUID
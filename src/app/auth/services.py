@@ -2,65 +2,90 @@ import random
 import uuid
 
 from datetime import datetime, timedelta
-from typing import Optional
+from decimal import Decimal
+from typing import Optional, Sequence
 from uuid import UUID
 
 from fastapi import HTTPException, UploadFile
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 
 # from src.app.auth.mails import send_card_pin, send_new_bank_account_details
+from src.app.auth.mails import send_blocked_email
+from src.app.ledger.services import LedgerService
 from src.db.cloudinary import upload_image
-from src.db.redis import store_allowed_ip
-from src.errors import BankAccountNotFound, InsufficientPermission
+from src.db.redis import (
+    cache_principal,
+    delete_cached_principal,
+    get_cached_principal,
+    principal_cache,
+    store_allowed_ip,
+)
+from src.db.sequences import next_account_number, next_card_number
+from src.errors import (
+    BankAccountNotFound,
+    BusinessAlreadyExists,
+    InsufficientPermission,
+    UserAlreadyExists,
+)
 from src.utils.logger import LOGGER
 
 from .models import BankAccount, Card, User, BusinessProfile, UserRole, VerifiedEmail
 
 from .schemas import (
+    Principal,
     UserCreate,
     BusinessProfileCreate,
     BusinessProfileUpdate,
 )
 
-from .utils import generate_passwd_hash, send_verification_code
+from .utils import (
+    generate_passwd_hash_async,
+    get_default_transfer_pin_hash,
+    send_verification_code,
+)
+
+
+# Relationships serialized by `UserRead`
+USER_READ_RELATIONSHIPS = ("verified_emails", "business_profiles")
+
+
+def relationship_loaders(relationships: Sequence[str]) -> list:
+    return [selectinload(getattr(User, name)) for name in relationships]
+
+
+ledger_service = LedgerService()
 
 
 class UserService:
-    async def get_all_users(self, user: User, domain: str, session: AsyncSession):
+    async def get_all_users(self, user: Principal, domain: str, session: AsyncSession):
         if user.role not in (UserRole.MANAGER, UserRole.ADMIN):
             raise InsufficientPermission()
 
         statement = (
             select(User)
             .where(User.domain == domain)
-            .options(
-                selectinload(User.verified_emails),
-                selectinload(User.business_profiles),
-            )
+            .options(*relationship_loaders(USER_READ_RELATIONSHIPS))
             if user.role == UserRole.MANAGER
-            else select(User).options(
-                selectinload(User.verified_emails),
-                selectinload(User.business_profiles),
-            )
+            else select(User).options(*relationship_loaders(USER_READ_RELATIONSHIPS))
         )
 
         result = await session.exec(statement)
 
         return result.all()
 
-    async def get_user_by_email(self, email: str, session: AsyncSession):
+    async def get_user_by_email(
+        self,
+        email: str,
+        session: AsyncSession,
+        load: Sequence[str] = USER_READ_RELATIONSHIPS,
+    ):
         statement = (
             select(User)
             .where(User.email == email)
-            .options(
-                selectinload(User.verified_emails),
-                selectinload(User.business_profiles),
-                # selectinload(User.bank_accounts),
-                selectinload(User.transactions),
-                selectinload(User.loans),
-            )
+            .options(*relationship_loaders(load))
         )
 
         result = await session.exec(statement)
@@ -69,17 +94,16 @@ class UserService:
 
         return user
 
-    async def get_user_by_uid(self, uid: UUID, session: AsyncSession):
+    async def get_user_by_uid(
+        self,
+        uid: UUID,
+        session: AsyncSession,
+        load: Sequence[str] = USER_READ_RELATIONSHIPS,
+    ):
         statement = (
             select(User)
             .where(User.uid == uid)
-            .options(
-                selectinload(User.verified_emails),
-                selectinload(User.business_profiles),
-                # selectinload(User.bank_accounts),
-                selectinload(User.transactions),
-                selectinload(User.loans),
-            )
+            .options(*relationship_loaders(load))
         )
 
         result = await session.exec(statement)
@@ -88,11 +112,112 @@ class UserService:
 
         return user
 
+    def principal_statement(self):
+        has_verified_email = (
+            select(VerifiedEmail.uid)
+            .where(VerifiedEmail.user_id == User.uid)
+            .exists()
+            .label("has_verified_email")
+        )
+        return select(
+            User.uid,
+            User.email,
+            User.first_name,
+            User.last_name,
+            User.domain,
+            User.role,
+            User.ip_address,
+            User.is_blocked,
+            has_verified_email,
+        )
+
+    async def get_principal_by_email(
+        self, email: str, session: AsyncSession
+    ) -> Optional[Principal]:
+        statement = self.principal_statement().where(User.email == email)
+
+        result = await session.exec(statement)
+        row = result.first()
+
+        return Principal(**row._mapping) if row is not None else None
+
+    async def get_principal_by_uid(
+        self, uid: UUID, session: AsyncSession
+    ) -> Optional[Principal]:
+        statement = self.principal_statement().where(User.uid == uid)
+
+        result = await session.exec(statement)
+        row = result.first()
+
+        return Principal(**row._mapping) if row is not None else None
+
+    async def get_principal(
+        self, uid: UUID | str, session_factory
+    ) -> Optional[Principal]:
+        """
+        Resolves a principal from the worker cache, then Redis, then the database.
+
+        `session_factory` is only called on a full miss, so steady-state traffic
+        never opens a database session.
+        """
+        key = str(uid)
+
+        principal = principal_cache.get(key)
+        if principal is not None:
+            return principal
+
+        generation = principal_cache.generation
+        principal = await get_cached_principal(key)
+        if principal is None:
+            principal = await self.get_principal_by_uid(UUID(key), session_factory())
+            if principal is None:
+                return None
+            await cache_principal(principal)
+
+        principal_cache.set(key, principal, generation)
+        return principal
+
+    async def invalidate_principal(self, uid: UUID | str) -> None:
+        """Drops the cached principal from Redis and from every worker."""
+        await delete_cached_principal(uid)
+
     async def user_exists(self, email, session: AsyncSession):
-        user = await self.get_user_by_email(email, session)
+        user = await self.get_user_by_email(email, session, load=())
 
         return True if user is not None else False
 
+    async def register_user(
+        self,
+        user_data: UserCreate,
+        ip_address: str,
+        role: Optional[str],
+        domain: str,
+        session: AsyncSession,
+    ):
+        """
+        Signup pipeline: checks for a duplicate email, then hashes the password.
+
+        The hash is only started once the email is known to be free: bcrypt
+        running in the hash pool cannot be cancelled, so starting it earlier
+        would let duplicate signups burn pool time for nothing.
+
+        Raises:
+            UserAlreadyExists: If the email is already registered.
+        """
+        if await self.user_exists(user_data.email, session):
+            raise UserAlreadyExists()
+
+        password_hash = await generate_passwd_hash_async(user_data.password)
+
+        return await self.create_user(
+            user_data=user_data,
+            ip_address=ip_address,
+            role=role,
+            domain=domain,
+            session=session,
+            password_hash=password_hash,
+        )
+
     async def create_user(
         self,
         user_data: UserCreate,
@@ -100,6 +225,7 @@ class UserService:
         role: Optional[str],
         domain: str,
         session: AsyncSession,
+        password_hash: Optional[str] = None,
     ):
         # Convert the user_data to a dictionary
         user_data_dict = user_data.model_dump()
@@ -117,9 +243,11 @@ class UserService:
         new_user = User(**user_data_dict)
         new_user.domain = domain
         new_user.ip_address = ip_address
-        new_user.password_hash = generate_passwd_hash(user_data_dict["password"])
+        new_user.password_hash = password_hash or await generate_passwd_hash_async(
+            user_data_dict["password"]
+        )
         new_user.role = role_enum  # Set the role using the UserRole enum
-        new_user.transfer_pin_hash = generate_passwd_hash(str(1234))
+        new_user.transfer_pin_hash = await get_default_transfer_pin_hash()
 
         # Add and commit the new user to the session
         session.add(new_user)
@@ -154,19 +282,21 @@ class UserService:
         user.verified_emails.append(new_email)
         await session.commit()
         await session.refresh(user)
+        await self.invalidate_principal(user.uid)
         return False
 
     async def update_user(self, user: User, user_data: dict, session: AsyncSession):
         if user_data.get("transfer_pin"):
-            user.transfer_pin_hash = generate_passwd_hash(user_data["transfer_pin"])
+            user.transfer_pin_hash = await generate_passwd_hash_async(user_data["transfer_pin"])
         elif user_data.get("password"):
-            user.password_hash = generate_passwd_hash(user_data["password"])
+            user.password_hash = await generate_passwd_hash_async(user_data["password"])
         else:
             for k, v in user_data.items():
                 setattr(user, k, v)
 
         await session.commit()
         await session.refresh(user)
+        await self.invalidate_principal(user.uid)
         return user
 
     async def update_image(self, user: User, image: UploadFile, session: AsyncSession):
@@ -175,6 +305,7 @@ class UserService:
 
         await session.commit()
         await session.refresh(user)
+        await self.invalidate_principal(user.uid)
 
         return user
 
@@ -187,9 +318,13 @@ class UserService:
             )
 
         user.is_blocked = status
+        if status:
+            # Queued in the same transaction, so the mail goes out only if the block commits
+            await send_blocked_email(user, session)
 
         await session.commit()
         await session.refresh(user)
+        await self.invalidate_principal(user.uid)
 
         return user
 
@@ -202,31 +337,66 @@ class BusinessService:
     async def create_business(
         self, user: User, business_data: BusinessProfileCreate, session: AsyncSession
     ) -> BusinessProfile:
+        new_business = await self.add_business(user, business_data, session)
+        await self.commit_onboarding(session)
 
-        business_data_dict = business_data.model_dump()
+        LOGGER.info(f"New business created: {new_business}")
+
+        return new_business
+
+    async def create_businesses(
+        self,
+        user: User,
+        businesses: Sequence[BusinessProfileCreate],
+        session: AsyncSession,
+    ) -> list[BusinessProfile]:
+        """
+        Onboards several businesses for `user` in one transaction.
+
+        Each table is written with a single batched INSERT. If any business
+        clashes with an existing one, none of them are created.
+        """
+        new_businesses = [
+            await self.add_business(user, business_data, session)
+            for business_data in businesses
+        ]
+        await self.commit_onboarding(session)
+
+        LOGGER.info(f"{len(new_businesses)} businesses created for user: {user.uid}")
+
+        return new_businesses
+
+    async def commit_onboarding(self, session: AsyncSession):
+        # Keys and timestamps are generated client-side, so nothing needs a
+        # refresh once the single flush has run
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise BusinessAlreadyExists()
+
+    async def add_business(
+        self, user: User, business_data: BusinessProfileCreate, session: AsyncSession
+    ) -> BusinessProfile:
+        """
+        Adds a business profile with its bank account and card to the session.
 
-        new_business = BusinessProfile(**business_data_dict)
+        Nothing is flushed; the rows are inserted with the caller's commit.
+        """
+        new_business = BusinessProfile(**business_data.model_dump())
         new_business.user_id = user.uid
         new_business.user = user
-
         session.add(new_business)
-        await session.commit()
-        await session.refresh(new_business)
-
-        user.business_profiles.append(new_business)
-        await session.commit()
-        await session.refresh(user)
 
-        LOGGER.info(f"New business created: {new_business}")
-
-        await self.create_bank_account(new_business, session)
+        bank_account = await self.create_bank_account(new_business, session)
+        await self.create_card(new_business, bank_account, session)
 
         return new_business
 
     async def create_bank_account(
         self, business_profile: BusinessProfile, session: AsyncSession
     ) -> BankAccount:
-        account_number = self.generate_bank_account_number()
+        account_number = await next_account_number(session)
         account_type = "checking"  # Default to checking account
         bank_name = "Bank of America"
         user = business_profile.user
@@ -235,32 +405,17 @@ class BusinessService:
             bank_name=bank_name,
             account_number=account_number,
             account_type=account_type,
-            balance=0.0,
+            balance=Decimal("0.00"),
             routing_number="026009593",
             sort_code="165050",
         )
 
-        bank_account.business_id = business_profile.uid
+        # business_id is filled in from the relationship at flush time
         bank_account.business_profile = business_profile
         bank_account.user = user
         bank_account.user_id = user.uid
 
         session.add(bank_account)
-        await session.commit()
-        await session.refresh(bank_account)
-        LOGGER.info(f"New bank account created: {bank_account} with relationship to: {bank_account.business_id}")
-
-        # business_profile.bank_account = bank_account
-        # await session.commit()
-        # await session.refresh(business_profile)
-
-
-        # Create and link a Card to the new bank account
-        LOGGER.info(f"Creating Bank Card: {bank_account.uid}")
-        card = await self.create_card(business_profile, bank_account, session)
-        LOGGER.info(f"New card created: {card} with relationship to: {card.bank_id}")
-
-
         return bank_account
 
     async def create_card(
@@ -269,7 +424,7 @@ class BusinessService:
         bank_account: BankAccount,
         session: AsyncSession,
     ) -> Card:
-        card_number = self.generate_debit_card_number()
+        card_number = await next_card_number(session)
         expiration_date = datetime.utcnow() + timedelta(
             days=365 * 3
         )  # 3 years validity
@@ -285,15 +440,8 @@ class BusinessService:
         )
 
         # await send_card_pin(card=card, user=business_profile.user)
-        card.bank_id = bank_account.uid
         card.bank_account = bank_account
         session.add(card)
-        await session.commit()
-        await session.refresh(card)
-
-        # bank_account.card = card
-        # await session.commit()
-        # await session.refresh(bank_account)
 
         return card
 
@@ -372,7 +520,7 @@ class BusinessService:
 
     async def get_user_account_balance(
         self, session: AsyncSession, user: User, account_number: str
-    ) -> float:
+    ) -> Decimal:
         selection = (
             select(BankAccount)
             .where(BankAccount.account_number == account_number)
@@ -388,18 +536,9 @@ class BusinessService:
         return bankAccount.balance
 
     async def update_account_balance(
-        self, session: AsyncSession, account: BankAccount, new_balance: float
+        self, session: AsyncSession, account: BankAccount, new_balance: Decimal
     ):
-        account.balance = new_balance
-        await session.commit()
+        # Posted to the ledger as an adjustment for the difference
+        await ledger_service.set_balance(session, account.uid, new_balance)
         await session.refresh(account)
         return account
-
-    def generate_debit_card_number(self):
-        # Dummy debit card number generator (replace with actual implementation)
-        start_digits = random.choice(["51", "52", "53", "54", "55"])
-        return f"{start_digits}{random.randint(1000, 9999)}{random.randint(1000, 9999)}{random.randint(1000, 9999)}"
-
-    def generate_bank_account_number(self):
-        # Dummy bank account number generator (replace with actual implementation)
-        return f"{random.randint(1000000000, 9999999999)}"  # 10-digit account number
@@ -1,27 +1,50 @@
+import asyncio
 import logging
+import threading
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterator, Optional
 
 from itsdangerous import URLSafeTimedSerializer # type: ignore
 
 import jwt  # type: ignore
 from passlib.context import CryptContext  # type: ignore
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.app.auth.mails import send_reset_password_email, send_verification_email
 from src.app.auth.models import User
 from src.config.settings import Config
 from src.db.redis import (
+    consume_transfer_grant,
     get_password_reset_code,
     get_verification_status,
+    refund_transfer_grant,
     store_password_reset_code,
     store_verification_code,
 )
+from src.errors import InvalidTransactionPin, InvalidTransferGrant, ServerBusy
+from src.utils.cache import TTLCache
 from src.utils.logger import LOGGER
 
 passwd_context = CryptContext(schemes=["bcrypt"], deprecated='auto')
 
 ACCESS_TOKEN_EXPIRY = 3600
 
+# Every new account starts with this transfer PIN until the user changes it
+DEFAULT_TRANSFER_PIN = "1234"
+
+# Tokens whose signature has already been verified, keyed by their signature
+# segment. Entries never outlive the token's own `exp` claim.
+verified_tokens = TTLCache(
+    maxsize=Config.VERIFIED_TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRY
+)
+
 
 def generate_verification_code(email: str) -> str:
     token = create_url_safe_token({"email": email})
@@ -75,6 +98,164 @@ def verify_password(password: str, hash: str) -> bool:
     return passwd_context.verify(password, hash)
 
 
+class PasswordHashPool:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool.
+
+    At most `workers` hashes run at once and `queue_size` more may wait; any
+    call beyond that raises `ServerBusy` instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="passwd-hash"
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, func, *args):
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise ServerBusy()
+
+        # Counted on the executor's future, not the awaiting coroutine: a
+        # cancelled caller doesn't stop a hash that is already running
+        with self._lock:
+            self.in_flight += 1
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future: Future) -> None:
+        # Runs on the hashing thread, or on the caller's if cancelled while queued
+        with self._lock:
+            self.in_flight -= 1
+            if not future.cancelled() and future.exception() is None:
+                self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queued": max(self.in_flight - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_hash_pool = PasswordHashPool(
+    workers=Config.PASSWORD_HASH_WORKERS, queue_size=Config.PASSWORD_HASH_QUEUE_SIZE
+)
+
+
+async def generate_passwd_hash_async(password: str) -> str:
+    return await password_hash_pool.run(generate_passwd_hash, password)
+
+
+async def verify_password_async(password: str, hash: str) -> bool:
+    return await password_hash_pool.run(verify_password, password, hash)
+
+
+_default_transfer_pin_hash: Optional[str] = None
+
+
+async def get_default_transfer_pin_hash() -> str:
+    """
+    Hash of `DEFAULT_TRANSFER_PIN`, computed once per worker.
+
+    Signups reuse it instead of paying a second bcrypt round on a constant.
+    """
+    global _default_transfer_pin_hash
+
+    if _default_transfer_pin_hash is None:
+        _default_transfer_pin_hash = await generate_passwd_hash_async(
+            DEFAULT_TRANSFER_PIN
+        )
+    return _default_transfer_pin_hash
+
+
+async def get_transfer_pin_hash(user_id: uuid.UUID, session: AsyncSession) -> Optional[str]:
+    """
+    Reads the transfer PIN hash from the database.
+
+    It is never cached, so a changed PIN takes effect on every worker at once.
+    """
+    return await session.scalar(
+        select(User.transfer_pin_hash).where(User.uid == user_id)
+    )
+
+
+class TransferCharge:
+    """What one request spent from a transfer grant, so it can be given back."""
+
+    def __init__(
+        self,
+        user_id: uuid.UUID,
+        grant: Optional[str] = None,
+        amount: Decimal = Decimal(0),
+    ) -> None:
+        self.user_id = user_id
+        self.grant = grant
+        self.amount = amount
+
+    async def refund(self, amount: Decimal, use: bool = False) -> None:
+        """Gives `amount`, and with `use` the spent use, back to the grant."""
+        if self.grant is None or (amount <= 0 and not use):
+            return
+        await refund_transfer_grant(self.grant, self.user_id, amount, uses=int(use))
+        self.amount -= amount
+
+
+@asynccontextmanager
+async def authorize_transfer(
+    user: User,
+    amount: Decimal,
+    session: AsyncSession,
+    transfer_pin: Optional[str] = None,
+    transfer_grant: Optional[str] = None,
+) -> AsyncIterator[TransferCharge]:
+    """
+    Authorizes a money movement with either a transfer grant or the transfer PIN.
+
+    Wraps the debit: `async with authorize_transfer(...) as charge:`. A grant
+    is charged atomically in Redis up front, so concurrent requests cannot
+    overspend it, and skips bcrypt entirely; if the body raises (the debit
+    was refused or its transaction rolled back) the charge is refunded.
+    Without a grant the PIN is verified against the hash stored in the
+    database.
+    """
+    if transfer_grant is None:
+        if transfer_pin is None:
+            raise InvalidTransactionPin()
+
+        transfer_pin_hash = await get_transfer_pin_hash(user.uid, session)
+        if transfer_pin_hash is None or not await verify_password_async(
+            transfer_pin, transfer_pin_hash
+        ):
+            raise InvalidTransactionPin()
+
+        yield TransferCharge(user.uid)
+        return
+
+    if not await consume_transfer_grant(transfer_grant, user.uid, amount):
+        raise InvalidTransferGrant()
+
+    charge = TransferCharge(user.uid, transfer_grant, amount)
+    try:
+        yield charge
+    except BaseException:
+        try:
+            await charge.refund(charge.amount, use=True)
+        except RedisError as exc:
+            LOGGER.warning(f"Could not refund transfer grant: {exc}")
+        raise
+
+
 def create_access_token(
     user_data: dict, expiry: timedelta = None, refresh: bool = False
 ):
@@ -96,17 +277,25 @@ def create_access_token(
 
 
 def decode_token(token: str) -> dict:
+    signature = token.rpartition(".")[2]
+    cached = verified_tokens.get(signature)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
     try:
         token_data = jwt.decode(
             jwt=token, key=Config.SECRET_KEY, algorithms=[Config.ALGORITHM]
         )
 
-        return token_data
-
     except jwt.PyJWTError as e:
-        logging.exception(e)
+        LOGGER.warning(f"Rejected token: {e.__class__.__name__}: {e}")
         return None
 
+    verified_tokens.set(
+        signature, (token, token_data), ttl=token_data.get("exp", 0) - time.time()
+    )
+    return token_data
+
 
 serializer = URLSafeTimedSerializer(
     secret_key=Config.SECRET_KEY, salt="email-configuration"
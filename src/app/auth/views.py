@@ -14,16 +14,22 @@ from fastapi.responses import JSONResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.app.auth.models import User, UserRole
-from src.db.redis import add_jti_to_blocklist, block_ip_attempts
+from src.app.ledger.schemas import AccountBalance
+from src.config.settings import Config
+from src.db.redis import add_jti_to_blocklist, block_ip_attempts, store_transfer_grant
 from src.utils.logger import LOGGER
 
 from .dependencies import (
+    get_current_principal,
     get_current_user,
+    get_read_session,
+    RateLimiter,
     RoleChecker,
     RefreshTokenBearer,
     AccessTokenBearer,
 )
 from .schemas import (
+    Principal,
     UserCreate,
     UserLoginModel,
     UserPinModel,
@@ -31,6 +37,7 @@ from .schemas import (
     PasswordResetConfirmModel,
     PasswordResetRequestModel,
     BusinessProfileRead,
+    BusinessProfileBulkCreate,
     BusinessProfileCreate,
     BusinessProfileUpdate,
     CardRead,
@@ -38,14 +45,15 @@ from .schemas import (
     BankAccountRead,
     VerifiedEmailRead,
 )
-from .services import UserService, BusinessService
+from .services import UserService, BusinessService, ledger_service
 from .utils import (
     create_access_token,
     send_password_reset_code,
     send_verification_code,
-    verify_password,
+    get_transfer_pin_hash,
+    verify_password_async,
     decode_url_safe_token,
-    generate_passwd_hash,
+    generate_passwd_hash_async,
 )
 from src.errors import (
     DebitCardNotFound,
@@ -53,7 +61,6 @@ from src.errors import (
     InvalidToken,
     InsufficientPermission,
     InvalidTransactionPin,
-    UserAlreadyExists,
     UserBlocked,
     UserNotFound,
 )
@@ -71,6 +78,23 @@ business_service = BusinessService()
 role_checker = RoleChecker([UserRole.ADMIN, UserRole.MANAGER, UserRole.USER])
 admin_checker = RoleChecker([UserRole.ADMIN, UserRole.MANAGER])
 
+login_rate_limit = RateLimiter("login", Config.RATE_LIMIT_LOGIN, scope="ip")
+transfer_pin_rate_limit = RateLimiter(
+    "transfer_pin", Config.RATE_LIMIT_TRANSFER_PIN, scope="user"
+)
+password_reset_rate_limits = [
+    Depends(
+        RateLimiter("password_reset", Config.RATE_LIMIT_PASSWORD_RESET, scope="ip")
+    ),
+    Depends(
+        RateLimiter(
+            "password_reset_domain",
+            Config.RATE_LIMIT_PASSWORD_RESET_DOMAIN,
+            scope="domain",
+        )
+    ),
+]
+
 REFRESH_TOKEN_EXPIRY = 2
 
 
@@ -95,14 +119,7 @@ async def create_user_Account(
     Returns:
         dict: A message indicating the account creation and a verification code.
     """
-    email = user_data.email
-
-    user_exists = await user_service.user_exists(email, session)
-
-    if user_exists:
-        raise UserAlreadyExists()
-
-    code, user = await user_service.create_user(
+    code, user = await user_service.register_user(
         user_data=user_data,
         domain=domain,
         ip_address=ip_address,
@@ -139,14 +156,7 @@ async def create_super_user_Account(
     Returns:
         dict: A message indicating the superuser account creation and a verification code.
     """
-    email = user_data.email
-
-    user_exists = await user_service.user_exists(email, session)
-
-    if user_exists:
-        raise UserAlreadyExists()
-
-    code, user = await user_service.create_user(
+    code, user = await user_service.register_user(
         user_data=user_data,
         domain=domain,
         ip_address=ip_address,
@@ -199,32 +209,57 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
     )
 
 
-@auth_router.post("/transfer-pin", status_code=status.HTTP_200_OK)
+@auth_router.post(
+    "/transfer-pin",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(transfer_pin_rate_limit)],
+)
 async def verify_transfer_pin(
     ip_address: str,
     pin_data: UserPinModel,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
     Verify the user's transfer PIN.
 
+    With `issue_grant` set, a valid PIN also mints a short-lived transfer grant
+    that the transfer and withdrawal endpoints accept in place of the PIN,
+    limited to `grant_max_amount` in total and `grant_max_uses` calls.
+
     Args:
         pin_data (UserPinModel): Transfer PIN provided by the user.
-        user (User): The currently authenticated user.
+        user (Principal): The currently authenticated user.
 
     Returns:
-        dict: A message indicating whether the transfer PIN is valid.
+        dict: A message indicating whether the transfer PIN is valid, plus the
+        transfer grant when one was requested.
     """
     pin = pin_data.transfer_pin
 
     if user is not None:
         should_block_user = await block_ip_attempts(user, ip_address)
         if should_block_user:
-            await user_service.block_user(user, True, session)
+            user_to_block = await user_service.get_user_by_uid(user.uid, session, load=())
+            await user_service.block_user(user_to_block, True, session)
             raise UserBlocked()
-        pin_valid = verify_password(pin, user.transfer_pin_hash)
+        transfer_pin_hash = await get_transfer_pin_hash(user.uid, session)
+        pin_valid = transfer_pin_hash is not None and await verify_password_async(
+            pin, transfer_pin_hash
+        )
         LOGGER.info(f"Is Pin valid: {pin_valid}")
+        if pin_valid and pin_data.issue_grant:
+            grant = await store_transfer_grant(
+                user.uid,
+                max_amount=pin_data.grant_max_amount,
+                max_uses=min(pin_data.grant_max_uses, Config.TRANSFER_GRANT_MAX_USES),
+            )
+            return {
+                "message": "Transfer pin is correct",
+                "valid": True,
+                "transfer_grant": grant,
+                "expires_in": Config.TRANSFER_GRANT_EXPIRY,
+            }
         if pin_valid:
             return {"message": "Transfer pin is correct", "valid": True}
         raise InvalidTransactionPin()
@@ -232,7 +267,9 @@ async def verify_transfer_pin(
     raise UserNotFound()
 
 
-@auth_router.post("/login", status_code=status.HTTP_200_OK)
+@auth_router.post(
+    "/login", status_code=status.HTTP_200_OK, dependencies=[Depends(login_rate_limit)]
+)
 async def login_users(
     login_data: UserLoginModel, session: AsyncSession = Depends(get_session)
 ):
@@ -264,7 +301,7 @@ async def login_users(
             "user": user,
         }
 
-    password_valid = verify_password(password, user.password_hash)
+    password_valid = await verify_password_async(password, user.password_hash)
     if password_valid:
         access_token = create_access_token(
             user_data={
@@ -331,7 +368,11 @@ async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
     )
 
 
-@auth_router.post("/password-reset-request", status_code=status.HTTP_200_OK)
+@auth_router.post(
+    "/password-reset-request",
+    status_code=status.HTTP_200_OK,
+    dependencies=password_reset_rate_limits,
+)
 async def password_reset_request(
     domain: str,
     email_data: PasswordResetRequestModel,
@@ -393,7 +434,7 @@ async def reset_account_password(
         if not user:
             raise UserNotFound()
 
-        passwd_hash = generate_passwd_hash(new_password)
+        passwd_hash = await generate_passwd_hash_async(new_password)
         await user_service.update_user(user, {"password_hash": passwd_hash}, session)
 
         return JSONResponse(
@@ -411,15 +452,15 @@ async def reset_account_password(
 @user_router.get("", response_model=List[UserRead])
 async def get_users(
     domain: str,
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
     Get a list of all users in the specified domain.
 
     Args:
         domain (str): The domain to filter users by.
-        user (User): The currently authenticated user.
+        user (Principal): The currently authenticated user.
         session (AsyncSession): Database session dependency.
 
     Returns:
@@ -455,7 +496,7 @@ async def set_allowed_ip(ip: str, user: User = Depends(get_current_user)):
 
 
 @user_router.get("/me/request-new-verification", status_code=status.HTTP_200_OK)
-async def resend_verification_code_view(user: User = Depends(get_current_user)):
+async def resend_verification_code_view(user: Principal = Depends(get_current_principal)):
     """
     Resend a new verification code to the current user's email.
 
@@ -464,8 +505,8 @@ async def resend_verification_code_view(user: User = Depends(get_current_user)):
     registered under.
 
     Args:
-        user (User): The current authenticated user, retrieved via the
-                     `get_current_user` dependency.
+        user (Principal): The current authenticated user, retrieved via the
+                     `get_current_principal` dependency.
 
     Returns:
         dict: A dictionary containing:
@@ -504,7 +545,7 @@ async def update_user_photo(
 @user_router.get("/{uid}", response_model=UserRead)
 async def get_current_user_by_uid(
     uid: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     _: bool = Depends(role_checker),
     session: AsyncSession = Depends(get_session),
 ):
@@ -513,7 +554,7 @@ async def get_current_user_by_uid(
 
     Args:
         uid (uuid.UUID): The unique ID of the user.
-        user (User): The currently authenticated user.
+        user (Principal): The currently authenticated user.
         _: bool: Role check to ensure the user has the required permissions.
         session (AsyncSession): Database session dependency.
 
@@ -557,7 +598,7 @@ async def update_user_by_uid(
 async def block_user(
     uid: uuid.UUID,
     block: bool,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     _: bool = Depends(role_checker),
     session: AsyncSession = Depends(get_session),
 ):
@@ -567,7 +608,7 @@ async def block_user(
     Args:
         uid (uuid.UUID): The unique ID of the user to block or unblock.
         block (bool): Whether to block or unblock the user.
-        current_user (User): The currently authenticated user.
+        current_user (Principal): The currently authenticated user.
         _: bool: Role check to ensure the user has the required permissions.
         session (AsyncSession): Database session dependency.
 
@@ -609,10 +650,39 @@ async def create_new_business(
     return business
 
 
+@business_router.post(
+    "/bulk", status_code=status.HTTP_201_CREATED, response_model=List[BusinessProfileRead]
+)
+async def create_businesses_in_bulk(
+    bulk_data: BusinessProfileBulkCreate,
+    user: User = Depends(get_current_user),
+    _: bool = Depends(role_checker),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Onboard many business profiles at once, each with a bank account and card.
+
+    The import is all-or-nothing: if any business already exists, none are created.
+
+    Args:
+        bulk_data (BusinessProfileBulkCreate): The businesses to create.
+        user (User): The currently authenticated user.
+        _: bool: Role check to ensure the user has the required permissions.
+        session (AsyncSession): Database session dependency.
+
+    Returns:
+        List[BusinessProfileRead]: The newly created business profiles, in request order.
+    """
+    businesses = await business_service.create_businesses(
+        user, bulk_data.businesses, session
+    )
+    return businesses
+
+
 @business_router.get("/{business_id}", response_model=Optional[BusinessProfileRead])
 async def get_business(
     business_id: str,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -620,7 +690,7 @@ async def get_business(
 
     Args:
         business_id (str): The ID of the business.
-        user (User): The currently authenticated user.
+        user (Principal): The currently authenticated user.
         session (AsyncSession): Database session dependency.
 
     Returns:
@@ -634,7 +704,7 @@ async def get_business(
 async def update_existing_business(
     business_id: str,
     update_data: BusinessProfileUpdate,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -643,7 +713,7 @@ async def update_existing_business(
     Args:
         business_id (str): The ID of the business.
         update_data (BusinessProfileUpdate): The data to update.
-        user (User): The currently authenticated user.
+        user (Principal): The currently authenticated user.
         session (AsyncSession): Database session dependency.
 
     Returns:
@@ -660,7 +730,7 @@ async def update_existing_business(
 @card_router.patch("/{card_id}", response_model=Optional[CardRead])
 async def update_existing_card_expiry_date(
     card_id: str,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     _: bool = Depends(admin_checker),
     session: AsyncSession = Depends(get_session),
 ):
@@ -669,7 +739,7 @@ async def update_existing_card_expiry_date(
 
     Args:
         card_id (str): The ID of the card.
-        user (User): The currently authenticated user.
+        user (Principal): The currently authenticated user.
         _: bool: Role check to ensure the user has the required permissions.
         session (AsyncSession): Database session dependency.
 
@@ -692,7 +762,7 @@ async def update_existing_card_expiry_date(
 async def update_bank_account_balance(
     account_number: str,
     update_data: BankAccountUpdate,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     _: bool = Depends(admin_checker),
     session: AsyncSession = Depends(get_session),
 ):
@@ -702,7 +772,7 @@ async def update_bank_account_balance(
     Args:
         account_number (str): The account number of the bank account.
         update_data (BankAccountUpdate): The data to update.
-        user (User): The currently authenticated user.
+        user (Principal): The currently authenticated user.
         _: bool: Role check to ensure the user has the required permissions.
         session (AsyncSession): Database session dependency.
 
@@ -722,6 +792,40 @@ async def update_bank_account_balance(
     return bank
 
 
+@bank_router.get(
+    "/{account_number}/balance",
+    status_code=status.HTTP_200_OK,
+    response_model=AccountBalance,
+)
+async def get_bank_account_balance(
+    account_number: str,
+    as_of: Optional[datetime] = None,
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Get the balance of a bank account, now or as of a past moment.
+
+    The balance is read from the account's latest ledger posting at or before
+    `as_of`, so historical balances cost the same as the current one.
+
+    Args:
+        account_number (str): The account number of the bank account.
+        as_of (datetime, optional): UTC moment to report the balance at; defaults to now.
+        user (Principal): The currently authenticated user.
+        session (AsyncSession): Database session dependency.
+
+    Raises:
+        BankAccountNotFound: If the account does not exist or belongs to another user.
+
+    Returns:
+        AccountBalance: The account number, its balance and the moment it applies to.
+    """
+    return await ledger_service.get_balance_as_of(
+        session, user, account_number, as_of or datetime.utcnow()
+    )
+
+
 # # Auth Routers
 # @auth_router.post("/signup", status_code=status.HTTP_201_CREATED)
 # async def create_user_Account(
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.app.auth.dependencies import RoleChecker
+from src.app.auth.models import UserRole
+from src.app.auth.utils import password_hash_pool
+from src.app.ledger.schemas import ReconciliationReport
+from src.app.ledger.services import LedgerService
+from src.app.transactions.services import TransactionService
+from src.db.db import get_pool_stats, get_session
+from src.db.redis import keyspace_report, migrate_legacy_keys
+
+internal_router = APIRouter()
+
+admin_checker = RoleChecker([UserRole.ADMIN])
+transaction_service = TransactionService()
+ledger_service = LedgerService()
+
+
+@internal_router.get("/db-pool", status_code=status.HTTP_200_OK)
+async def database_pool_stats(_: bool = Depends(admin_checker)):
+    """
+    Report the database connection pool usage of the worker serving the request.
+
+    Each gunicorn worker holds its own pool, so repeated calls may land on
+    different workers; the `pid` field identifies which one answered.
+
+    Returns:
+        dict: Pool size, checked-out, idle and overflow connection counts.
+    """
+    return get_pool_stats()
+
+
+@internal_router.get("/password-hash-pool", status_code=status.HTTP_200_OK)
+async def password_hash_pool_stats(_: bool = Depends(admin_checker)):
+    """
+    Report the bcrypt thread pool usage of the worker serving the request.
+
+    Returns:
+        dict: Worker count, capacity, in-flight and queued hashes, and how many
+        calls were rejected because the pool was saturated.
+    """
+    return password_hash_pool.stats()
+
+
+@internal_router.post("/transaction-rollups/rebuild", status_code=status.HTTP_200_OK)
+async def rebuild_transaction_rollups(
+    _: bool = Depends(admin_checker),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Recompute the daily transaction rollups behind `/transactions/summary`.
+
+    Rollups are maintained on every write; this backfills them for history
+    recorded before they existed.
+
+    Returns:
+        dict: The number of rollup rows written.
+    """
+    rows = await transaction_service.rebuild_daily_rollups(session)
+    return {"rows": rows}
+
+
+@internal_router.post(
+    "/ledger/reconcile",
+    status_code=status.HTTP_200_OK,
+    response_model=ReconciliationReport,
+)
+async def reconcile_ledger(
+    _: bool = Depends(admin_checker),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Recompute every account balance from its ledger postings now.
+
+    The same check runs periodically in Celery; this runs it on demand.
+
+    Returns:
+        ReconciliationReport: How many pre-ledger accounts were opened and
+        every account whose cached balance disagrees with its postings.
+    """
+    return await ledger_service.reconcile(session)
+
+
+@internal_router.get("/redis/keyspace", status_code=status.HTTP_200_OK)
+async def redis_keyspace_report(_: bool = Depends(admin_checker)):
+    """
+    Report Redis key counts and memory per keyspace namespace.
+
+    Walks every key with SCAN, so it is cheap on the server but slow on large
+    databases; use it to size and tune eviction per namespace.
+
+    Returns:
+        dict: For each Redis database, key count and bytes per namespace.
+    """
+    return await keyspace_report()
+
+
+@internal_router.post("/redis/migrate-keys", status_code=status.HTTP_200_OK)
+async def migrate_redis_keys(_: bool = Depends(admin_checker)):
+    """
+    Move Redis keys written before the namespaced keyspace to their new names.
+
+    Safe to re-run; keys that were already migrated are skipped.
+
+    Returns:
+        dict: The number of keys migrated.
+    """
+    return await migrate_legacy_keys()
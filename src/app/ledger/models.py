@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, Index
+from sqlmodel import Field, SQLModel
+
+from src.utils.money import MONEY_DIGITS, MONEY_PLACES
+from .schemas import LedgerAccount
+
+
+# Append-only double-entry postings. Every journal is a pair of postings whose
+# amounts sum to zero: one on a customer's bank account and its counterpart on
+# an internal ledger account or, for transfers between customers, on the other
+# customer's account. Rows are never updated or deleted.
+class LedgerEntry(SQLModel, table=True):
+    __tablename__ = "ledger_entries"
+    # Balance-as-of lookups read the latest posting of an account before a date
+    __table_args__ = (
+        Index("ix_ledger_entries_account_id_created_at", "account_id", "created_at", "id"),
+    )
+
+    id: Optional[int] = Field(
+        default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True)
+    )
+    journal_id: uuid.UUID = Field(index=True)
+    ledger_account: LedgerAccount
+    # Set for postings on a customer bank account, null for internal accounts
+    account_id: Optional[uuid.UUID] = Field(default=None, foreign_key="bank_accounts.uid")
+    transaction_id: Optional[uuid.UUID] = Field(
+        default=None, foreign_key="transactions.uid", index=True
+    )
+
+    # Positive credits the account, negative debits it
+    amount: Decimal = Field(max_digits=MONEY_DIGITS, decimal_places=MONEY_PLACES)
+    # Running balance of `account_id` after this posting
+    balance_after: Optional[Decimal] = Field(
+        default=None, max_digits=MONEY_DIGITS, decimal_places=MONEY_PLACES
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow)
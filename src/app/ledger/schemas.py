@@ -0,0 +1,33 @@
+from datetime import datetime
+from enum import Enum
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from src.utils.money import Money
+
+
+class LedgerAccount(str, Enum):
+    CUSTOMER = "customer"  # A customer's bank account
+    EXTERNAL = "external"  # Money leaving or entering the bank
+    ADJUSTMENT = "adjustment"  # Manual balance corrections
+    OPENING = "opening"  # Balances carried over from before the ledger
+
+
+class AccountBalance(BaseModel):
+    account_number: str
+    balance: Money
+    as_of: datetime
+
+
+class BalanceDrift(BaseModel):
+    account_id: UUID
+    account_number: str
+    balance: Money
+    ledger_balance: Money
+
+
+class ReconciliationReport(BaseModel):
+    accounts_opened: int
+    drift: List[BalanceDrift]
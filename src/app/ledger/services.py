@@ -0,0 +1,432 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Numeric, column, func, insert, update, values
+import sqlalchemy.dialects.postgresql as pg
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.app.auth.models import BankAccount, UserRole
+from src.app.auth.schemas import Principal
+from src.app.transactions.models import TransactionHistory
+from src.errors import BankAccountNotFound
+from src.utils.logger import LOGGER
+from src.utils.money import MONEY_DIGITS, MONEY_PLACES
+
+from .models import LedgerEntry
+from .schemas import (
+    AccountBalance,
+    BalanceDrift,
+    LedgerAccount,
+    ReconciliationReport,
+)
+
+
+class LedgerService:
+    async def post(
+        self,
+        session: AsyncSession,
+        account,
+        amount: Decimal,
+        counterparty: LedgerAccount,
+        transaction: Optional[TransactionHistory] = None,
+    ) -> Optional[tuple[uuid.UUID, Decimal]]:
+        """
+        Moves `amount` into the bank account matched by the `account` clause.
+
+        The cached balance is updated with one conditional UPDATE and the
+        journal (the account posting and its `counterparty` posting) is
+        appended in the same DB transaction; nothing is committed. A negative
+        amount is only applied when the balance covers it, so concurrent
+        debits can neither overdraw an account nor lose an update.
+
+        `transaction`, when given, is linked to the account and flushed before
+        its postings are written so they can reference it.
+
+        Returns the account uid and its new balance, or None when no account
+        matched or the balance does not cover a debit.
+        """
+        statement = (
+            update(BankAccount)
+            .where(account)
+            .values(balance=BankAccount.balance + amount)
+            .returning(BankAccount.uid, BankAccount.balance)
+        )
+        if amount < 0:
+            statement = statement.where(BankAccount.balance >= -amount)
+
+        row = (await session.execute(statement)).first()
+        if row is None:
+            return None
+
+        account_id, balance = row
+        transaction_id = None
+        if transaction is not None:
+            transaction.account_id = account_id
+            session.add(transaction)
+            await session.flush()
+            transaction_id = transaction.uid
+
+        opening = balance - amount
+        if opening != 0 and not await self.has_postings(session, account_id):
+            # First posting on an account opened before the ledger existed
+            await self.append_journal(
+                session, account_id, opening, opening, LedgerAccount.OPENING
+            )
+        await self.append_journal(
+            session, account_id, amount, balance, counterparty, transaction_id
+        )
+
+        return account_id, balance
+
+    async def set_balance(
+        self, session: AsyncSession, account_id: uuid.UUID, balance: Decimal
+    ) -> Decimal:
+        """
+        Brings an account to `balance` with an adjustment posting for the
+        difference, and commits.
+        """
+        result = await session.execute(
+            select(BankAccount.balance)
+            .where(BankAccount.uid == account_id)
+            .with_for_update()
+        )
+        current = result.scalar_one()
+
+        if balance != current:
+            await self.post(
+                session,
+                BankAccount.uid == account_id,
+                balance - current,
+                LedgerAccount.ADJUSTMENT,
+            )
+
+        await session.commit()
+        return balance
+
+    async def get_balance_as_of(
+        self,
+        session: AsyncSession,
+        user: Principal,
+        account_number: str,
+        as_of: datetime,
+    ) -> AccountBalance:
+        """
+        Reads the balance an account had at `as_of` from its latest posting.
+
+        This is a single index lookup on (account_id, created_at) however
+        much history the account has. Users may only read their own accounts.
+        An aware `as_of` is converted to UTC; a naive one is taken as UTC.
+        """
+        if as_of.tzinfo is not None:
+            # Postings are stored as naive UTC
+            as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+
+        statement = select(BankAccount.uid).where(
+            BankAccount.account_number == account_number
+        )
+        if user.role == UserRole.USER:
+            statement = statement.where(BankAccount.user_id == user.uid)
+
+        account_id = (await session.execute(statement)).scalar_one_or_none()
+        if account_id is None:
+            raise BankAccountNotFound()
+
+        result = await session.execute(
+            select(LedgerEntry.balance_after)
+            .where(LedgerEntry.account_id == account_id)
+            .where(LedgerEntry.created_at <= as_of)
+            .order_by(LedgerEntry.created_at.desc(), LedgerEntry.id.desc())
+            .limit(1)
+        )
+        balance = result.scalar_one_or_none()
+
+        return AccountBalance(
+            account_number=account_number,
+            balance=balance if balance is not None else Decimal("0.00"),
+            as_of=as_of,
+        )
+
+    async def reconcile(self, session: AsyncSession) -> ReconciliationReport:
+        """
+        Recomputes every account balance from its postings and reports drift.
+
+        Accounts opened before the ledger that have not moved since get an
+        opening posting for their current balance instead of being reported;
+        `post` does the same on an account's first movement.
+        Cached balances are never rewritten here; drift is logged for review.
+        """
+        unposted = (
+            select(BankAccount.uid)
+            .where(BankAccount.balance != 0)
+            .where(
+                ~select(LedgerEntry.id)
+                .where(LedgerEntry.account_id == BankAccount.uid)
+                .exists()
+            )
+        )
+        opened = 0
+        for account_id in (await session.execute(unposted)).scalars().all():
+            opened += await self.open_account(session, account_id)
+        await session.commit()
+
+        ledger_balance = func.coalesce(func.sum(LedgerEntry.amount), 0)
+        statement = (
+            select(
+                BankAccount.uid,
+                BankAccount.account_number,
+                BankAccount.balance,
+                ledger_balance.label("ledger_balance"),
+            )
+            .outerjoin(LedgerEntry, LedgerEntry.account_id == BankAccount.uid)
+            .group_by(BankAccount.uid)
+            .having(BankAccount.balance != ledger_balance)
+        )
+        drift = [
+            BalanceDrift(
+                account_id=row.uid,
+                account_number=row.account_number,
+                balance=row.balance,
+                ledger_balance=row.ledger_balance,
+            )
+            for row in (await session.execute(statement)).all()
+        ]
+
+        for item in drift:
+            LOGGER.warning(
+                f"Ledger drift on account {item.account_number}: "
+                f"balance {item.balance}, postings {item.ledger_balance}"
+            )
+
+        return ReconciliationReport(accounts_opened=opened, drift=drift)
+
+    async def open_account(self, session: AsyncSession, account_id: uuid.UUID) -> bool:
+        """
+        Books an account's pre-ledger balance as its opening posting, unless
+        it already has postings. Returns whether a posting was made.
+        """
+        result = await session.execute(
+            select(BankAccount.balance)
+            .where(BankAccount.uid == account_id)
+            .with_for_update()
+        )
+        balance = result.scalar_one()
+
+        if balance == 0 or await self.has_postings(session, account_id):
+            return False
+
+        await self.append_journal(
+            session, account_id, balance, balance, LedgerAccount.OPENING
+        )
+        return True
+
+    async def accounts_with_postings(
+        self, session: AsyncSession, account_ids
+    ) -> set[uuid.UUID]:
+        result = await session.execute(
+            select(LedgerEntry.account_id)
+            .where(LedgerEntry.account_id.in_(account_ids))
+            .distinct()
+        )
+        return set(result.scalars().all())
+
+    async def has_postings(self, session: AsyncSession, account_id: uuid.UUID) -> bool:
+        result = await session.execute(
+            select(LedgerEntry.id).where(LedgerEntry.account_id == account_id).limit(1)
+        )
+        return result.first() is not None
+
+    async def post_transfers(
+        self,
+        session: AsyncSession,
+        account_id: uuid.UUID,
+        transfers: list[tuple[Decimal, Optional[uuid.UUID], uuid.UUID]],
+    ) -> Decimal:
+        """
+        Posts many transfers out of one account in a fixed number of statements.
+
+        `transfers` holds `(amount, recipient account uid or None, transaction
+        uid)`; recipients held at this bank are credited, others are booked
+        against the external account. The source account must already be
+        locked and known to cover the total. Returns its new balance.
+        """
+        total = sum(amount for amount, _, _ in transfers)
+        result = await session.execute(
+            update(BankAccount)
+            .where(BankAccount.uid == account_id)
+            .values(balance=BankAccount.balance - total)
+            .returning(BankAccount.balance)
+        )
+        balance = result.scalar_one()
+
+        credits: dict[uuid.UUID, Decimal] = {}
+        for amount, recipient_id, _ in transfers:
+            if recipient_id is not None:
+                credits[recipient_id] = credits.get(recipient_id, 0) + amount
+
+        # Running balances, starting from each account's balance before the batch
+        balances = {account_id: balance + total}
+        balances.update(await self.credit_accounts(session, credits))
+        postings = await self.opening_postings(session, balances)
+
+        for amount, recipient_id, transaction_id in transfers:
+            balances[account_id] -= amount
+            if recipient_id is not None and recipient_id in balances:
+                balances[recipient_id] += amount
+                postings += journal(
+                    account_id,
+                    -amount,
+                    balances[account_id],
+                    LedgerAccount.CUSTOMER,
+                    transaction_id,
+                    counter_account_id=recipient_id,
+                    counter_balance_after=balances[recipient_id],
+                )
+            else:
+                postings += journal(
+                    account_id,
+                    -amount,
+                    balances[account_id],
+                    LedgerAccount.EXTERNAL,
+                    transaction_id,
+                )
+
+        await self.append_postings(session, postings)
+        return balance
+
+    async def post_credits(
+        self,
+        session: AsyncSession,
+        credits: list[tuple[uuid.UUID, Decimal, uuid.UUID]],
+        counterparty: LedgerAccount,
+    ) -> None:
+        """
+        Credits many accounts in a fixed number of statements.
+
+        `credits` holds `(account uid, amount, transaction uid)`; each is
+        journaled against `counterparty`. Nothing is committed.
+        """
+        totals: dict[uuid.UUID, Decimal] = {}
+        for account_id, amount, _ in credits:
+            totals[account_id] = totals.get(account_id, 0) + amount
+
+        balances = await self.credit_accounts(session, totals)
+        postings = await self.opening_postings(session, balances)
+
+        for account_id, amount, transaction_id in credits:
+            balances[account_id] += amount
+            postings += journal(
+                account_id, amount, balances[account_id], counterparty, transaction_id
+            )
+
+        await self.append_postings(session, postings)
+
+    async def credit_accounts(
+        self, session: AsyncSession, credits: dict[uuid.UUID, Decimal]
+    ) -> dict[uuid.UUID, Decimal]:
+        """
+        Adds each amount to its account with one UPDATE ... FROM (VALUES ...).
+
+        Returns every credited account's balance from before the credit.
+        """
+        if not credits:
+            return {}
+
+        credit_values = values(
+            column("uid", pg.UUID(as_uuid=True)),
+            column("amount", Numeric(MONEY_DIGITS, MONEY_PLACES)),
+            name="credits",
+        ).data(list(credits.items()))
+        result = await session.execute(
+            update(BankAccount)
+            .where(BankAccount.uid == credit_values.c.uid)
+            .values(balance=BankAccount.balance + credit_values.c.amount)
+            .returning(BankAccount.uid, BankAccount.balance)
+            .execution_options(synchronize_session=False)
+        )
+        return {
+            account_id: balance - credits[account_id]
+            for account_id, balance in result.all()
+        }
+
+    async def opening_postings(
+        self, session: AsyncSession, balances: dict[uuid.UUID, Decimal]
+    ) -> list[dict]:
+        """
+        Opening journals for accounts, given their balance before this
+        movement, that held money before the ledger and have no postings yet.
+        """
+        postings = []
+        posted = await self.accounts_with_postings(session, balances.keys())
+        for account_id, opening in balances.items():
+            if opening != 0 and account_id not in posted:
+                postings += journal(account_id, opening, opening, LedgerAccount.OPENING)
+        return postings
+
+    async def append_journal(
+        self,
+        session: AsyncSession,
+        account_id: uuid.UUID,
+        amount: Decimal,
+        balance_after: Decimal,
+        counterparty: LedgerAccount,
+        transaction_id: Optional[uuid.UUID] = None,
+    ) -> None:
+        """
+        Appends a balanced journal: `amount` on the account and its opposite
+        on `counterparty`. The account row must already be locked by the
+        caller's transaction.
+        """
+        await self.append_postings(
+            session,
+            journal(account_id, amount, balance_after, counterparty, transaction_id),
+        )
+
+    async def append_postings(self, session: AsyncSession, postings: list[dict]) -> None:
+        """Inserts postings built by `journal` with a single statement."""
+        # clock_timestamp() is read after the accounts' row locks were taken,
+        # so postings of one account are timestamped in commit order.
+        created_at = func.timezone("UTC", func.clock_timestamp())
+
+        await session.execute(
+            insert(LedgerEntry).values(
+                [{**posting, "created_at": created_at} for posting in postings]
+            )
+        )
+
+
+def journal(
+    account_id: uuid.UUID,
+    amount: Decimal,
+    balance_after: Decimal,
+    counterparty: LedgerAccount,
+    transaction_id: Optional[uuid.UUID] = None,
+    counter_account_id: Optional[uuid.UUID] = None,
+    counter_balance_after: Optional[Decimal] = None,
+) -> list[dict]:
+    """
+    Builds the two postings of a journal: `amount` on a customer account and
+    its opposite on `counterparty`, which is another customer account when
+    `counter_account_id` is given.
+    """
+    journal_id = uuid.uuid4()
+    return [
+        {
+            "journal_id": journal_id,
+            "ledger_account": LedgerAccount.CUSTOMER,
+            "account_id": account_id,
+            "transaction_id": transaction_id,
+            "amount": amount,
+            "balance_after": balance_after,
+        },
+        {
+            "journal_id": journal_id,
+            "ledger_account": counterparty,
+            "account_id": counter_account_id,
+            "transaction_id": transaction_id,
+            "amount": -amount,
+            "balance_after": counter_balance_after,
+        },
+    ]
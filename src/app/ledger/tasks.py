@@ -0,0 +1,25 @@
+import asyncio
+
+from src.celery_tasks import celery_app
+from src.db.db import worker_session_maker
+
+from .services import LedgerService
+
+ledger_service = LedgerService()
+
+
+async def reconcile_ledger_async() -> dict:
+    async with worker_session_maker() as session:
+        report = await ledger_service.reconcile(session)
+    return report.model_dump(mode="json")
+
+
+@celery_app.task
+def reconcile_ledger() -> dict:
+    """
+    Celery task recomputing account balances from ledger postings.
+
+    Scheduled by celery beat every `LEDGER_RECONCILE_INTERVAL` seconds; drift
+    is logged and returned as the task result.
+    """
+    return asyncio.run(reconcile_ledger_async())
@@ -4,7 +4,8 @@ import uuid
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.app.auth.models import User, UserRole
+from src.app.auth.models import UserRole
+from src.app.auth.schemas import Principal
 from src.app.loans.models import Loan
 from src.app.loans.schemas import LoanCreate, LoanUpdate
 from src.errors import LoanNotFound, InsufficientPermission
@@ -16,7 +17,7 @@ class LoanService:
     async def get_all_user_loans(
         self,
         session: AsyncSession,
-        user: User,
+        user: Principal,
     ):
         statement = select(Loan).where(Loan.user_id == user.uid)
 
@@ -27,7 +28,7 @@ class LoanService:
     async def get_all_loans(
         self,
         session: AsyncSession,
-        user: User,
+        user: Principal,
     ):
         if user.role not in (UserRole.MANAGER, UserRole.ADMIN):
             raise InsufficientPermission()
@@ -44,7 +45,7 @@ class LoanService:
     async def get_loan_by_uid(
         self,
         session: AsyncSession,
-        user: User,
+        user: Principal,
         uid: uuid.UUID,
     ):
         statement = (
@@ -59,7 +60,7 @@ class LoanService:
         return loan
 
     async def create_new_loan(
-        self, session: AsyncSession, user: User, loan_data: LoanCreate
+        self, session: AsyncSession, user: Principal, loan_data: LoanCreate
     ):
         # Get the LoanType and LoanDuration from the body and validate
         loan_type = LoanType.from_str(loan_data.loan_type)
@@ -78,16 +79,12 @@ class LoanService:
         await session.commit()
         await session.refresh(loan)
 
-        user.loans.append(loan)
-        await session.commit()
-        await session.refresh(user)
-
         return loan
 
     async def update_loan(
         self,
         uid: uuid.UUID,
-        user: User,
+        user: Principal,
         loan_data: LoanUpdate,
         session: AsyncSession,
     ):
@@ -116,7 +113,7 @@ class LoanService:
     async def delete_loan(
         self,
         uid: uuid.UUID,
-        user: User,
+        user: Principal,
         session: AsyncSession,
     ):
         loan: Optional[Loan] = await self.get_loan_by_uid(session, user, uid)
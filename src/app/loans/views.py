@@ -8,9 +8,9 @@ from fastapi import (
 )
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.app.auth.models import User
+from src.app.auth.schemas import Principal
 from src.app.auth.services import UserService
-from src.app.auth.dependencies import get_current_user
+from src.app.auth.dependencies import get_current_principal, get_read_session
 from src.app.loans.schemas import LoanCreate, LoanUpdate, LoanRead
 from src.app.loans.services import LoanService
 from src.app.loans.models import Loan
@@ -27,7 +27,7 @@ user_service = UserService()
 async def create_loan_record(
     loan_data: LoanCreate,
     bg_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -39,7 +39,7 @@ async def create_loan_record(
     Args:
     - loan_data (LoanCreate): The details of the loan to be created.
     - bg_tasks (BackgroundTasks): For any background tasks related to loan creation.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Returns:
@@ -55,7 +55,7 @@ async def update_loan_record(
     loan_data: LoanUpdate,
     uid: uuid.UUID,
     bg_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -68,7 +68,7 @@ async def update_loan_record(
     - loan_data (LoanUpdate): The updated loan details.
     - uid (uuid.UUID): The unique identifier of the loan to be updated.
     - bg_tasks (BackgroundTasks): For any background tasks related to loan updates.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Returns:
@@ -81,8 +81,8 @@ async def update_loan_record(
 
 @loan_router.get("", status_code=status.HTTP_200_OK, response_model=List[LoanRead])
 async def get_all_loans(
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
     Retrieve all loans for the authenticated user.
@@ -90,7 +90,7 @@ async def get_all_loans(
     This endpoint returns a list of all loan records associated with the authenticated user.
 
     Args:
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Returns:
@@ -103,7 +103,7 @@ async def get_all_loans(
 
 @loan_router.get("/user-loans", status_code=status.HTTP_200_OK, response_model=List[LoanRead])
 async def get_user_loans(
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -112,7 +112,7 @@ async def get_user_loans(
     This endpoint returns a list of all loan records associated with the authenticated user.
 
     Args:
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Returns:
@@ -126,7 +126,7 @@ async def get_user_loans(
 @loan_router.get("/{uid}", status_code=status.HTTP_200_OK, response_model=LoanRead)
 async def get_loan_by_uid(
     uid: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -137,7 +137,7 @@ async def get_loan_by_uid(
 
     Args:
     - uid (uuid.UUID): The unique identifier of the loan.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Raises:
@@ -156,7 +156,7 @@ async def get_loan_by_uid(
 @loan_router.delete("/{uid}", status_code=status.HTTP_200_OK)
 async def delete_loan_record(
     uid: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -167,7 +167,7 @@ async def delete_loan_record(
 
     Args:
     - uid (uuid.UUID): The unique identifier of the loan to be deleted.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Returns:
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.celery_tasks import celery_app
+from src.utils.logger import LOGGER
+
+from .models import OutboxMessage
+
+
+class OutboxService:
+    def enqueue(self, session: AsyncSession, task: str, **kwargs) -> OutboxMessage:
+        """
+        Records a Celery task on the caller's session.
+
+        The task is only sent once the caller commits, and never if the
+        transaction rolls back.
+        """
+        message = OutboxMessage(task=task, payload=kwargs)
+        session.add(message)
+        return message
+
+    async def relay(
+        self, session: AsyncSession, batch_size: int, retention: int
+    ) -> int:
+        """
+        Sends one batch of pending messages to the broker and commits.
+
+        Rows are claimed with `FOR UPDATE SKIP LOCKED` so relays can run in
+        parallel. Delivery is at-least-once: a relay that dies after sending
+        but before committing sends its batch again. Messages dispatched more
+        than `retention` seconds ago are purged. Returns how many were sent.
+        """
+        result = await session.exec(
+            select(OutboxMessage)
+            .where(OutboxMessage.dispatched_at.is_(None))
+            .order_by(OutboxMessage.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+        dispatched = []
+        for message in result.all():
+            try:
+                celery_app.send_task(message.task, kwargs=message.payload)
+            except Exception as exc:
+                # Leave the rest pending; the next run retries them in order
+                LOGGER.error(f"Outbox relay failed on message {message.id}: {exc}")
+                break
+            dispatched.append(message.id)
+
+        now = datetime.utcnow()
+        if dispatched:
+            await session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(dispatched))
+                .values(dispatched_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        await session.execute(
+            delete(OutboxMessage).where(
+                OutboxMessage.dispatched_at < now - timedelta(seconds=retention)
+            )
+        )
+        await session.commit()
+
+        return len(dispatched)
@@ -0,0 +1,35 @@
+import asyncio
+
+from src.celery_tasks import celery_app
+from src.config.settings import Config
+from src.db.db import worker_session_maker
+
+from .services import OutboxService
+
+outbox_service = OutboxService()
+
+
+async def relay_outbox_async(
+    batch_size: int = Config.OUTBOX_BATCH_SIZE,
+    retention: int = Config.OUTBOX_RETENTION,
+) -> int:
+    sent = 0
+
+    async with worker_session_maker() as session:
+        while True:
+            relayed = await outbox_service.relay(session, batch_size, retention)
+            sent += relayed
+            if relayed < batch_size:
+                break
+
+    return sent
+
+
+@celery_app.task
+def relay_outbox() -> int:
+    """
+    Celery task forwarding committed outbox messages to the broker.
+
+    Scheduled by celery beat every `OUTBOX_RELAY_INTERVAL` seconds.
+    """
+    return asyncio.run(relay_outbox_async())
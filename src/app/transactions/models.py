@@ -1,9 +1,12 @@
 import uuid
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlmodel import Relationship, SQLModel, Field
 import sqlalchemy.dialects.postgresql as pg
 from typing import Optional, TYPE_CHECKING
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
+
+from src.utils.money import MONEY_DIGITS, MONEY_PLACES
 
 if TYPE_CHECKING:
     from src.app.auth.models import User
@@ -13,6 +16,11 @@ from .schemas import TransactionStatus, TransactionType
 # TransactionHistory model
 class TransactionHistory(SQLModel, table=True):
     __tablename__ = "transactions"
+    # Keyset pagination walks (created_at, uid) newest first, globally or per user
+    __table_args__ = (
+        Index("ix_transactions_created_at_uid", "created_at", "uid"),
+        Index("ix_transactions_user_id_created_at_uid", "user_id", "created_at", "uid"),
+    )
 
     uid: uuid.UUID = Field(
         sa_column=Column(
@@ -22,9 +30,13 @@ class TransactionHistory(SQLModel, table=True):
 
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
     user: Optional["User"] = Relationship(back_populates="transactions")
+    # Account the amount was debited from; null for records without one
+    account_id: Optional[uuid.UUID] = Field(
+        default=None, foreign_key="bank_accounts.uid", index=True
+    )
     domain: str
 
-    amount: float
+    amount: Decimal = Field(max_digits=MONEY_DIGITS, decimal_places=MONEY_PLACES)
     transaction_type: TransactionType = TransactionType.TRANSFER
     status: TransactionStatus = TransactionStatus.PENDING  # Default status
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -32,3 +44,27 @@ class TransactionHistory(SQLModel, table=True):
         default_factory=datetime.utcnow,
         sa_column=Column(pg.TIMESTAMP, default=datetime.now),
     )
+
+
+# Per-user daily totals, maintained in the same DB transaction as every
+# insert or status change on `transactions`. Failed transactions are excluded.
+class TransactionDailyRollup(SQLModel, table=True):
+    __tablename__ = "transaction_daily_rollups"
+    __table_args__ = (
+        Index("ix_transaction_daily_rollups_user_id_day", "user_id", "day"),
+        Index("ix_transaction_daily_rollups_day", "day"),
+    )
+
+    domain: str = Field(primary_key=True)
+    user_id: uuid.UUID = Field(primary_key=True, foreign_key="users.uid")
+    day: date = Field(primary_key=True)
+
+    total_transferred: Decimal = Field(
+        default=Decimal("0.00"), max_digits=MONEY_DIGITS, decimal_places=MONEY_PLACES
+    )
+    total_withdrawn: Decimal = Field(
+        default=Decimal("0.00"), max_digits=MONEY_DIGITS, decimal_places=MONEY_PLACES
+    )
+    total_deposited: Decimal = Field(
+        default=Decimal("0.00"), max_digits=MONEY_DIGITS, decimal_places=MONEY_PLACES
+    )
@@ -1,8 +1,11 @@
 from enum import Enum
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from src.config.settings import Config
+from src.utils.money import Money
 
 
 class TransactionType(str, Enum):
@@ -33,9 +36,14 @@ class TransactionStatus(str, Enum):
 
 
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 # Base schema with common attributes
 class TransactionBase(BaseModel):
-    amount: float
+    amount: Money = Field(gt=0)
 
 
 # Schema for creating a new transaction
@@ -53,11 +61,19 @@ class TransactionRead(TransactionBase):
     created_at: datetime
     updated_at: datetime
 
+    class Config:
+        from_attributes = True
+
+
+class TransactionPage(BaseModel):
+    items: List[TransactionRead]
+    next_cursor: Optional[str] = None
+
 
 class TransactionSummary(BaseModel):
     date: datetime
-    total_debits: float
-    total_deposits: float
+    total_debits: Money
+    total_deposits: Money
 
 class TransactionUpdate(BaseModel):
     status: TransactionStatus
@@ -77,3 +93,27 @@ class InternationalTransferSchema(TransactionBase):
 
 class WithdrawalSchema(TransactionBase):
     pass
+
+
+class BatchTransferSchema(BaseModel):
+    transfers: List[DomesticTransferSchema] = Field(
+        min_length=1, max_length=Config.BATCH_TRANSFER_MAX_ITEMS
+    )
+
+
+class BatchTransferStatus(str, Enum):
+    COMPLETED = "completed"
+    REJECTED = "rejected"
+
+
+class BatchTransferItemResult(BaseModel):
+    index: int
+    status: BatchTransferStatus
+    transaction: Optional[TransactionRead] = None
+    error_code: Optional[str] = None
+
+
+class BatchTransferResult(BaseModel):
+    items: List[BatchTransferItemResult]
+    total_debited: Money
+    balance: Money
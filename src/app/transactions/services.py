@@ -1,89 +1,349 @@
-from typing import Optional
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import AsyncIterator, Optional
 import uuid
 
+from sqlalchemy import and_, delete, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel import select
-from sqlmodel import func, case, cast, Date
-from src.app.auth.models import User, UserRole
+from sqlmodel import func
+from src.app.auth.models import BankAccount, User, UserRole
+from src.app.auth.schemas import Principal
 from src.app.transactions.models import (
+    TransactionDailyRollup,
     TransactionHistory,
     TransactionStatus,
     TransactionType,
 )
 from src.app.transactions.schemas import (
+    BatchTransferItemResult,
+    BatchTransferResult,
+    BatchTransferStatus,
     DomesticTransferSchema,
+    ExportFormat,
     InternationalTransferSchema,
     TransactionCreate,
+    TransactionPage,
+    TransactionRead,
     TransactionSummary,
     TransactionUpdate,
     WithdrawalSchema,
 )
+from src.app.transactions.settlement import SettlementClient
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.app.ledger.schemas import LedgerAccount
+from src.app.ledger.services import LedgerService
+from src.db.db import replica_session_maker
 from src.errors import (
+    BankAccountNotFound,
+    InsufficientFunds,
     InsufficientPermission,
     TransactionNotFound,
 )
+from src.utils.logger import LOGGER
+from src.utils.pagination import decode_cursor, encode_cursor
+
+# Rollup column each transaction type is added to
+ROLLUP_COLUMNS = {
+    TransactionType.TRANSFER: "total_transferred",
+    TransactionType.WITHDRAWAL: "total_withdrawn",
+    TransactionType.DEPOSIT: "total_deposited",
+}
+
+# Transaction types that were debited from an account when created
+DEBIT_TYPES = (TransactionType.TRANSFER, TransactionType.WITHDRAWAL)
+
+# Columns written by the export, in output order
+EXPORT_COLUMNS = (
+    TransactionHistory.uid,
+    TransactionHistory.user_id,
+    TransactionHistory.domain,
+    TransactionHistory.amount,
+    TransactionHistory.transaction_type,
+    TransactionHistory.status,
+    TransactionHistory.created_at,
+    TransactionHistory.updated_at,
+)
+
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if value is None:
+        return ""
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def _csv_chunk(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+ledger_service = LedgerService()
+
+
+def source_account(user: Principal, account_number: str):
+    """
+    Matches the account `user` may move money out of: admins any account by
+    number, managers accounts owned by a user of their domain and other users
+    only their own.
+    """
+    clause = BankAccount.account_number == account_number
+    if user.role == UserRole.MANAGER:
+        clause = and_(
+            clause,
+            BankAccount.user_id.in_(select(User.uid).where(User.domain == user.domain)),
+        )
+    elif user.role != UserRole.ADMIN:
+        clause = and_(clause, BankAccount.user_id == user.uid)
+    return clause
 
 
 class TransactionService:
-    async def get_transaction_summary(self, user: User, session: AsyncSession):
-        query = (select(
-            func.date(TransactionHistory.created_at).label('date'),
-            func.sum(
-                case(
-                    (TransactionHistory.transaction_type =="transfer", TransactionHistory.amount),
-                    else_=0
-                )
-            ).label('total_debits'),
-            func.sum(
-                case(
-                    (TransactionHistory.transaction_type =="withdrawal", TransactionHistory.amount),
-                    else_=0
-                )
-            ).label('total_withdrawn'),
-            func.sum(
-                case(
-                    (TransactionHistory.transaction_type == "deposit", TransactionHistory.amount),
-                    else_=0
-                )
-            ).label('total_deposits')
+    async def get_transaction_summary(self, user: Principal, session: AsyncSession):
+        """
+        Daily totals read from `transaction_daily_rollups`.
+
+        Admins get every domain, managers their domain and other users their
+        own transactions; each is a range scan over one row per user and day.
+        """
+        statement = select(
+            TransactionDailyRollup.day.label("date"),
+            func.sum(TransactionDailyRollup.total_transferred).label("total_transferred"),
+            func.sum(TransactionDailyRollup.total_withdrawn).label("total_withdrawn"),
+            func.sum(TransactionDailyRollup.total_deposited).label("total_deposits"),
         )
-        .group_by(func.date(TransactionHistory.created_at))
-        .order_by(func.date(TransactionHistory.created_at))
+
+        if user.role == UserRole.MANAGER:
+            statement = statement.where(TransactionDailyRollup.domain == user.domain)
+        elif user.role != UserRole.ADMIN:
+            statement = statement.where(TransactionDailyRollup.user_id == user.uid)
+
+        statement = statement.group_by(TransactionDailyRollup.day).order_by(
+            TransactionDailyRollup.day
         )
 
-        result = await session.execute(query)
-        transactions_summary = result.fetchall()
+        result = await session.execute(statement)
 
-        summary_list = [
+        return [
             TransactionSummary(
                 date=row.date,
-                total_debits=row.total_debits + row.total_withdrawn,
+                total_debits=row.total_transferred + row.total_withdrawn,
                 total_deposits=row.total_deposits,
             )
-            for row in transactions_summary
+            for row in result.fetchall()
         ]
 
-        return summary_list
+    async def update_daily_rollup(
+        self,
+        session: AsyncSession,
+        transaction: TransactionHistory,
+        sign: int = 1,
+        amount: Optional[Decimal] = None,
+    ) -> None:
+        """
+        Adds (or with `sign=-1` removes) a transaction from its daily rollup.
+
+        `amount` overrides the transaction's own amount, so a batch of
+        transactions sharing a rollup row is added in one upsert. Runs on the
+        caller's session so it commits or rolls back together with the
+        transaction rows.
+        """
+        column = ROLLUP_COLUMNS[TransactionType(transaction.transaction_type)]
+        amount = sign * (transaction.amount if amount is None else amount)
+
+        statement = pg_insert(TransactionDailyRollup).values(
+            domain=transaction.domain,
+            user_id=transaction.user_id,
+            day=transaction.created_at.date(),
+            **{column: amount},
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["domain", "user_id", "day"],
+            set_={column: getattr(TransactionDailyRollup, column) + amount},
+        )
+        await session.execute(statement)
+
+    async def rebuild_daily_rollups(self, session: AsyncSession) -> int:
+        """
+        Recomputes `transaction_daily_rollups` from the transactions table.
+
+        Used once to backfill history and to repair drift; returns the number
+        of rollup rows written. The table is locked against writes for the
+        duration, so a transaction recorded meanwhile either lands before the
+        rebuild reads the transactions table or is added after it commits.
+        Reads of the rollups carry on.
+        """
+        day = func.date(TransactionHistory.created_at)
+        totals = {
+            column: func.coalesce(
+                func.sum(TransactionHistory.amount).filter(
+                    TransactionHistory.transaction_type == transaction_type
+                ),
+                0,
+            )
+            for transaction_type, column in ROLLUP_COLUMNS.items()
+        }
+        source = (
+            select(
+                TransactionHistory.domain,
+                TransactionHistory.user_id,
+                day,
+                *totals.values(),
+            )
+            .where(TransactionHistory.status != TransactionStatus.FAILED)
+            .where(TransactionHistory.user_id.is_not(None))
+            .group_by(TransactionHistory.domain, TransactionHistory.user_id, day)
+        )
+
+        await session.execute(
+            text(
+                f"LOCK TABLE {TransactionDailyRollup.__tablename__} IN EXCLUSIVE MODE"
+            )
+        )
+        await session.execute(delete(TransactionDailyRollup))
+        result = await session.execute(
+            pg_insert(TransactionDailyRollup).from_select(
+                ["domain", "user_id", "day", *totals.keys()], source
+            )
+        )
+        await session.commit()
+        return result.rowcount
+
+    def filter_transactions(
+        self,
+        statement,
+        user: Principal,
+        status: Optional[TransactionStatus] = None,
+        transaction_type: Optional[TransactionType] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        user_id: Optional[uuid.UUID] = None,
+    ):
+        """
+        Restricts a select over `transactions` to what `user` may see and to
+        the given filters. Admins see every transaction, managers their
+        domain and other users only their own.
+        """
+        if user.role == UserRole.MANAGER:
+            statement = statement.where(TransactionHistory.domain == user.domain)
+        elif user.role != UserRole.ADMIN:
+            user_id = user.uid
+
+        if user_id is not None:
+            statement = statement.where(TransactionHistory.user_id == user_id)
+        if status is not None:
+            statement = statement.where(TransactionHistory.status == status)
+        if transaction_type is not None:
+            statement = statement.where(
+                TransactionHistory.transaction_type == transaction_type
+            )
+        if start_date is not None:
+            statement = statement.where(TransactionHistory.created_at >= start_date)
+        if end_date is not None:
+            statement = statement.where(TransactionHistory.created_at < end_date)
+        return statement
 
     async def get_all_transactions(
         self,
         session: AsyncSession,
-        user: User,
-    ):
-        statement = (
-            select(TransactionHistory).where(TransactionHistory.domain == user.domain)
-            if user.role == UserRole.MANAGER
-            else select(TransactionHistory)
+        user: Principal,
+        limit: int,
+        cursor: Optional[str] = None,
+        status: Optional[TransactionStatus] = None,
+        transaction_type: Optional[TransactionType] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        user_id: Optional[uuid.UUID] = None,
+    ) -> TransactionPage:
+        """
+        Returns one page of transactions, newest first.
+
+        Pages are keyed on `(created_at, uid)` so each page is an index range
+        scan no matter how deep the caller has paged.
+        """
+        statement = self.filter_transactions(
+            select(TransactionHistory),
+            user,
+            status=status,
+            transaction_type=transaction_type,
+            start_date=start_date,
+            end_date=end_date,
+            user_id=user_id,
         )
+
+        if cursor is not None:
+            statement = statement.where(
+                tuple_(TransactionHistory.created_at, TransactionHistory.uid)
+                < tuple_(*decode_cursor(cursor))
+            )
+
+        statement = statement.order_by(
+            TransactionHistory.created_at.desc(), TransactionHistory.uid.desc()
+        ).limit(limit + 1)
+
         result = await session.exec(statement)
-        return result.all()
+        items = result.all()
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1].created_at, items[-1].uid)
+
+        return TransactionPage(items=items, next_cursor=next_cursor)
+
+    async def export_transactions(
+        self,
+        user: Principal,
+        export_format: ExportFormat,
+        fetch_size: int,
+        **filters,
+    ) -> AsyncIterator[str]:
+        """
+        Streams the transactions visible to `user` as NDJSON or CSV, oldest first.
+
+        Rows are read through a server-side cursor `fetch_size` at a time and
+        each batch is emitted as one chunk, so memory stays flat however long
+        the history is. The generator outlives the request's dependencies and
+        therefore opens its own session.
+        """
+        statement = self.filter_transactions(
+            select(*EXPORT_COLUMNS), user, **filters
+        ).order_by(TransactionHistory.created_at, TransactionHistory.uid)
+
+        if export_format == ExportFormat.CSV:
+            yield _csv_chunk([[column.name for column in EXPORT_COLUMNS]])
+
+        async with replica_session_maker() as session:
+            result = await session.stream(
+                statement.execution_options(yield_per=fetch_size)
+            )
+            async for rows in result.partitions():
+                if export_format == ExportFormat.CSV:
+                    yield _csv_chunk(
+                        [[_export_value(value) for value in row] for row in rows]
+                    )
+                else:
+                    yield "".join(
+                        json.dumps(dict(row._mapping), default=_export_value) + "\n"
+                        for row in rows
+                    )
 
     async def get_transaction_by_uid(
         self,
         session: AsyncSession,
-        user: User,
+        user: Principal,
         uid: uuid.UUID,
+        for_update: bool = False,
     ):
         statement = (
             select(TransactionHistory)
@@ -92,12 +352,14 @@ class TransactionService:
             if user.role not in (UserRole.MANAGER, UserRole.ADMIN)
             else select(TransactionHistory).where(TransactionHistory.uid == uid)
         )
+        if for_update:
+            statement = statement.with_for_update()
         result = await session.exec(statement)
         transaction = result.first()
         return transaction
 
     async def create_new_transaction(
-        self, session: AsyncSession, user: User, transfer_data: TransactionCreate
+        self, session: AsyncSession, user: Principal, transfer_data: TransactionCreate
     ):
         if user.role not in (UserRole.MANAGER, UserRole.ADMIN):
             raise InsufficientPermission()
@@ -105,17 +367,87 @@ class TransactionService:
         transfer_data_dict = transfer_data.model_dump()
         transaction = TransactionHistory(**transfer_data_dict)
         transaction.domain = user.domain
-        transaction.user = user
         transaction.user_id = user.uid
         transaction.transaction_type = TransactionType.TRANSFER
         transaction.status = TransactionStatus.COMPLETED
         session.add(transaction)
+        await self.update_daily_rollup(session, transaction)
         await session.commit()
         await session.refresh(transaction)
         return transaction
 
+    async def get_account_id(
+        self, session: AsyncSession, account_number: Optional[str]
+    ) -> uuid.UUID:
+        """
+        Raises:
+            BankAccountNotFound: If no account has this number.
+        """
+        result = await session.execute(
+            select(BankAccount.uid).where(BankAccount.account_number == account_number)
+        )
+        account_id = result.scalar_one_or_none()
+
+        if account_id is None:
+            raise BankAccountNotFound()
+
+        return account_id
+
+    async def debit_account(
+        self,
+        session: AsyncSession,
+        transaction: TransactionHistory,
+        account_number: Optional[str] = None,
+        user: Optional[Principal] = None,
+    ) -> None:
+        """
+        Posts `transaction.amount` out of an account through the ledger.
+
+        The account is `account_number` when given, restricted to the accounts
+        `user` may debit, else `transaction.account_id`.
+        The balance check and the decrement are one conditional UPDATE, so
+        concurrent debits of one account can neither overdraw it nor lose an
+        update. Nothing is committed; the caller commits together with the
+        transaction row.
+
+        Raises:
+            BankAccountNotFound: If the account does not exist or `user` may
+                not debit it.
+            InsufficientFunds: If the balance does not cover the amount.
+        """
+        account = (
+            source_account(user, account_number)
+            if account_number is not None
+            else BankAccount.uid == transaction.account_id
+        )
+        posted = await ledger_service.post(
+            session, account, -transaction.amount, LedgerAccount.EXTERNAL, transaction
+        )
+
+        if posted is None:
+            result = await session.execute(select(BankAccount.uid).where(account))
+            if result.first() is None:
+                raise BankAccountNotFound()
+            raise InsufficientFunds()
+
+    async def credit_account(
+        self, session: AsyncSession, transaction: TransactionHistory
+    ) -> None:
+        """Posts `transaction.amount` back into its account without committing."""
+        await ledger_service.post(
+            session,
+            BankAccount.uid == transaction.account_id,
+            transaction.amount,
+            LedgerAccount.EXTERNAL,
+            transaction,
+        )
+
     async def transfer_to_domestic_account(
-        self, session: AsyncSession, user: User, transfer_data: DomesticTransferSchema
+        self,
+        session: AsyncSession,
+        user: Principal,
+        transfer_data: DomesticTransferSchema,
+        account_number: str,
     ) -> TransactionHistory:
         transfer_data_dict = transfer_data.model_dump()
 
@@ -123,24 +455,133 @@ class TransactionService:
         new_transaction = TransactionHistory(**transfer_data_dict)
         new_transaction.transaction_type = TransactionType.TRANSFER
         new_transaction.domain = user.domain
-        new_transaction.user = user
         new_transaction.user_id = user.uid
 
         # Logic for domestic transfer goes here
         new_transaction.status = TransactionStatus.COMPLETED
 
-        # Add and commit the new user to the session
+        # Debit the account and record the transaction in one commit
+        await self.debit_account(session, new_transaction, account_number, user)
         session.add(new_transaction)
+        await self.update_daily_rollup(session, new_transaction)
         await session.commit()
         await session.refresh(new_transaction)
 
         return new_transaction
 
+    async def batch_transfer(
+        self,
+        session: AsyncSession,
+        user: Principal,
+        account_number: str,
+        transfers: list[DomesticTransferSchema],
+    ) -> BatchTransferResult:
+        """
+        Makes many domestic transfers out of one account in a single commit.
+
+        The source account is locked once and recipients are resolved with a
+        single IN query. Transfers are accepted in order while the balance
+        covers them; the rest are rejected individually. All accepted rows,
+        the ledger postings and the balance changes are written in bulk.
+
+        Raises:
+            BankAccountNotFound: If the source account does not exist or
+                `user` may not debit it.
+        """
+        result = await session.execute(
+            select(BankAccount.uid, BankAccount.balance)
+            .where(source_account(user, account_number))
+            .with_for_update()
+        )
+        source = result.first()
+        if source is None:
+            raise BankAccountNotFound()
+
+        result = await session.execute(
+            select(BankAccount.account_number, BankAccount.uid).where(
+                BankAccount.account_number.in_(
+                    {item.recipient_account_number for item in transfers}
+                )
+            )
+        )
+        recipients = dict(result.all())
+
+        available = source.balance
+        items: list[BatchTransferItemResult] = []
+        accepted: list[tuple[TransactionHistory, Optional[uuid.UUID]]] = []
+
+        for index, item in enumerate(transfers):
+            if item.recipient_account_number == account_number:
+                items.append(
+                    BatchTransferItemResult(
+                        index=index,
+                        status=BatchTransferStatus.REJECTED,
+                        error_code="invalid_recipient",
+                    )
+                )
+                continue
+
+            if item.amount > available:
+                items.append(
+                    BatchTransferItemResult(
+                        index=index,
+                        status=BatchTransferStatus.REJECTED,
+                        error_code="insufficient_funds",
+                    )
+                )
+                continue
+
+            available -= item.amount
+            transaction = TransactionHistory(**item.model_dump())
+            transaction.uid = uuid.uuid4()
+            transaction.transaction_type = TransactionType.TRANSFER
+            transaction.domain = user.domain
+            transaction.user_id = user.uid
+            transaction.account_id = source.uid
+            transaction.status = TransactionStatus.COMPLETED
+            accepted.append(
+                (transaction, recipients.get(item.recipient_account_number))
+            )
+            items.append(
+                BatchTransferItemResult(
+                    index=index,
+                    status=BatchTransferStatus.COMPLETED,
+                    transaction=TransactionRead.model_validate(transaction),
+                )
+            )
+
+        total = source.balance - available
+        balance = source.balance
+
+        if accepted:
+            session.add_all([transaction for transaction, _ in accepted])
+            await session.flush()
+
+            balance = await ledger_service.post_transfers(
+                session,
+                source.uid,
+                [
+                    (transaction.amount, recipient_id, transaction.uid)
+                    for transaction, recipient_id in accepted
+                ],
+            )
+            rollups: dict[date, list[TransactionHistory]] = {}
+            for transaction, _ in accepted:
+                rollups.setdefault(transaction.created_at.date(), []).append(transaction)
+            for group in rollups.values():
+                await self.update_daily_rollup(
+                    session, group[0], amount=sum(t.amount for t in group)
+                )
+            await session.commit()
+
+        return BatchTransferResult(items=items, total_debited=total, balance=balance)
+
     async def transfer_to_international_account(
         self,
         session: AsyncSession,
-        user: User,
+        user: Principal,
         transfer_data: InternationalTransferSchema,
+        account_number: str,
     ) -> TransactionHistory:
         transfer_data_dict = transfer_data.model_dump()
 
@@ -148,21 +589,103 @@ class TransactionService:
         new_transaction = TransactionHistory(**transfer_data_dict)
         new_transaction.transaction_type = TransactionType.TRANSFER
         new_transaction.domain = user.domain
-        new_transaction.user = user
         new_transaction.user_id = user.uid
 
         # Logic for domestic transfer goes here
         new_transaction.status = TransactionStatus.PENDING
 
-        # Add and commit the new user to the session
+        # Debit the account and record the transaction in one commit
+        await self.debit_account(session, new_transaction, account_number, user)
         session.add(new_transaction)
+        await self.update_daily_rollup(session, new_transaction)
         await session.commit()
         await session.refresh(new_transaction)
 
         return new_transaction
 
+    async def settle_international_transfers(
+        self, session: AsyncSession, client: SettlementClient, batch_size: int
+    ) -> dict:
+        """
+        Settles one batch of pending international transfers through `client`
+        and commits.
+
+        Rows are claimed with `FOR UPDATE SKIP LOCKED`, so any number of
+        workers can settle concurrently without picking the same transfer.
+        Status changes, refunds of failed transfers and rollup corrections
+        are applied in bulk. Transfers without an answer yet, or whose bank
+        call failed, stay pending. Returns how many transfers completed,
+        failed and are still pending.
+        """
+        result = await session.exec(
+            select(TransactionHistory)
+            .where(TransactionHistory.status == TransactionStatus.PENDING)
+            .where(TransactionHistory.transaction_type == TransactionType.TRANSFER)
+            .where(TransactionHistory.account_id.is_not(None))
+            .order_by(TransactionHistory.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        transactions = result.all()
+
+        completed, failed, pending = [], [], []
+        for transaction in transactions:
+            try:
+                outcome = await client.settle(transaction)
+            except Exception as exc:
+                # Retried on the next run like any undecided transfer
+                LOGGER.error(f"Settlement of transfer {transaction.uid} failed: {exc}")
+                outcome = None
+            if outcome is None:
+                pending.append(transaction)
+            elif outcome:
+                completed.append(transaction)
+            else:
+                failed.append(transaction)
+
+        now = datetime.utcnow()
+        for status, settled in (
+            (TransactionStatus.COMPLETED, completed),
+            (TransactionStatus.FAILED, failed),
+        ):
+            if settled:
+                await session.execute(
+                    update(TransactionHistory)
+                    .where(TransactionHistory.uid.in_([t.uid for t in settled]))
+                    .values(status=status, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+
+        if failed:
+            await ledger_service.post_credits(
+                session,
+                [(t.account_id, t.amount, t.uid) for t in failed],
+                LedgerAccount.EXTERNAL,
+            )
+
+            rollups: dict[tuple, list[TransactionHistory]] = {}
+            for transaction in failed:
+                key = (transaction.domain, transaction.user_id, transaction.created_at.date())
+                rollups.setdefault(key, []).append(transaction)
+            for group in rollups.values():
+                await self.update_daily_rollup(
+                    session, group[0], sign=-1, amount=sum(t.amount for t in group)
+                )
+
+        await session.commit()
+
+        return {
+            "completed": len(completed),
+            "failed": len(failed),
+            "pending": len(pending),
+        }
+
     async def withdraw_from_account(
-        self, session: AsyncSession, user: User, transfer_data: WithdrawalSchema
+        self,
+        session: AsyncSession,
+        user: Principal,
+        transfer_data: WithdrawalSchema,
+        account_number: str,
     ) -> TransactionHistory:
         transfer_data_dict = transfer_data.model_dump()
 
@@ -170,14 +693,15 @@ class TransactionService:
         new_transaction = TransactionHistory(**transfer_data_dict)
         new_transaction.transaction_type = TransactionType.WITHDRAWAL
         new_transaction.domain = user.domain
-        new_transaction.user = user
         new_transaction.user_id = user.uid
 
         # Logic for domestic transfer goes here
         new_transaction.status = TransactionStatus.COMPLETED
 
-        # Add and commit the new user to the session
+        # Debit the account and record the transaction in one commit
+        await self.debit_account(session, new_transaction, account_number, user)
         session.add(new_transaction)
+        await self.update_daily_rollup(session, new_transaction)
         await session.commit()
         await session.refresh(new_transaction)
 
@@ -186,25 +710,55 @@ class TransactionService:
     async def update_transaction(
         self,
         uid: uuid.UUID,
-        user: User,
+        user: Principal,
         trans_data: TransactionUpdate,
         session: AsyncSession,
+        account_number: Optional[str] = None,
     ):
+        """
+        Changes a transaction's status and settles the account in the same commit.
+
+        Debits are taken when a transaction is created, so only moving into or
+        out of FAILED touches the balance: failing a debit refunds it and
+        reviving a failed one debits it again. Repeating a status is a no-op.
+        The transaction row is locked so concurrent updates cannot refund twice.
+        `account_number` is only consulted for transactions recorded before
+        they carried their account.
+        """
         if user.role not in (UserRole.MANAGER, UserRole.ADMIN):
             raise InsufficientPermission()
 
         trans_data_dict = trans_data.model_dump()
 
         transaction: Optional[TransactionHistory] = await self.get_transaction_by_uid(
-            session, user, uid
+            session, user, uid, for_update=True
         )
 
         if transaction is None:
             raise TransactionNotFound()
 
+        was_failed = transaction.status == TransactionStatus.FAILED
+
         for k, v in trans_data_dict.items():
             setattr(transaction, k, v)
 
+        is_failed = transaction.status == TransactionStatus.FAILED
+        if was_failed != is_failed:
+            await self.update_daily_rollup(
+                session, transaction, sign=-1 if is_failed else 1
+            )
+
+            if transaction.transaction_type in DEBIT_TYPES:
+                if transaction.account_id is None:
+                    transaction.account_id = await self.get_account_id(
+                        session, account_number
+                    )
+
+                if is_failed:
+                    await self.credit_account(session, transaction)
+                else:
+                    await self.debit_account(session, transaction)
+
         await session.commit()
         await session.refresh(transaction)
 
@@ -0,0 +1,35 @@
+import importlib
+from typing import Optional
+
+from src.config.settings import Config
+
+from .models import TransactionHistory
+
+
+class SettlementClient:
+    """
+    Receiving-bank integration that settles international transfers.
+
+    Implementations are named by `SETTLEMENT_CLIENT` as "package.module:Class"
+    and instantiated without arguments, reading their own settings.
+    """
+
+    async def settle(self, transaction: TransactionHistory) -> Optional[bool]:
+        """
+        Submits or polls one transfer with the receiving bank.
+
+        Returns True once the bank accepted it, False when it was rejected and
+        must be refunded, and None while there is no answer yet, which leaves
+        the transfer pending. Calls are repeated for the same transfer until it
+        is decided, so they must be idempotent on `transaction.uid`.
+        """
+        raise NotImplementedError
+
+
+def get_settlement_client() -> Optional[SettlementClient]:
+    """Instantiates the configured `SETTLEMENT_CLIENT`, or None when unset."""
+    if not Config.SETTLEMENT_CLIENT:
+        return None
+    module_name, _, class_name = Config.SETTLEMENT_CLIENT.partition(":")
+    client_class = getattr(importlib.import_module(module_name), class_name)
+    return client_class()
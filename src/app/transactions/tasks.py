@@ -0,0 +1,48 @@
+import asyncio
+
+from src.celery_tasks import celery_app
+from src.config.settings import Config
+from src.db.db import worker_session_maker
+from src.utils.logger import LOGGER
+
+from .services import TransactionService
+from .settlement import get_settlement_client
+
+transaction_service = TransactionService()
+
+
+async def settle_international_transfers_async(
+    batch_size: int = Config.SETTLEMENT_BATCH_SIZE,
+) -> dict:
+    totals = {"completed": 0, "failed": 0}
+    client = get_settlement_client()
+    if client is None:
+        LOGGER.warning("SETTLEMENT_CLIENT is not set; international transfers stay pending")
+        return totals
+
+    async with worker_session_maker() as session:
+        while True:
+            settled = await transaction_service.settle_international_transfers(
+                session, client, batch_size
+            )
+            for k in totals:
+                totals[k] += settled[k]
+            # Undecided transfers would be claimed again; wait for the next run
+            if sum(settled.values()) < batch_size or settled["pending"]:
+                break
+
+    if any(totals.values()):
+        LOGGER.info(f"Settled international transfers: {totals}")
+    return totals
+
+
+@celery_app.task
+def settle_international_transfers() -> dict:
+    """
+    Celery task settling pending international transfers in batches.
+
+    Scheduled by celery beat every `SETTLEMENT_INTERVAL` seconds when
+    `SETTLEMENT_CLIENT` is set. Runs until no claimable transfers are left
+    or the bank has no answer yet; parallel workers skip each other's rows.
+    """
+    return asyncio.run(settle_international_transfers_async())
@@ -1,16 +1,19 @@
+from datetime import datetime
 from typing import Optional, List
 import uuid
 from fastapi import (
     APIRouter,
     Depends,
+    Query,
     status,
     BackgroundTasks,
 )
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.app.auth.models import User
+from src.app.auth.schemas import Principal
 from src.app.auth.services import BusinessService, UserService
-from src.app.auth.utils import verify_password
+from src.app.auth.utils import authorize_transfer
 from src.app.transactions.models import (
     TransactionHistory,
     TransactionStatus,
@@ -18,24 +21,26 @@ from src.app.transactions.models import (
 )
 
 from src.app.auth.dependencies import (
-    get_current_user,
+    RateLimiter,
+    get_current_principal,
+    get_read_session,
 )
 from .schemas import (
+    BatchTransferResult,
+    BatchTransferSchema,
     DomesticTransferSchema,
+    ExportFormat,
     InternationalTransferSchema,
     TransactionCreate,
+    TransactionPage,
     TransactionRead,
     TransactionSummary,
     TransactionUpdate,
     WithdrawalSchema,
 )
 from .services import TransactionService
-from src.errors import (
-    BankAccountNotFound,
-    InsufficientFunds,
-    InvalidTransactionPin,
-    TransactionNotFound,
-)
+from src.errors import TransactionNotFound
+from src.config.settings import Config
 from src.db.db import get_session
 
 transaction_router = APIRouter()
@@ -43,6 +48,13 @@ transaction_service = TransactionService()
 user_service = UserService()
 business_service = BusinessService()
 
+transfer_rate_limit = RateLimiter("transfers", Config.RATE_LIMIT_TRANSFERS, scope="user")
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
 
 # Transaction Routers
 @transaction_router.post(
@@ -51,7 +63,7 @@ business_service = BusinessService()
 async def create_transaction_record(
     transaction_data: TransactionCreate,
     bg_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -64,7 +76,7 @@ async def create_transaction_record(
     Args:
     - transaction_data (TransactionCreate): The details of the transaction to be created.
     - bg_tasks (BackgroundTasks): For any background tasks related to transaction processing.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Returns:
@@ -81,13 +93,15 @@ async def create_transaction_record(
     "/domestic-transfer",
     status_code=status.HTTP_201_CREATED,
     response_model=TransactionRead,
+    dependencies=[Depends(transfer_rate_limit)],
 )
 async def make_domestic_transfers(
     transaction_data: DomesticTransferSchema,
-    transfer_pin: str,
     account_number: str,
     bg_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    transfer_pin: Optional[str] = None,
+    transfer_grant: Optional[str] = None,
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -100,44 +114,28 @@ async def make_domestic_transfers(
 
     Args:
     - transaction_data (DomesticTransferSchema): The details of the domestic transfer.
-    - transfer_pin (str): The user's transfer PIN to authorize the transaction.
+    - transfer_pin (str, optional): The user's transfer PIN to authorize the transaction.
+    - transfer_grant (str, optional): A transfer grant from `/auth/transfer-pin`, used instead of the PIN.
     - account_number (str): The account number to transfer to.
     - bg_tasks (BackgroundTasks): For any background tasks related to transfer processing.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Raises:
     - InvalidTransactionPin: If the provided transfer PIN is incorrect.
+    - InvalidTransferGrant: If the transfer grant is invalid, expired or does not cover the amount.
     - BankAccountNotFound: If the recipient bank account is not found.
     - InsufficientFunds: If the user's account does not have enough balance for the transfer.
 
     Returns:
     - A JSON response containing a success message and the details of the completed transfer.
     """
-    can_transfer = verify_password(transfer_pin, user.transfer_pin_hash)
-    if not can_transfer:
-        raise InvalidTransactionPin()
-
-    bank_account = await business_service.get_bank_by_account_number(
-        account_number, session
-    )
-
-    if bank_account is None:
-        raise BankAccountNotFound()
-
-    if bank_account.balance < transaction_data.amount:
-        raise InsufficientFunds()
-
-    transaction: TransactionHistory = (
-        await transaction_service.transfer_to_domestic_account(
-            session, user, transaction_data
+    async with authorize_transfer(
+        user, transaction_data.amount, session, transfer_pin, transfer_grant
+    ):
+        transaction: TransactionHistory = await transaction_service.transfer_to_domestic_account(
+            session, user, transaction_data, account_number
         )
-    )
-
-    if transaction is not None:
-        bank_account.balance -= transaction_data.amount
-        await session.commit()
-        await session.refresh(bank_account)
 
     return transaction
 
@@ -146,13 +144,15 @@ async def make_domestic_transfers(
     "/international-transfer",
     status_code=status.HTTP_201_CREATED,
     response_model=TransactionRead,
+    dependencies=[Depends(transfer_rate_limit)],
 )
 async def make_international_transfers(
     transaction_data: InternationalTransferSchema,
-    transfer_pin: str,
     account_number: str,
     bg_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    transfer_pin: Optional[str] = None,
+    transfer_grant: Optional[str] = None,
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -164,57 +164,97 @@ async def make_international_transfers(
 
     Args:
     - transaction_data (InternationalTransferSchema): The details of the international transfer.
-    - transfer_pin (str): The user's transfer PIN to authorize the transaction.
+    - transfer_pin (str, optional): The user's transfer PIN to authorize the transaction.
+    - transfer_grant (str, optional): A transfer grant from `/auth/transfer-pin`, used instead of the PIN.
     - account_number (str): The account number to transfer to.
     - bg_tasks (BackgroundTasks): For any background tasks related to transfer processing.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Raises:
     - InvalidTransactionPin: If the provided transfer PIN is incorrect.
+    - InvalidTransferGrant: If the transfer grant is invalid, expired or does not cover the amount.
     - BankAccountNotFound: If the recipient bank account is not found.
     - InsufficientFunds: If the user's account does not have enough balance for the transfer.
 
     Returns:
     - A JSON response containing a success message and the details of the completed transfer.
     """
-    can_transfer = verify_password(transfer_pin, user.transfer_pin_hash)
-    if not can_transfer:
-        raise InvalidTransactionPin()
+    async with authorize_transfer(
+        user, transaction_data.amount, session, transfer_pin, transfer_grant
+    ):
+        transaction: TransactionHistory = await transaction_service.transfer_to_international_account(
+            session, user, transaction_data, account_number
+        )
 
-    bank_account = await business_service.get_bank_by_account_number(
-        account_number, session
-    )
+    return transaction
 
-    if bank_account is None:
-        raise BankAccountNotFound()
 
-    if bank_account.balance < transaction_data.amount:
-        raise InsufficientFunds()
+@transaction_router.post(
+    "/batch",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchTransferResult,
+    dependencies=[Depends(transfer_rate_limit)],
+)
+async def make_batch_transfers(
+    batch_data: BatchTransferSchema,
+    account_number: str,
+    transfer_pin: Optional[str] = None,
+    transfer_grant: Optional[str] = None,
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Make many domestic transfers out of one account at once, e.g. for payroll.
 
-    transaction: TransactionHistory = (
-        await transaction_service.transfer_to_international_account(
-            session, user, transaction_data
-        )
-    )
+    The transfer PIN (or grant) is checked once for the whole batch; a grant
+    must cover the batch total but is only charged for accepted transfers.
+    Transfers are accepted in order while the account balance covers them;
+    each item in the response reports whether it completed or why it was
+    rejected. All accepted transfers are committed together.
 
-    if transaction is not None:
-        bank_account.balance -= transaction_data.amount
-        await session.commit()
-        await session.refresh(bank_account)
+    Args:
+    - batch_data (BatchTransferSchema): The transfers to make, up to `BATCH_TRANSFER_MAX_ITEMS`.
+    - account_number (str): The account number to transfer from.
+    - transfer_pin (str, optional): The user's transfer PIN to authorize the batch.
+    - transfer_grant (str, optional): A transfer grant from `/auth/transfer-pin` covering the batch total.
+    - user (Principal): The current authenticated user.
+    - session (AsyncSession): The current database session.
 
-    return transaction
+    Raises:
+    - InvalidTransactionPin: If the provided transfer PIN is incorrect.
+    - InvalidTransferGrant: If the transfer grant is invalid, expired or does not cover the batch total.
+    - BankAccountNotFound: If the account to transfer from is not found.
+
+    Returns:
+    - Per-item results, the total debited and the account's new balance.
+    """
+    requested = sum(item.amount for item in batch_data.transfers)
+    async with authorize_transfer(
+        user, requested, session, transfer_pin, transfer_grant
+    ) as charge:
+        result = await transaction_service.batch_transfer(
+            session, user, account_number, batch_data.transfers
+        )
+
+    # A grant is only charged for the transfers that were accepted
+    await charge.refund(requested - result.total_debited, use=not result.total_debited)
+    return result
 
 
 @transaction_router.post(
-    "/withdraw", status_code=status.HTTP_201_CREATED, response_model=TransactionRead
+    "/withdraw",
+    status_code=status.HTTP_201_CREATED,
+    response_model=TransactionRead,
+    dependencies=[Depends(transfer_rate_limit)],
 )
 async def withdraw_from_balance(
     transaction_data: WithdrawalSchema,
-    transfer_pin: str,
     account_number: str,
     bg_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    transfer_pin: Optional[str] = None,
+    transfer_grant: Optional[str] = None,
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -226,42 +266,28 @@ async def withdraw_from_balance(
 
     Args:
     - transaction_data (WithdrawalSchema): The details of the withdrawal transaction.
-    - transfer_pin (str): The user's transfer PIN to authorize the transaction.
+    - transfer_pin (str, optional): The user's transfer PIN to authorize the transaction.
+    - transfer_grant (str, optional): A transfer grant from `/auth/transfer-pin`, used instead of the PIN.
     - account_number (str): The account number to withdraw from.
     - bg_tasks (BackgroundTasks): For any background tasks related to withdrawal processing.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Raises:
     - InvalidTransactionPin: If the provided transfer PIN is incorrect.
+    - InvalidTransferGrant: If the transfer grant is invalid, expired or does not cover the amount.
     - BankAccountNotFound: If the account is not found.
     - InsufficientFunds: If the account does not have enough balance for the withdrawal.
 
     Returns:
     - A JSON response containing a success message and the details of the completed withdrawal.
     """
-    can_transfer = verify_password(transfer_pin, user.transfer_pin_hash)
-    if not can_transfer:
-        raise InvalidTransactionPin()
-
-    bank_account = await business_service.get_bank_by_account_number(
-        account_number, session
-    )
-
-    if bank_account is None:
-        raise BankAccountNotFound()
-
-    if bank_account.balance < transaction_data.amount:
-        raise InsufficientFunds()
-
-    transaction: TransactionHistory = await transaction_service.withdraw_from_account(
-        session, user, transaction_data
-    )
-
-    if transaction is not None:
-        bank_account.balance -= transaction_data.amount
-        await session.commit()
-        await session.refresh(bank_account)
+    async with authorize_transfer(
+        user, transaction_data.amount, session, transfer_pin, transfer_grant
+    ):
+        transaction: TransactionHistory = await transaction_service.withdraw_from_account(
+            session, user, transaction_data, account_number
+        )
 
     return transaction
 
@@ -271,86 +297,102 @@ async def withdraw_from_balance(
 )
 async def update_transaction(
     transaction_data: TransactionUpdate,
-    account_number: str,
     uid: uuid.UUID,
     bg_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
+    account_number: Optional[str] = None,
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
     Update an existing transaction.
 
     This endpoint allows the user to update an existing transaction record.
-    The transaction must belong to the authenticated user. Updates are reflected in
-    the database, and the account balance is adjusted based on the transaction status.
+    The transaction must belong to the authenticated user. Marking a debit as
+    failed refunds its account and reviving a failed debit charges it again, in
+    the same commit as the status change; other status changes leave the balance
+    untouched.
 
     Args:
     - transaction_data (TransactionUpdate): The updated transaction details.
-    - account_number (str): The account number associated with the transaction.
+    - account_number (str, optional): The debited account, only needed for transactions recorded without one.
     - uid (uuid.UUID): The unique identifier of the transaction to be updated.
     - bg_tasks (BackgroundTasks): For any background tasks related to transaction processing.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Raises:
+    - TransactionNotFound: If the transaction does not exist.
     - BankAccountNotFound: If the bank account is not found.
+    - InsufficientFunds: If a failed debit is revived and the account cannot cover it.
 
     Returns:
     - A JSON response containing a success message and the updated transaction details.
     """
-    bank_account = await business_service.get_bank_by_account_number(
-        account_number, session
-    )
-
-    if bank_account is None:
-        raise BankAccountNotFound()
-
     transaction: TransactionHistory = await transaction_service.update_transaction(
-        uid, user, transaction_data, session
+        uid, user, transaction_data, session, account_number
     )
 
-    if (
-        transaction.status == TransactionStatus.COMPLETED
-        and transaction.transaction_type == TransactionType.TRANSFER
-    ):
-        bank_account.balance -= transaction.amount
-    elif (
-        transaction.status == TransactionStatus.FAILED
-        and transaction.transaction_type == TransactionType.TRANSFER
-    ):
-        bank_account.balance += transaction.amount
-    await session.commit()
-    await session.refresh(bank_account)
-
     return transaction
 
 
 @transaction_router.get(
-    "", status_code=status.HTTP_200_OK, response_model=List[TransactionRead]
+    "", status_code=status.HTTP_200_OK, response_model=TransactionPage
 )
 async def all_transactions(
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    cursor: Optional[str] = None,
+    limit: int = Query(
+        Config.TRANSACTION_PAGE_SIZE, ge=1, le=Config.TRANSACTION_PAGE_MAX_SIZE
+    ),
+    transaction_status: Optional[TransactionStatus] = Query(None, alias="status"),
+    transaction_type: Optional[TransactionType] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    user_id: Optional[uuid.UUID] = None,
+    user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
-    Retrieve all transactions for the authenticated user.
+    Retrieve transactions visible to the authenticated user, newest first.
 
-    This endpoint returns a list of all transactions associated with the authenticated user.
+    Results are paginated with an opaque cursor: pass the `next_cursor` of a
+    page back as `cursor` to fetch the next one. `next_cursor` is null on the
+    last page. Admins see all transactions, managers those of their domain
+    and other users only their own.
 
     Args:
-    - user (User): The current authenticated user.
+    - cursor (str, optional): The `next_cursor` returned by the previous page.
+    - limit (int): Maximum number of transactions per page.
+    - status (TransactionStatus, optional): Only return transactions with this status.
+    - transaction_type (TransactionType, optional): Only return transactions of this type.
+    - start_date (datetime, optional): Only return transactions created at or after this time.
+    - end_date (datetime, optional): Only return transactions created before this time.
+    - user_id (uuid.UUID, optional): Only return transactions of this user (admins and managers).
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
+    Raises:
+    - InvalidCursor: If the cursor is malformed.
+
     Returns:
-    - A JSON response containing a list of all transactions for the user.
+    - A JSON response containing a page of transactions and the cursor of the next page.
     """
-    transactions = await transaction_service.get_all_transactions(session, user)
+    transactions = await transaction_service.get_all_transactions(
+        session,
+        user,
+        limit=limit,
+        cursor=cursor,
+        status=transaction_status,
+        transaction_type=transaction_type,
+        start_date=start_date,
+        end_date=end_date,
+        user_id=user_id,
+    )
 
     return transactions
 
 
 @transaction_router.get("/summary", status_code=status.HTTP_200_OK, response_model=List[TransactionSummary])
-async def get_transaction_summary(user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def get_transaction_summary(user: Principal = Depends(get_current_principal), session: AsyncSession = Depends(get_read_session)):
     """
     Retrieve a summary of transactions for the authenticated user, grouped by day.
 
@@ -359,7 +401,7 @@ async def get_transaction_summary(user: User = Depends(get_current_user), sessio
     and total deposits (incoming transactions) for each day.
 
     Args:
-        user (User): The currently authenticated user, obtained via dependency injection.
+        user (Principal): The currently authenticated user, obtained via dependency injection.
         session (AsyncSession): The database session used to interact with the database, injected via dependency.
 
     Returns:
@@ -394,12 +436,61 @@ async def get_transaction_summary(user: User = Depends(get_current_user), sessio
     return response
 
 
+@transaction_router.get("/export", status_code=status.HTTP_200_OK)
+async def export_transactions(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    transaction_status: Optional[TransactionStatus] = Query(None, alias="status"),
+    transaction_type: Optional[TransactionType] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    user_id: Optional[uuid.UUID] = None,
+    user: Principal = Depends(get_current_principal),
+):
+    """
+    Export the transaction history visible to the authenticated user.
+
+    The export is streamed oldest first as newline-delimited JSON or CSV and
+    is read from the database in batches, so it can cover the full history
+    without being held in memory. Visibility and filters match `GET /transactions`.
+
+    Args:
+    - format (ExportFormat): `ndjson` (default) or `csv`.
+    - status (TransactionStatus, optional): Only export transactions with this status.
+    - transaction_type (TransactionType, optional): Only export transactions of this type.
+    - start_date (datetime, optional): Only export transactions created at or after this time.
+    - end_date (datetime, optional): Only export transactions created before this time.
+    - user_id (uuid.UUID, optional): Only export transactions of this user (admins and managers).
+    - user (Principal): The current authenticated user.
+
+    Returns:
+    - A streamed `application/x-ndjson` or `text/csv` attachment.
+    """
+    chunks = transaction_service.export_transactions(
+        user,
+        export_format,
+        fetch_size=Config.EXPORT_FETCH_SIZE,
+        status=transaction_status,
+        transaction_type=transaction_type,
+        start_date=start_date,
+        end_date=end_date,
+        user_id=user_id,
+    )
+
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{export_format.value}"'
+        },
+    )
+
+
 @transaction_router.get(
     "/{uid}", status_code=status.HTTP_200_OK, response_model=TransactionRead
 )
 async def get_transaction(
     uid: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -410,7 +501,7 @@ async def get_transaction(
 
     Args:
     - uid (uuid.UUID): The unique identifier of the transaction.
-    - user (User): The current authenticated user.
+    - user (Principal): The current authenticated user.
     - session (AsyncSession): The current database session.
 
     Raises:
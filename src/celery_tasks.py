@@ -13,7 +13,24 @@ celery_app = Celery(
 celery_app.config_from_object(Config)
 
 # Autodiscover tasks from all installed apps (each app should have a 'tasks.py' file)
-celery_app.autodiscover_tasks(packages=['src.app.auth', 'src.app.blogs', 'src.app.loans', 'src.app.transactions'], related_name='tasks')
+celery_app.autodiscover_tasks(packages=['src.app.auth', 'src.app.blogs', 'src.app.loans', 'src.app.transactions', 'src.app.ledger', 'src.app.outbox'], related_name='tasks')
+
+# Periodic jobs run by `celery beat`
+celery_app.conf.beat_schedule = {
+    "reconcile-ledger": {
+        "task": "src.app.ledger.tasks.reconcile_ledger",
+        "schedule": Config.LEDGER_RECONCILE_INTERVAL,
+    },
+    "relay-outbox": {
+        "task": "src.app.outbox.tasks.relay_outbox",
+        "schedule": Config.OUTBOX_RELAY_INTERVAL,
+    },
+}
+if Config.SETTLEMENT_CLIENT:
+    celery_app.conf.beat_schedule["settle-international-transfers"] = {
+        "task": "src.app.transactions.tasks.settle_international_transfers",
+        "schedule": Config.SETTLEMENT_INTERVAL,
+    }
 
 @celery_app.task(bind=True)
 def send_email(self, recipients: list[str], subject: str, body: str, attachments: list[dict] = None):
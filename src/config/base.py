@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 BASE_URL = Path(__file__).resolve().parent.parent.parent
 
@@ -15,6 +16,80 @@ class BaseConfig(BaseSettings):
     CLOUDINARY_SECRET: str
     CLOUDINARY_URL: str
 
+    # Authenticated principal cache: per-worker LRU in front of a Redis hash
+    PRINCIPAL_CACHE_SIZE: int = 2048
+    PRINCIPAL_CACHE_TTL: int = 10
+    PRINCIPAL_CACHE_EXPIRY: int = 300
+
+    # Already-verified bearer tokens kept per worker
+    VERIFIED_TOKEN_CACHE_SIZE: int = 4096
+
+    # Per-worker Bloom filter of revoked token JTIs
+    JTI_FILTER_CAPACITY: int = 100000
+    JTI_FILTER_ERROR_RATE: float = 0.001
+
+    # Opt-in per-worker cache of hot security reads, kept coherent by Redis
+    # client tracking; polled every REDIS_CLIENT_CACHE_POLL_TTL seconds where
+    # tracking is unsupported
+    REDIS_CLIENT_CACHE: bool = False
+    REDIS_CLIENT_CACHE_SIZE: int = 10000
+    REDIS_CLIENT_CACHE_TTL: int = 300
+    REDIS_CLIENT_CACHE_POLL_TTL: float = 1.0
+
+    # Bounded bcrypt thread pool; requests beyond workers + queue get a 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # Short-lived transfer grants minted by /auth/transfer-pin
+    TRANSFER_GRANT_EXPIRY: int = 300
+    TRANSFER_GRANT_MAX_USES: int = 100
+
+    # Keyset pagination of GET /transactions
+    TRANSACTION_PAGE_SIZE: int = 50
+    TRANSACTION_PAGE_MAX_SIZE: int = 200
+
+    # Rows fetched per round trip by the streaming transaction export
+    EXPORT_FETCH_SIZE: int = 1000
+
+    # Seconds between ledger reconciliation runs (Celery beat)
+    LEDGER_RECONCILE_INTERVAL: int = 3600
+
+    # International transfer settlement: the receiving-bank client as
+    # "package.module:Class" (beat only schedules it when set), rows claimed per
+    # batch, seconds between runs
+    SETTLEMENT_CLIENT: Optional[str] = None
+    SETTLEMENT_BATCH_SIZE: int = 200
+    SETTLEMENT_INTERVAL: int = 30
+
+    # Outbox relay: messages per batch, seconds between runs, seconds kept once sent
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_RELAY_INTERVAL: int = 5
+    OUTBOX_RETENTION: int = 604800
+
+    # Largest number of transfers accepted by POST /transactions/batch
+    BATCH_TRANSFER_MAX_ITEMS: int = 500
+
+    # Account/card numbers each worker reserves per sequence round trip
+    NUMBER_BLOCK_SIZE: int = 100
+
+    # Largest number of businesses accepted by POST /businesses/bulk
+    BULK_ONBOARDING_MAX_ITEMS: int = 200
+
+    # Sliding-window rate limits, as "<requests>/<seconds>"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN: str = "10/60"
+    RATE_LIMIT_TRANSFER_PIN: str = "5/60"
+    RATE_LIMIT_PASSWORD_RESET: str = "5/3600"
+    RATE_LIMIT_PASSWORD_RESET_DOMAIN: str = "100/3600"
+    RATE_LIMIT_TRANSFERS: str = "60/60"
+    # Clients already refused, remembered per worker so they skip Redis
+    RATE_LIMIT_PREFILTER_SIZE: int = 10000
+
+    # Idempotency-Key handling: replay window, in-flight lock and retry polling
+    IDEMPOTENCY_KEY_EXPIRY: int = 86400
+    IDEMPOTENCY_LOCK_TIMEOUT: int = 30
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.05
+
     model_config = SettingsConfigDict(
         env_file=".env",
         extra="ignore",
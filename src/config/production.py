@@ -1,10 +1,22 @@
+from typing import Optional
+
 from .base import BaseConfig
 from pydantic_settings import SettingsConfigDict
 
 
 class ProductionConfig(BaseConfig):
     DATABASE_URL: str
+    DATABASE_REPLICA_URL: Optional[str] = None
+    READ_YOUR_WRITES_WINDOW: int = 5
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
     REDIS_URL: str
+    REDIS_CACHE_URL: Optional[str] = None
+    REDIS_SECURITY_URL: Optional[str] = None
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
     MAIL_USERNAME: str
@@ -0,0 +1,111 @@
+"""Client-side caching of Redis reads, kept coherent by server-assisted tracking."""
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+
+from src.utils.cache import TTLCache
+from src.utils.logger import LOGGER
+
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+
+_MISSING = object()
+
+
+class ClientSideCache:
+    """
+    Per-worker cache of Redis reads under a set of key prefixes.
+
+    `listen` runs `CLIENT TRACKING ... BCAST` for the prefixes, redirected to
+    its own subscription to the invalidation channel. Redis then reports
+    every write, delete or expiry of a matching key, from any client, and
+    the cached value is dropped.
+
+    If the server refuses CLIENT TRACKING (Redis before 6, fake Redis in
+    tests), the cache falls back to polling: values are re-read once
+    `fallback_ttl` seconds have passed. Until one of those modes is running,
+    and after a lost subscription, every read goes to Redis.
+    """
+
+    def __init__(
+        self,
+        client: aioredis.Redis,
+        prefixes: Iterable[str],
+        maxsize: int,
+        ttl: float,
+        fallback_ttl: float,
+    ) -> None:
+        self.client = client
+        self.prefixes = list(prefixes)
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.fallback_ttl = fallback_ttl
+        self.mode: Optional[str] = None  # "tracking" or "polling" once usable
+        # Bumped on every invalidation, so a read that raced one isn't cached
+        self.generation = 0
+
+    async def fetch(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the cached value of `key`, or `await load()` on a miss."""
+        if self.mode is None:
+            return await load()
+
+        value = self.entries.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        generation = self.generation
+        value = await load()
+        if self.mode is not None and generation == self.generation:
+            ttl = None if self.mode == "tracking" else self.fallback_ttl
+            self.entries.set(key, value, ttl=ttl)
+        return value
+
+    def invalidate(self, keys: Optional[list] = None) -> None:
+        """Drops the given keys, or everything when `keys` is None (FLUSHDB)."""
+        self.generation += 1
+        if keys is None:
+            self.entries.clear()
+            return
+
+        for key in keys:
+            self.entries.pop(key.decode("utf-8") if isinstance(key, bytes) else key)
+
+    async def listen(self) -> None:
+        """Runs for the life of the worker; started from the app lifespan."""
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.connect()
+                connection = pubsub.connection
+                await connection.send_command("CLIENT", "ID")
+                client_id = await connection.read_response()
+
+                prefixes = [arg for prefix in self.prefixes for arg in ("PREFIX", prefix)]
+                try:
+                    await connection.send_command(
+                        "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes
+                    )
+                    await connection.read_response()
+                except ResponseError as exc:
+                    LOGGER.warning(f"Redis client tracking unavailable, polling instead: {exc}")
+                    self.mode = "polling"
+                    return
+
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything cached before the subscription may have been missed
+                self.invalidate()
+                self.mode = "tracking"
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self.invalidate(message["data"])
+            except RedisError as exc:
+                LOGGER.warning(f"Redis client cache lost its invalidation channel: {exc}")
+                self.mode = None
+                await asyncio.sleep(1)
+            finally:
+                if self.mode == "tracking":
+                    self.mode = None
+                await pubsub.aclose()
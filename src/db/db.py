@@ -1,11 +1,54 @@
+import asyncio
+import os
+
+from fastapi import Depends
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel  # , create_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel  # , create_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
-# from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from src.config.settings import Config
+from src.db.redis import mark_recent_write
+
+
+def create_engine_from_config(url: str) -> AsyncEngine:
+    """
+    Builds an async engine whose pool is sized from the environment settings.
+
+    Every gunicorn worker owns its own pool, so the effective connection count
+    against Postgres is `workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)`.
+    """
+    return create_async_engine(
+        url=url,
+        echo=Config.DB_ECHO,
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT,
+        pool_recycle=Config.DB_POOL_RECYCLE,
+        pool_pre_ping=Config.DB_POOL_PRE_PING,
+    )
 
-async_engine = create_async_engine(url=Config.DATABASE_URL, echo=True)
+
+async_engine = create_engine_from_config(Config.DATABASE_URL)
+replica_engine = (
+    create_engine_from_config(Config.DATABASE_REPLICA_URL)
+    if Config.DATABASE_REPLICA_URL
+    else None
+)
+
+
+def get_pool_stats(engine: AsyncEngine = async_engine) -> dict:
+    """Reports the connection pool usage of the current worker process."""
+    pool = engine.sync_engine.pool
+    return {
+        "pid": os.getpid(),
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+    }
 
 
 async def init_db() -> None:
@@ -13,14 +56,137 @@ async def init_db() -> None:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
-async def get_session() -> AsyncSession:  # type: ignore
-    Session = sessionmaker(
-        bind=async_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autoflush=False,
-        autocommit=False,
-    )
+async_session_maker = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+    autocommit=False,
+)
+
+
+# Celery tasks run every job in a fresh event loop, so they must not share
+# pooled connections with a previous loop; this engine opens one per session.
+worker_engine = create_async_engine(
+    url=Config.DATABASE_URL, echo=Config.DB_ECHO, poolclass=NullPool
+)
+
+worker_session_maker = sessionmaker(
+    bind=worker_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+    autocommit=False,
+)
+
+
+class RoutingSession(Session):
+    """
+    Sync session behind replica sessions.
+
+    Plain SELECTs are sent to the replica; flushes, locking reads and any other
+    statement go to the primary so a stray write never reaches a read-only node.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if replica_engine is None or self._flushing:
+            return async_engine.sync_engine
+        if not getattr(clause, "is_select", False):
+            return async_engine.sync_engine
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return async_engine.sync_engine
+        return replica_engine.sync_engine
+
+
+replica_session_maker = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+    autoflush=False,
+    autocommit=False,
+)
+
+
+class UnitOfWork:
+    """
+    Request-scoped holder that opens a database session only on first use.
+
+    Routes and dependencies that may never reach the database (token checks,
+    cache hits) take the unit of work instead of a session, so requests that
+    don't query anything never check a connection out of the pool.
+
+    `read_session` serves read-only routes from the replica when one is
+    configured. Once the authenticated caller (`principal_uid`) writes through
+    the primary session, their reads are pinned to the primary for
+    `READ_YOUR_WRITES_WINDOW` seconds so they never see replication lag on
+    their own changes.
+    """
+
+    def __init__(self) -> None:
+        self._session: AsyncSession | None = None
+        self._read_session: AsyncSession | None = None
+        self._write_marked = False
+        self._pending_marks: list[asyncio.Task] = []
+        self.principal_uid = None
+        self.prefer_primary = False
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = async_session_maker()
+            if self.has_replica:
+                event.listen(self._session.sync_session, "after_flush", self._on_write)
+                event.listen(self._session.sync_session, "do_orm_execute", self._on_execute)
+        return self._session
+
+    @property
+    def read_session(self) -> AsyncSession:
+        if not self.has_replica or self.prefer_primary:
+            return self.session
+        if self._read_session is None:
+            self._read_session = replica_session_maker()
+        return self._read_session
+
+    @property
+    def has_replica(self) -> bool:
+        return replica_engine is not None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None or self._read_session is not None
+
+    def _on_execute(self, orm_execute_state) -> None:
+        if not orm_execute_state.is_select:
+            self._on_write()
+
+    def _on_write(self, *args) -> None:
+        if self.principal_uid is None or self._write_marked:
+            return
+        self._write_marked = True
+        self._pending_marks.append(
+            asyncio.get_running_loop().create_task(mark_recent_write(self.principal_uid))
+        )
+
+    async def close(self) -> None:
+        if self._pending_marks:
+            await asyncio.gather(*self._pending_marks, return_exceptions=True)
+            self._pending_marks = []
+        if self._read_session is not None:
+            await self._read_session.close()
+            self._read_session = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def get_unit_of_work() -> UnitOfWork:  # type: ignore
+    uow = UnitOfWork()
+    try:
+        yield uow
+    finally:
+        await uow.close()
+
 
-    async with Session() as session:
-        yield session
+async def get_session(uow: UnitOfWork = Depends(get_unit_of_work)) -> AsyncSession:
+    return uow.session
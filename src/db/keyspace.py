@@ -0,0 +1,123 @@
+"""
+Every Redis key the app writes, built in one place.
+
+Keys read `<namespace>:<version>:<kind>:<parts>`. The namespace decides
+which Redis client, and so which logical database and eviction policy,
+owns the key:
+
+- `cache`: data rebuilt from Postgres on a miss. It is safe to run under
+  `allkeys-lru`.
+- `sec`: security and correctness state, such as revoked tokens, codes,
+  grants, idempotency records and rate limits. It must never be evicted;
+  run it with `noeviction` or `volatile-ttl`.
+
+Bump `VERSION` when the format of a value changes, so workers on the old
+and new formats never read each other's values.
+"""
+import re
+import uuid
+from typing import Callable, Optional
+
+CACHE = "cache"
+SECURITY = "sec"
+NAMESPACES = (CACHE, SECURITY)
+
+VERSION = "v1"
+
+
+def _key(namespace: str, kind: str, *parts) -> str:
+    return ":".join([namespace, VERSION, kind, *map(str, parts)])
+
+
+def prefix(namespace: str, kind: str) -> str:
+    """The prefix shared by every key of one kind, for SCAN and client tracking."""
+    return _key(namespace, kind, "")
+
+
+def namespace_of(key: str) -> Optional[str]:
+    namespace = key.split(":", 1)[0]
+    return namespace if namespace in NAMESPACES else None
+
+
+# Cache
+def principal(user_id: uuid.UUID | str) -> str:
+    return _key(CACHE, "principal", user_id)
+
+
+def recent_write(user_id: uuid.UUID | str) -> str:
+    return _key(CACHE, "recent_write", user_id)
+
+
+# Pub/sub channel naming each principal every worker must drop
+PRINCIPAL_CHANNEL = _key(CACHE, "principal_channel")
+
+
+# Security state
+def transfer_grant(grant: str) -> str:
+    return _key(SECURITY, "transfer_grant", grant)
+
+
+def idempotency(key: str) -> str:
+    return _key(SECURITY, "idempotency", key)
+
+
+def rate_limit(key: str) -> str:
+    return _key(SECURITY, "rate_limit", key)
+
+
+def reset_code(user_id: uuid.UUID | str) -> str:
+    return _key(SECURITY, "reset_code", user_id)
+
+
+def verification_code(user_id: uuid.UUID | str) -> str:
+    return _key(SECURITY, "verification_code", user_id)
+
+
+def new_ip(user_id: uuid.UUID | str, ip: str) -> str:
+    return _key(SECURITY, "new_ip", user_id, ip)
+
+
+def allowed_ip(user_id: uuid.UUID | str, ip: str) -> str:
+    return _key(SECURITY, "allowed_ip", user_id, ip)
+
+
+def revoked_jti(jti: str) -> str:
+    return _key(SECURITY, "revoked_jti", jti)
+
+
+JTI_BLOCKLIST_INDEX = _key(SECURITY, "revoked_jti_index")
+# Pub/sub channels live outside the keyspace but share its naming
+JTI_BLOCKLIST_CHANNEL = _key(SECURITY, "revoked_jti_channel")
+
+
+# Key prefixes written before this module existed, mapped to the builder of
+# their new name and how many `:`-separated parts follow the prefix
+LEGACY_PREFIXES: dict[str, tuple[Callable[..., str], int]] = {
+    "principal": (principal, 1),
+    "recent_write": (recent_write, 1),
+    "transfer_grant": (transfer_grant, 1),
+    "idempotency": (idempotency, 1),
+    "rate_limit": (rate_limit, 1),
+    "reset_code": (reset_code, 1),
+    "verification_code": (verification_code, 1),
+    "new_ip": (new_ip, 2),
+    "allowed": (allowed_ip, 2),
+}
+# Revoked JTIs used to be bare top-level UUID keys
+LEGACY_JTI = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
+)
+
+
+def legacy_key_target(key: str) -> Optional[str]:
+    """Returns the namespaced name of a pre-keyspace key, or None for any other key."""
+    if LEGACY_JTI.match(key):
+        return revoked_jti(key)
+
+    prefix, separator, rest = key.partition(":")
+    if not separator or prefix not in LEGACY_PREFIXES:
+        return None
+
+    builder, parts = LEGACY_PREFIXES[prefix]
+    # The last part may itself contain colons (IPv6 addresses, scoped keys)
+    return builder(*rest.split(":", parts - 1))
@@ -0,0 +1,8 @@
+-- Keyset pagination of GET /transactions walks (created_at, uid) newest
+-- first, over all transactions or one user's. Built concurrently so writes
+-- to `transactions` carry on during the build.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_created_at_uid
+    ON transactions (created_at, uid);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_user_id_created_at_uid
+    ON transactions (user_id, created_at, uid);
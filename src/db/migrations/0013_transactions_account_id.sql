@@ -0,0 +1,25 @@
+-- The account each transfer or withdrawal was debited from.
+--
+-- No backfill: the app never debited an account for rows recorded before
+-- this column existed, so they keep a null account_id. Managers pass
+-- account_number when they change the status of one of those rows.
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS account_id UUID;
+
+-- NOT VALID adds the constraint without scanning the table under an
+-- ACCESS EXCLUSIVE lock; VALIDATE then checks existing rows while holding
+-- only SHARE UPDATE EXCLUSIVE, which doesn't block reads or writes.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'transactions_account_id_fkey'
+    ) THEN
+        ALTER TABLE transactions
+            ADD CONSTRAINT transactions_account_id_fkey
+            FOREIGN KEY (account_id) REFERENCES bank_accounts (uid) NOT VALID;
+    END IF;
+END
+$$;
+ALTER TABLE transactions VALIDATE CONSTRAINT transactions_account_id_fkey;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_account_id
+    ON transactions (account_id);
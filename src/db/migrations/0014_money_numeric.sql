@@ -0,0 +1,8 @@
+-- Money moves from double precision to exact NUMERIC(18, 2), rounded to
+-- the cent. Each ALTER rewrites its table under an ACCESS EXCLUSIVE lock,
+-- so run this in a maintenance window on large tables.
+ALTER TABLE bank_accounts
+    ALTER COLUMN balance TYPE NUMERIC(18, 2) USING round(balance::numeric, 2);
+
+ALTER TABLE transactions
+    ALTER COLUMN amount TYPE NUMERIC(18, 2) USING round(amount::numeric, 2);
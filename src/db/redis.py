@@ -1,10 +1,21 @@
+import asyncio
+import time
+from decimal import Decimal
 from typing import Optional
+import json
+import secrets
 import uuid
 import redis.asyncio as aioredis
+from redis.exceptions import RedisError
 from src.app.auth.models import User
-from src.config.settings import (
-    broker_url,
-)
+from src.app.auth.schemas import Principal
+from src.config.settings import Config
+from src.db import keyspace
+from src.db.client_cache import ClientSideCache
+from src.utils.bloom import BloomFilter
+from src.utils.cache import TTLCache
+from src.utils.logger import LOGGER
+from src.utils.money import to_minor_units
 
 # Redis connection pool settings
 REDIS_POOL_SIZE = 10
@@ -12,106 +23,666 @@ REDIS_TIMEOUT = 5
 JTI_EXPIRY = 3600
 VERIFICATION_CODE_EXPIRY = 900  # 15 minutes
 SECURITY_EXPIRY = 2592000  # 1 month
+NEW_IP_MAX_ATTEMPTS = 2  # Attempts from an unrecognised IP before blocking
+
+
+def create_redis_client(url: str) -> aioredis.Redis:
+    pool = aioredis.ConnectionPool.from_url(
+        url, max_connections=REDIS_POOL_SIZE, socket_timeout=REDIS_TIMEOUT
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+# One pool per keyspace namespace, so each can live in its own logical
+# database with its own eviction policy (see src/db/keyspace.py). Both fall
+# back to REDIS_URL, where the namespaced keys still keep them apart.
+CACHE_REDIS_URL = Config.REDIS_CACHE_URL or Config.REDIS_URL
+SECURITY_REDIS_URL = Config.REDIS_SECURITY_URL or Config.REDIS_URL
+cache_client = create_redis_client(CACHE_REDIS_URL)
+security_client = create_redis_client(SECURITY_REDIS_URL)
+redis_clients = {keyspace.CACHE: cache_client, keyspace.SECURITY: security_client}
+
+# Hot security keys read on most auth requests, served from worker memory
+# while `security_cache.listen` runs (only when REDIS_CLIENT_CACHE is on)
+security_cache = ClientSideCache(
+    security_client,
+    prefixes=[
+        keyspace.prefix(keyspace.SECURITY, "verification_code"),
+        keyspace.prefix(keyspace.SECURITY, "reset_code"),
+        keyspace.prefix(keyspace.SECURITY, "allowed_ip"),
+    ],
+    maxsize=Config.REDIS_CLIENT_CACHE_SIZE,
+    ttl=Config.REDIS_CLIENT_CACHE_TTL,
+    fallback_ttl=Config.REDIS_CLIENT_CACHE_POLL_TTL,
+)
+
+
+# Authenticated principal
+async def cache_principal(
+    principal: Principal, expiry: int = Config.PRINCIPAL_CACHE_EXPIRY
+) -> None:
+    """Stores the principal as a hash of JSON-encoded fields."""
+    key = keyspace.principal(principal.uid)
+    mapping = {k: json.dumps(v) for k, v in principal.model_dump(mode="json").items()}
+    async with cache_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, expiry)
+        await pipe.execute()
+
+
+async def get_cached_principal(user_id: uuid.UUID | str) -> Optional[Principal]:
+    data = await cache_client.hgetall(keyspace.principal(user_id))
+    if not data:
+        return None
+    return Principal(**{k.decode("utf-8"): json.loads(v) for k, v in data.items()})
+
+
+async def delete_cached_principal(user_id: uuid.UUID | str) -> None:
+    """Deletes the shared copy of the principal and tells every worker."""
+    async with cache_client.pipeline(transaction=True) as pipe:
+        pipe.delete(keyspace.principal(user_id))
+        pipe.publish(keyspace.PRINCIPAL_CHANNEL, str(user_id))
+        await pipe.execute()
+    principal_cache.pop(str(user_id))
+
+
+class PrincipalCache:
+    """
+    Per-worker first tier of the principal cache, in front of the Redis hash.
+
+    `listen` subscribes to the invalidations published by
+    `delete_cached_principal` and drops the principal from this worker, so
+    blocking or demoting a user takes effect on every worker at once.
+    Entries are only served while that subscription is up; before then, and
+    after a disconnect, every lookup goes to Redis.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = Config.PRINCIPAL_CACHE_SIZE,
+        ttl: float = Config.PRINCIPAL_CACHE_TTL,
+    ) -> None:
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.ready = False
+        # Bumped on every invalidation, so a lookup that raced one isn't cached
+        self.generation = 0
+
+    def get(self, user_id: str) -> Optional[Principal]:
+        return self.entries.get(user_id) if self.ready else None
+
+    def set(self, user_id: str, principal: Principal, generation: int) -> None:
+        if self.ready and generation == self.generation:
+            self.entries.set(user_id, principal)
+
+    def pop(self, user_id: str) -> None:
+        self.generation += 1
+        self.entries.pop(user_id)
+
+    async def listen(self) -> None:
+        """Runs for the life of the worker; started from the app lifespan."""
+        while True:
+            try:
+                async with cache_client.pubsub() as pubsub:
+                    await pubsub.subscribe(keyspace.PRINCIPAL_CHANNEL)
+                    # Anything cached before the subscription may have been missed
+                    self.generation += 1
+                    self.entries.clear()
+                    self.ready = True
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if message is not None:
+                            self.pop(message["data"].decode("utf-8"))
+            except RedisError as exc:
+                self.ready = False
+                LOGGER.warning(f"Principal cache lost its invalidation channel: {exc}")
+                await asyncio.sleep(1)
+            finally:
+                self.ready = False
 
-# Initialize Redis with connection pooling
-redis_pool = aioredis.ConnectionPool.from_url(
-    broker_url, max_connections=REDIS_POOL_SIZE, socket_timeout=REDIS_TIMEOUT
+
+principal_cache = PrincipalCache()
+
+
+# Transfer grants
+# Amounts are kept in integer minor units so Redis arithmetic is exact. A
+# spent grant stays until it expires so refunds can still reach it.
+CONSUME_TRANSFER_GRANT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+if redis.call('HGET', KEYS[1], 'user_id') ~= ARGV[1] then return 0 end
+local amount = tonumber(ARGV[2])
+local remaining = tonumber(redis.call('HGET', KEYS[1], 'remaining_minor'))
+if not remaining or remaining < amount then return 0 end
+if tonumber(redis.call('HGET', KEYS[1], 'remaining_uses')) <= 0 then return 0 end
+redis.call('HINCRBY', KEYS[1], 'remaining_minor', -amount)
+redis.call('HINCRBY', KEYS[1], 'remaining_uses', -1)
+return 1
+"""
+consume_transfer_grant_script = security_client.register_script(
+    CONSUME_TRANSFER_GRANT_SCRIPT
+)
+
+REFUND_TRANSFER_GRANT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+if redis.call('HGET', KEYS[1], 'user_id') ~= ARGV[1] then return 0 end
+redis.call('HINCRBY', KEYS[1], 'remaining_minor', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'remaining_uses', ARGV[3])
+return 1
+"""
+refund_transfer_grant_script = security_client.register_script(
+    REFUND_TRANSFER_GRANT_SCRIPT
 )
-redis_client = aioredis.Redis(connection_pool=redis_pool)
+
+
+async def store_transfer_grant(
+    user_id: uuid.UUID,
+    max_amount: Decimal,
+    max_uses: int,
+    expiry: int = Config.TRANSFER_GRANT_EXPIRY,
+) -> str:
+    """Mints a grant that authorizes up to `max_uses` transfers totalling `max_amount`."""
+    grant = secrets.token_urlsafe(32)
+    key = keyspace.transfer_grant(grant)
+    async with security_client.pipeline(transaction=True) as pipe:
+        pipe.hset(
+            key,
+            mapping={
+                "user_id": str(user_id),
+                "remaining_minor": to_minor_units(max_amount),
+                "remaining_uses": max_uses,
+            },
+        )
+        pipe.expire(key, expiry)
+        await pipe.execute()
+    return grant
+
+
+async def consume_transfer_grant(
+    grant: str, user_id: uuid.UUID, amount: Decimal
+) -> bool:
+    """
+    Atomically spends one use and `amount` from the grant.
+
+    Returns False when the grant is unknown, expired, used up, owned by
+    another user, or does not cover the amount; the grant is left untouched
+    in that case.
+    """
+    result = await consume_transfer_grant_script(
+        keys=[keyspace.transfer_grant(grant)],
+        args=[str(user_id), to_minor_units(amount)],
+    )
+    return result == 1
+
+
+async def refund_transfer_grant(
+    grant: str, user_id: uuid.UUID, amount: Decimal, uses: int = 0
+) -> bool:
+    """
+    Gives `amount` and `uses` back to a grant they were spent from.
+
+    Returns False when the grant has expired in the meantime.
+    """
+    result = await refund_transfer_grant_script(
+        keys=[keyspace.transfer_grant(grant)],
+        args=[str(user_id), to_minor_units(amount), uses],
+    )
+    return result == 1
+
+
+# Read-your-writes
+async def mark_recent_write(
+    user_id: uuid.UUID, window: int = Config.READ_YOUR_WRITES_WINDOW
+) -> None:
+    """Pins the user's reads to the primary database for `window` seconds."""
+    await cache_client.set(keyspace.recent_write(user_id), 1, ex=window)
+
+
+async def has_recent_write(user_id: uuid.UUID) -> bool:
+    """Checks whether the user wrote to the primary within the read-your-writes window."""
+    return await cache_client.exists(keyspace.recent_write(user_id)) == 1
+
+
+# Idempotency keys
+BEGIN_IDEMPOTENT_REQUEST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('HGETALL', KEYS[1])
+end
+redis.call('HSET', KEYS[1], 'state', 'in_flight', 'fingerprint', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return {}
+"""
+begin_idempotent_request_script = security_client.register_script(
+    BEGIN_IDEMPOTENT_REQUEST_SCRIPT
+)
+
+
+EXTEND_IDEMPOTENT_LOCK_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'state') == 'in_flight' then
+    return redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return 0
+"""
+extend_idempotent_lock_script = security_client.register_script(
+    EXTEND_IDEMPOTENT_LOCK_SCRIPT
+)
+
+
+def _decode_idempotent_record(values: list) -> Optional[dict]:
+    if not values:
+        return None
+    return {
+        values[i].decode("utf-8"): values[i + 1] for i in range(0, len(values), 2)
+    }
+
+
+async def begin_idempotent_request(
+    key: str, fingerprint: str, lock_timeout: int = Config.IDEMPOTENCY_LOCK_TIMEOUT
+) -> Optional[dict]:
+    """
+    Claims an idempotency key for a new request.
+
+    Returns None when the caller now owns the key and must execute the request;
+    otherwise returns the existing record, whose `state` is `in_flight` or `done`.
+    """
+    values = await begin_idempotent_request_script(
+        keys=[keyspace.idempotency(key)], args=[fingerprint, lock_timeout]
+    )
+    return _decode_idempotent_record(values)
+
+
+async def hold_idempotent_request(
+    key: str, lock_timeout: int = Config.IDEMPOTENCY_LOCK_TIMEOUT
+) -> None:
+    """
+    Keeps the in-flight lock of a running request alive until cancelled.
+
+    The lock is renewed every third of `lock_timeout`, so it only lapses
+    when the worker running the request dies, never while a slow request
+    is still executing.
+    """
+    while True:
+        await asyncio.sleep(lock_timeout / 3)
+        try:
+            await extend_idempotent_lock_script(
+                keys=[keyspace.idempotency(key)], args=[lock_timeout]
+            )
+        except RedisError as exc:
+            LOGGER.warning(f"Could not renew idempotency lock {key}: {exc}")
+
+
+async def get_idempotent_request(key: str) -> Optional[dict]:
+    values = await security_client.hgetall(keyspace.idempotency(key))
+    return {k.decode("utf-8"): v for k, v in values.items()} or None
+
+
+async def complete_idempotent_request(
+    key: str,
+    status_code: int,
+    headers: dict,
+    body: bytes,
+    expiry: int = Config.IDEMPOTENCY_KEY_EXPIRY,
+) -> None:
+    """Stores the response of an executed request for replay to its retries."""
+    async with security_client.pipeline(transaction=True) as pipe:
+        pipe.hset(
+            keyspace.idempotency(key),
+            mapping={
+                "state": "done",
+                "status_code": status_code,
+                "headers": json.dumps(headers),
+                "body": body,
+            },
+        )
+        pipe.expire(keyspace.idempotency(key), expiry)
+        await pipe.execute()
+
+
+async def release_idempotent_request(key: str) -> None:
+    """Forgets a key whose request failed so a retry executes it again."""
+    await security_client.delete(keyspace.idempotency(key))
+
+
+# Rate limiting
+SLIDING_WINDOW_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local window = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_ms - window)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], now_ms, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return 0
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return tonumber(oldest[2]) + window - now_ms
+"""
+sliding_window_script = security_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+
+async def hit_rate_limit(key: str, limit: int, window: int) -> float:
+    """
+    Counts one request against a sliding window of `window` seconds.
+
+    The window is a sorted set of request timestamps taken from the Redis
+    clock, so every worker shares one view of time. Refused requests are not
+    recorded.
+
+    Returns:
+        float: 0 if the request is allowed, otherwise the seconds until the
+        oldest request in the window expires.
+    """
+    wait_ms = await sliding_window_script(
+        keys=[keyspace.rate_limit(key)], args=[window * 1000, limit, secrets.token_hex(8)]
+    )
+    return wait_ms / 1000
 
 
 # Password Reset Code
 async def store_password_reset_code(
     user_id: uuid.UUID, code: str, expiry: int = VERIFICATION_CODE_EXPIRY
 ):
-    await redis_client.set(f"reset_code:{user_id}", code, ex=expiry)
+    await security_client.set(keyspace.reset_code(user_id), code, ex=expiry)
+
+
+# IP security
+BLOCK_IP_ATTEMPTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+local attempts = tonumber(redis.call('GET', KEYS[2]) or '0') + 1
+if attempts > tonumber(ARGV[1]) then return 1 end
+redis.call('SET', KEYS[2], attempts, 'EX', ARGV[2])
+return 0
+"""
+block_ip_attempts_script = security_client.register_script(BLOCK_IP_ATTEMPTS_SCRIPT)
 
 
 async def block_ip_attempts(user: User, new_ip: str) -> bool:
     """
-    Checks the current number of IP attempts stored in Redis.
+    Records an attempt from an unrecognised IP and decides whether to block.
+
+    The allow-list check, the attempt count and its increment run as one
+    script, so concurrent attempts can't both read the same count.
 
     Args:
-        user_id (uuid.UUID): The user's unique ID.
-        new_ip (str): The IP address to check.
+        user (User): The user making the attempt.
+        new_ip (str): The IP address the attempt came from.
 
     Returns:
-        int: The number of attempts for the specific IP.
+        bool: True once the IP has used up its `NEW_IP_MAX_ATTEMPTS`.
     """
-    allowed_ip = await redis_client.get(f"allowed:{user.uid}:{new_ip}")
-    if user.ip_address != new_ip and allowed_ip is None:
-        attempts = await redis_client.get(f"new_ip:{user.uid}:{new_ip}")
-        calc_attempts = 1
-        if attempts:
-            calc_attempts = int(attempts.decode("utf-8")) + 1
+    if user.ip_address == new_ip:
+        return False
 
-        # Redis returns None if the key doesn't exist
-        if calc_attempts <= 2:
-            await store_new_ip(user.uid, new_ip, calc_attempts)
-            return False # If there are no attempts greater than 3, do not block
+    allowed_key = keyspace.allowed_ip(user.uid, new_ip)
+    # An allow-listed IP never changes the count, so a cached hit skips the script
+    if security_cache.mode is not None and await security_cache.fetch(
+        allowed_key, lambda: security_client.exists(allowed_key)
+    ):
+        return False
 
-        # block the user
-        return True
-    return False
+    result = await block_ip_attempts_script(
+        keys=[allowed_key, keyspace.new_ip(user.uid, new_ip)],
+        args=[NEW_IP_MAX_ATTEMPTS, SECURITY_EXPIRY],
+    )
+    return result == 1
 
 
 async def store_new_ip(
     user_id: uuid.UUID, new_ip: str, attempts: int
 ):
-    await redis_client.set(f"new_ip:{user_id}:{new_ip}", attempts, ex=SECURITY_EXPIRY)
+    await security_client.set(keyspace.new_ip(user_id, new_ip), attempts, ex=SECURITY_EXPIRY)
 
 async def store_allowed_ip(
     user_id: uuid.UUID, new_ip: str
 ):
-    banned_ip = await redis_client.get(f"new_ip:{user_id}:{new_ip}")
-    if banned_ip:
-        delete_ip_security(user_id,new_ip)
-    await redis_client.set(f"allowed:{user_id}:{new_ip}", new_ip, ex=None)
+    # Clears any attempt count and allow-lists the IP in one round trip
+    async with security_client.pipeline(transaction=True) as pipe:
+        pipe.delete(keyspace.new_ip(user_id, new_ip))
+        pipe.set(keyspace.allowed_ip(user_id, new_ip), new_ip)
+        await pipe.execute()
 
 async def delete_ip_security(
     user_id: uuid.UUID, new_ip: str
 ):
-    await redis_client.delete(f"new_ip:{user_id}:{new_ip}")
+    await security_client.delete(keyspace.new_ip(user_id, new_ip))
 
 async def delete_allowed_ip(
     user_id: uuid.UUID, new_ip: str
 ):
-    await redis_client.delete(f"allowed:{user_id}:{new_ip}")
+    await security_client.delete(keyspace.allowed_ip(user_id, new_ip))
 
 # Get the reset code from Redis
 async def get_password_reset_code(user_id: uuid.UUID) -> Optional[str]:
-    return await redis_client.get(f"reset_code:{user_id}")
+    key = keyspace.reset_code(user_id)
+    return await security_cache.fetch(key, lambda: security_client.get(key))
 
 
 # Email Verification Code
 async def store_verification_code(user_id: uuid.UUID, code: str) -> None:
     """Stores the verification code in Redis with an expiry time."""
-    await redis_client.hset(
-        f"verification_code:{user_id}", mapping={"code": code, "verified": "false"}
+    await security_client.hset(
+        keyspace.verification_code(user_id), mapping={"code": code, "verified": "false"}
+    )
+    await security_client.expire(
+        keyspace.verification_code(user_id), VERIFICATION_CODE_EXPIRY
     )
-    await redis_client.expire(f"verification_code:{user_id}", VERIFICATION_CODE_EXPIRY)
 
 
 async def get_verification_status(user_id: uuid.UUID) -> dict:
     """Retrieves the verification code and status from Redis."""
-    data = await redis_client.hgetall(f"verification_code:{user_id}")
+    key = keyspace.verification_code(user_id)
+    data = await security_cache.fetch(key, lambda: security_client.hgetall(key))
     return {k.decode("utf-8"): v.decode("utf-8") for k, v in data.items()}
 
 
 async def mark_email_verified(user_id: uuid.UUID) -> None:
     """Marks the email as verified."""
-    await redis_client.hset(f"verification_code:{user_id}", "verified", "true")
+    await security_client.hset(keyspace.verification_code(user_id), "verified", "true")
 
 
 # Blacklisting
+class RevokedTokenFilter:
+    """
+    Per-worker Bloom filter of revoked JTIs in front of the Redis blocklist.
+
+    A JTI the filter has never seen is certainly not revoked, so most
+    requests skip Redis. Only a filter hit is confirmed with Redis.
+
+    `listen` keeps the filter in sync. It subscribes to revocations
+    published by `add_jti_to_blocklist`, then loads the JTIs still in the
+    blocklist index. The filter is only trusted while that subscription is
+    up; before then, and after a disconnect, every check goes to Redis.
+
+    Bloom filters can't forget, so revocations are kept in two generations.
+    Each generation lasts `JTI_EXPIRY` seconds. A JTI survives at least one
+    full generation, which is as long as its blocklist entry lives.
+    """
+
+    def __init__(
+        self,
+        capacity: int = Config.JTI_FILTER_CAPACITY,
+        error_rate: float = Config.JTI_FILTER_ERROR_RATE,
+        generation_length: int = JTI_EXPIRY,
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.generation_length = generation_length
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = BloomFilter(capacity, error_rate)
+        self.rotated_at = time.monotonic()
+        self.ready = False
+
+    def rotate(self) -> None:
+        if time.monotonic() - self.rotated_at >= self.generation_length:
+            self.previous, self.current = self.current, BloomFilter(
+                self.capacity, self.error_rate
+            )
+            self.rotated_at = time.monotonic()
+
+    def add(self, jti: str) -> None:
+        self.rotate()
+        self.current.add(jti)
+
+    def might_contain(self, jti: str) -> bool:
+        self.rotate()
+        return jti in self.current or jti in self.previous
+
+    async def load(self) -> None:
+        now = time.time()
+        index = keyspace.JTI_BLOCKLIST_INDEX
+        await security_client.zremrangebyscore(index, "-inf", now)
+        for jti in await security_client.zrangebyscore(index, now, "+inf"):
+            self.add(jti.decode("utf-8"))
+
+    async def listen(self) -> None:
+        """Runs for the life of the worker; started from the app lifespan."""
+        while True:
+            try:
+                async with security_client.pubsub() as pubsub:
+                    # Subscribe before loading so no revocation falls in between
+                    await pubsub.subscribe(keyspace.JTI_BLOCKLIST_CHANNEL)
+                    await self.load()
+                    self.ready = True
+                    while True:
+                        # A bounded wait, so an idle channel never trips the
+                        # pool's socket timeout and drops the subscription
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if message is not None:
+                            self.add(message["data"].decode("utf-8"))
+            except RedisError as exc:
+                self.ready = False
+                LOGGER.warning(f"Revoked token filter lost its subscription: {exc}")
+                await asyncio.sleep(1)
+            finally:
+                self.ready = False
+
+
+revoked_tokens = RevokedTokenFilter()
+
+
 async def add_jti_to_blocklist(jti: str) -> None:
-    """Adds a JTI (JWT ID) to the Redis blocklist with an expiry."""
-    # Use the 'set' command with an expiry to add the JTI to the blocklist
-    await redis_client.set(jti, "", ex=JTI_EXPIRY)
+    """Adds a JTI (JWT ID) to the Redis blocklist and tells every worker."""
+    now = time.time()
+    async with security_client.pipeline(transaction=True) as pipe:
+        pipe.set(keyspace.revoked_jti(jti), "", ex=JTI_EXPIRY)
+        pipe.zadd(keyspace.JTI_BLOCKLIST_INDEX, {jti: now + JTI_EXPIRY})
+        pipe.zremrangebyscore(keyspace.JTI_BLOCKLIST_INDEX, "-inf", now)
+        pipe.publish(keyspace.JTI_BLOCKLIST_CHANNEL, jti)
+        await pipe.execute()
+    revoked_tokens.add(jti)
 
 
 async def token_in_blocklist(jti: str) -> bool:
     """Checks if a JTI (JWT ID) is in the Redis blocklist."""
+    if revoked_tokens.ready and not revoked_tokens.might_contain(jti):
+        return False
+
     # Use 'exists' instead of 'get' for better performance
-    is_blocked = await redis_client.exists(jti)
+    is_blocked = await security_client.exists(keyspace.revoked_jti(jti))
     return is_blocked == 1
+
+
+# Keyspace maintenance
+def redis_databases() -> dict[str, aioredis.Redis]:
+    """The clients to scan, with namespaces that share a database listed once."""
+    if CACHE_REDIS_URL == SECURITY_REDIS_URL:
+        return {"cache+security": security_client}
+    return {"cache": cache_client, "security": security_client}
+
+
+async def scan_batches(client: aioredis.Redis, batch_size: int):
+    """Yields every key of the database, `batch_size` keys at a time, via SCAN."""
+    batch = []
+    async for key in client.scan_iter(count=batch_size):
+        batch.append(key.decode("utf-8", "replace"))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _report_group(key: str) -> str:
+    namespace = keyspace.namespace_of(key)
+    if namespace is not None:
+        return ":".join(key.split(":", 2)[:2])
+    return "legacy" if keyspace.legacy_key_target(key) else "other"
+
+
+async def keyspace_report(batch_size: int = 500) -> dict:
+    """
+    Reports key count and memory per namespace and version in each database.
+
+    Keys are walked with SCAN and sized with MEMORY USAGE, one pipeline per
+    batch. Keys written before the keyspace existed are counted as `legacy`.
+    Keys the app doesn't own, such as Celery's, are counted as `other`.
+    """
+    report = {}
+    for name, client in redis_databases().items():
+        usage = {}
+        async for keys in scan_batches(client, batch_size):
+            async with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.memory_usage(key)
+                sizes = await pipe.execute()
+
+            for key, size in zip(keys, sizes):
+                group = usage.setdefault(_report_group(key), {"keys": 0, "bytes": 0})
+                group["keys"] += 1
+                group["bytes"] += size or 0
+        report[name] = usage
+    return report
+
+
+async def migrate_legacy_keys(batch_size: int = 500) -> dict:
+    """
+    Moves keys written before the keyspace existed to their namespaced names.
+
+    Legacy keys are read from REDIS_URL, where every key used to live. Each
+    one is copied with DUMP/RESTORE, keeping its TTL, into its namespace's
+    database, then deleted. Migrated JTIs are also added to the revocation
+    index and published to the workers' filters. Keys that already moved are
+    overwritten, so the migration can be re-run.
+    """
+    migrated = 0
+    source = create_redis_client(Config.REDIS_URL)
+    try:
+        async for keys in scan_batches(source, batch_size):
+            targets = {key: keyspace.legacy_key_target(key) for key in keys}
+            legacy = [key for key, target in targets.items() if target is not None]
+            if not legacy:
+                continue
+
+            async with source.pipeline(transaction=False) as pipe:
+                for key in legacy:
+                    pipe.dump(key)
+                    pipe.pttl(key)
+                values = await pipe.execute()
+
+            now = time.time()
+            moved = []
+            for i, key in enumerate(legacy):
+                dumped, ttl = values[2 * i], values[2 * i + 1]
+                if dumped is None:  # Expired since the scan
+                    continue
+
+                target = targets[key]
+                client = redis_clients[keyspace.namespace_of(target)]
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.restore(target, max(ttl, 0), dumped, replace=True)
+                    if keyspace.LEGACY_JTI.match(key):
+                        expires_at = now + ttl / 1000 if ttl > 0 else now + JTI_EXPIRY
+                        pipe.zadd(keyspace.JTI_BLOCKLIST_INDEX, {key: expires_at})
+                        pipe.publish(keyspace.JTI_BLOCKLIST_CHANNEL, key)
+                    await pipe.execute()
+                moved.append(key)
+
+            if moved:
+                await source.delete(*moved)
+                migrated += len(moved)
+    finally:
+        await source.aclose()
+
+    return {"migrated": migrated}
@@ -0,0 +1,89 @@
+import asyncio
+import os
+
+from sqlalchemy import Sequence
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import Config
+
+# Each nextval() reserves a whole block, so a sequence's increment is the
+# block size. Changing NUMBER_BLOCK_SIZE later needs a matching
+# `ALTER SEQUENCE ... INCREMENT BY`.
+#
+# Account numbers are 12 digits, so they can never meet the 10-digit random
+# numbers issued before the sequence existed.
+account_number_seq = Sequence(
+    "bank_account_number_seq",
+    start=100000000000,
+    increment=Config.NUMBER_BLOCK_SIZE,
+    metadata=SQLModel.metadata,
+)
+card_serial_seq = Sequence(
+    "card_serial_seq",
+    start=1,
+    increment=Config.NUMBER_BLOCK_SIZE,
+    metadata=SQLModel.metadata,
+)
+
+CARD_IIN = "535120"  # Issuer prefix of our debit cards
+
+
+def luhn_check_digit(digits: str) -> str:
+    """Returns the digit that makes `digits` + check digit pass the Luhn check."""
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str(-total % 10)
+
+
+class NumberAllocator:
+    """
+    Hands out unique numbers from a Postgres sequence, one block at a time.
+
+    A worker fetches a block of `block_size` numbers with a single nextval()
+    and serves later requests from memory, so inserts don't contend on the
+    sequence. Numbers left in a block when a worker exits are never reused.
+    The block is dropped after a fork so workers never share one.
+    """
+
+    def __init__(self, sequence: Sequence, block_size: int = Config.NUMBER_BLOCK_SIZE):
+        self.sequence = sequence
+        self.block_size = block_size
+        self._lock = asyncio.Lock()
+        self._pid = os.getpid()
+        self._next = 0
+        self._end = 0
+
+    async def allocate(self, session: AsyncSession) -> int:
+        async with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._next = self._end = 0
+
+            if self._next >= self._end:
+                start = await session.scalar(self.sequence.next_value())
+                self._next, self._end = start, start + self.block_size
+
+            number = self._next
+            self._next += 1
+            return number
+
+
+account_numbers = NumberAllocator(account_number_seq)
+card_serials = NumberAllocator(card_serial_seq)
+
+
+async def next_account_number(session: AsyncSession) -> str:
+    return str(await account_numbers.allocate(session))
+
+
+async def next_card_number(session: AsyncSession) -> str:
+    """Returns a 16-digit, Luhn-valid card number."""
+    payload = f"{CARD_IIN}{await card_serials.allocate(session):09d}"
+    return payload + luhn_check_digit(payload)
@@ -91,6 +91,18 @@ class InvalidTransactionAmount(BeehaivException):
     pass
 
 
+class InvalidTransferGrant(BeehaivException):
+    """Transfer grant is unknown, expired, used up or exceeded."""
+
+    pass
+
+
+class InvalidCursor(BeehaivException):
+    """Pagination cursor is malformed or was not issued by this API."""
+
+    pass
+
+
 # Blog Post Errors
 class BlogPostNotFound(BeehaivException):
     """Blog post not found."""
@@ -194,6 +206,21 @@ class UnauthorizedBusinessAccess(BeehaivException):
     pass
 
 
+# Capacity Errors
+class ServerBusy(BeehaivException):
+    """The server is saturated and cannot take more work right now."""
+
+    pass
+
+
+class RateLimitExceeded(BeehaivException):
+    """The client has sent too many requests to a rate-limited route."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
@@ -343,6 +370,30 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidTransferGrant,
+        create_exception_handler(
+            status_code=status.HTTP_403_FORBIDDEN,
+            initial_detail={
+                "message": "Transfer grant is invalid, expired or exhausted",
+                "error_code": "invalid_transfer_grant",
+                "resolution": "Verify your transfer pin again",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "invalid_cursor",
+                "resolution": "Restart from the first page",
+            },
+        ),
+    )
+
     # Blog Post Error Handlers
     app.add_exception_handler(
         BlogPostNotFound,
@@ -538,6 +589,29 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        ServerBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Server is busy, please retry shortly",
+                "error_code": "server_busy",
+            },
+        ),
+    )
+
+    @app.exception_handler(RateLimitExceeded)
+    async def rate_limit_exceeded(request: Request, exc: RateLimitExceeded):
+        return JSONResponse(
+            content={
+                "message": "Too many requests, please retry later",
+                "error_code": "rate_limited",
+                "retry_after": exc.retry_after,
+            },
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
     @app.exception_handler(500)
     async def internal_server_error(request: Request, exc: Exception):
         return JSONResponse(
@@ -1,16 +1,163 @@
-from fastapi import FastAPI
+import asyncio
+import hashlib
+import json
+
+from fastapi import FastAPI, status
 from fastapi.requests import Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 import time
 import logging
 
+from src.app.auth.utils import decode_token
+from src.config.settings import Config
+from src.db.redis import (
+    begin_idempotent_request,
+    complete_idempotent_request,
+    get_idempotent_request,
+    hold_idempotent_request,
+    release_idempotent_request,
+)
 from src.utils.logger import LOGGER
 
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
 
+# POST endpoints that move money and honour the Idempotency-Key header
+IDEMPOTENT_PATHS = {
+    "/api/v1/transactions/domestic-transfer",
+    "/api/v1/transactions/international-transfer",
+    "/api/v1/transactions/withdraw",
+    "/api/v1/transactions/batch",
+}
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def idempotency_error(status_code: int, message: str, error_code: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"message": message, "error_code": error_code},
+    )
+
+
+def idempotency_scope(request: Request) -> str | None:
+    """Keys are per user, so two users can never replay each other's responses."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    token_data = decode_token(token)
+    if token_data is None:
+        return None
+
+    return token_data["user"]["user_uid"]
+
+
+def replay_response(record: dict) -> Response:
+    headers = json.loads(record["headers"])
+    headers["Idempotent-Replayed"] = "true"
+    return Response(
+        content=record["body"],
+        status_code=int(record["status_code"]),
+        headers=headers,
+    )
+
+
+async def handle_idempotent_request(request: Request, call_next, key: str) -> Response:
+    """
+    Executes a money-moving request at most once per Idempotency-Key.
+
+    The first request claims the key in Redis and its response is stored for
+    `IDEMPOTENCY_KEY_EXPIRY` seconds. Retries are answered from Redis without
+    reaching the route or Postgres; a retry that arrives while the first
+    request is still running waits for its response instead of executing
+    again. The in-flight lock is renewed for as long as the request runs.
+    Server errors, rate-limit refusals and unhandled exceptions release the
+    key so the request can be retried.
+    """
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return idempotency_error(
+            status.HTTP_400_BAD_REQUEST,
+            "Idempotency-Key is too long",
+            "invalid_idempotency_key",
+        )
+
+    scope = idempotency_scope(request)
+    if scope is None:
+        # Unauthenticated; let the route reject it
+        return await call_next(request)
+
+    body = await request.body()
+    fingerprint = hashlib.sha256(
+        b"\n".join(
+            [
+                request.method.encode(),
+                request.url.path.encode(),
+                request.url.query.encode(),
+                body,
+            ]
+        )
+    ).hexdigest()
+    store_key = f"{scope}:{key}"
+
+    record = await begin_idempotent_request(store_key, fingerprint)
+
+    if record is None:
+        heartbeat = asyncio.create_task(hold_idempotent_request(store_key))
+        try:
+            response = await call_next(request)
+            failed = (
+                response.status_code >= 500
+                or response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            if not failed:
+                content = b"".join([chunk async for chunk in response.body_iterator])
+        except BaseException:
+            heartbeat.cancel()
+            await release_idempotent_request(store_key)
+            raise
+        heartbeat.cancel()
+
+        if failed:
+            await release_idempotent_request(store_key)
+            return response
+
+        headers = {
+            k: v for k, v in response.headers.items() if k.lower() != "content-length"
+        }
+        await complete_idempotent_request(
+            store_key, response.status_code, headers, content
+        )
+        return Response(
+            content=content, status_code=response.status_code, headers=headers
+        )
+
+    if record["fingerprint"].decode("utf-8") != fingerprint:
+        return idempotency_error(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            "Idempotency-Key was already used for a different request",
+            "idempotency_key_reused",
+        )
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + Config.IDEMPOTENCY_LOCK_TIMEOUT
+    while record is not None and record["state"] != b"done":
+        if loop.time() >= deadline:
+            break
+        await asyncio.sleep(Config.IDEMPOTENCY_POLL_INTERVAL)
+        record = await get_idempotent_request(store_key)
+
+    if record is None or record["state"] != b"done":
+        return idempotency_error(
+            status.HTTP_409_CONFLICT,
+            "A request with this Idempotency-Key is still in progress",
+            "idempotency_key_in_progress",
+        )
+
+    return replay_response(record)
+
 
 def register_middleware(app: FastAPI):
 
@@ -38,6 +185,19 @@ def register_middleware(app: FastAPI):
         LOGGER.info(message)
         return response
 
+    @app.middleware("http")
+    async def idempotency(request: Request, call_next):
+        key = request.headers.get("Idempotency-Key")
+
+        if (
+            key is None
+            or request.method != "POST"
+            or request.url.path not in IDEMPOTENT_PATHS
+        ):
+            return await call_next(request)
+
+        return await handle_idempotent_request(request, call_next, key)
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -0,0 +1,22 @@
+"""Exact money amounts."""
+from decimal import Decimal
+from typing import Annotated
+
+from pydantic import Field, PlainSerializer
+
+# Precision of every stored amount and balance: NUMERIC(18, 2)
+MONEY_DIGITS = 18
+MONEY_PLACES = 2
+
+# Validated and handled as a Decimal; rendered as a JSON number so existing
+# clients keep reading plain numbers.
+Money = Annotated[
+    Decimal,
+    Field(max_digits=MONEY_DIGITS, decimal_places=MONEY_PLACES),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
+
+
+def to_minor_units(amount: Decimal) -> int:
+    """`amount` as a whole number of cents, for stores that only count integers."""
+    return int(amount.scaleb(MONEY_PLACES).to_integral_value())
@@ -0,0 +1,28 @@
+"""Opaque cursors for keyset pagination."""
+import base64
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+from src.errors import InvalidCursor
+
+
+def encode_cursor(created_at: datetime, uid: uuid.UUID) -> str:
+    """Encodes the sort key of the last row of a page."""
+    raw = f"{created_at.isoformat()}|{uid}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, uid = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(uid)
+    except ValueError:
+        raise InvalidCursor()
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from src.db.client_cache import ClientSideCache
+
+pytestmark = pytest.mark.anyio
+
+
+def make_cache(mode="polling"):
+    cache = ClientSideCache(
+        FakeRedis(server=FakeServer()),
+        prefixes=["sec:v1:"],
+        maxsize=10,
+        ttl=60,
+        fallback_ttl=5,
+    )
+    cache.mode = mode
+    return cache
+
+
+def counting_loader(value="value"):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return value
+
+    return load, calls
+
+
+async def test_fetch_caches_once_usable():
+    cache = make_cache()
+    load, calls = counting_loader()
+
+    assert await cache.fetch("sec:v1:a", load) == "value"
+    assert await cache.fetch("sec:v1:a", load) == "value"
+    assert len(calls) == 1
+
+
+async def test_fetch_bypasses_cache_without_a_mode():
+    cache = make_cache(mode=None)
+    load, calls = counting_loader()
+
+    await cache.fetch("sec:v1:a", load)
+    await cache.fetch("sec:v1:a", load)
+    assert len(calls) == 2
+    assert len(cache.entries) == 0
+
+
+async def test_invalidate_drops_listed_keys_including_bytes():
+    cache = make_cache()
+    load, calls = counting_loader()
+    for key in ("sec:v1:a", "sec:v1:b", "sec:v1:c"):
+        await cache.fetch(key, load)
+
+    cache.invalidate([b"sec:v1:a", "sec:v1:b"])
+
+    assert "sec:v1:a" not in cache.entries
+    assert "sec:v1:b" not in cache.entries
+    assert "sec:v1:c" in cache.entries
+
+
+async def test_invalidate_without_keys_clears_everything():
+    cache = make_cache()
+    load, _ = counting_loader()
+    await cache.fetch("sec:v1:a", load)
+    await cache.fetch("sec:v1:b", load)
+
+    cache.invalidate(None)
+
+    assert len(cache.entries) == 0
+
+
+async def test_read_racing_an_invalidation_is_not_cached():
+    cache = make_cache()
+
+    async def load():
+        # A write to the key lands while the read is in flight
+        cache.invalidate(["sec:v1:a"])
+        return "stale"
+
+    assert await cache.fetch("sec:v1:a", load) == "stale"
+    assert "sec:v1:a" not in cache.entries
+
+
+async def test_listen_falls_back_to_polling_without_client_tracking():
+    cache = make_cache(mode=None)
+
+    await asyncio.wait_for(cache.listen(), timeout=5)
+
+    assert cache.mode == "polling"
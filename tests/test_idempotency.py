@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from fastapi.requests import Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+import src.middleware as middleware
+from src.db import keyspace
+from src.db.redis import (
+    begin_idempotent_request,
+    hold_idempotent_request,
+    release_idempotent_request,
+)
+
+pytestmark = pytest.mark.anyio
+
+PATH = "/api/v1/transactions/withdraw"
+
+
+def make_request(body=b'{"amount": 10}'):
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": PATH,
+        "query_string": b"account_number=1",
+        "headers": [],
+    }
+    return Request(scope, receive)
+
+
+@pytest.fixture(autouse=True)
+def scope_to_one_user(monkeypatch):
+    monkeypatch.setattr(middleware, "idempotency_scope", lambda request: "user-1")
+
+
+async def test_first_request_claims_the_key(fake_redis):
+    assert await begin_idempotent_request("k", "fingerprint") is None
+
+    record = await begin_idempotent_request("k", "fingerprint")
+    assert record["state"] == b"in_flight"
+    assert record["fingerprint"] == b"fingerprint"
+
+    await release_idempotent_request("k")
+    assert await begin_idempotent_request("k", "fingerprint") is None
+
+
+async def test_hold_renews_only_in_flight_locks(fake_redis):
+    key = keyspace.idempotency("k")
+    await begin_idempotent_request("k", "fingerprint", lock_timeout=2)
+
+    # Renewed every second, so it outlives its own two-second timeout
+    holder = asyncio.create_task(hold_idempotent_request("k", lock_timeout=3))
+    await asyncio.sleep(2.5)
+    assert await fake_redis.ttl(key) > 1
+
+    await fake_redis.hset(key, "state", "done")
+    await fake_redis.persist(key)
+    await asyncio.sleep(1.1)
+    holder.cancel()
+    assert await fake_redis.ttl(key) == -1
+
+
+async def test_response_is_replayed_to_retries(fake_redis):
+    calls = []
+
+    async def call_next(request):
+        calls.append(request)
+        # call_next hands the middleware a streamed response
+        return StreamingResponse(
+            iter([b'{"uid": %d}' % len(calls)]),
+            status_code=status.HTTP_201_CREATED,
+            media_type="application/json",
+        )
+
+    first = await middleware.handle_idempotent_request(make_request(), call_next, "key")
+    retry = await middleware.handle_idempotent_request(make_request(), call_next, "key")
+
+    assert len(calls) == 1
+    assert (retry.status_code, retry.body) == (first.status_code, first.body)
+
+    reused = await middleware.handle_idempotent_request(
+        make_request(b'{"amount": 20}'), call_next, "key"
+    )
+    assert reused.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_key_is_released_when_the_handler_raises(fake_redis):
+    async def failing(request):
+        raise RuntimeError("database went away")
+
+    with pytest.raises(RuntimeError):
+        await middleware.handle_idempotent_request(make_request(), failing, "key")
+
+    assert await fake_redis.exists(keyspace.idempotency("user-1:key")) == 0
+
+
+async def test_key_is_released_on_server_errors(fake_redis):
+    async def call_next(request):
+        return JSONResponse({}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    await middleware.handle_idempotent_request(make_request(), call_next, "key")
+
+    assert await fake_redis.exists(keyspace.idempotency("user-1:key")) == 0
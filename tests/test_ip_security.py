@@ -0,0 +1,88 @@
+import time
+import uuid
+
+import anyio
+import pytest
+
+from src.db import keyspace
+from src.db.redis import NEW_IP_MAX_ATTEMPTS, block_ip_attempts, store_allowed_ip
+
+pytestmark = pytest.mark.anyio
+
+
+def make_user(ip_address="1.1.1.1"):
+    return type("User", (), {"uid": uuid.uuid4(), "ip_address": ip_address})()
+
+
+async def test_new_ip_is_blocked_after_its_attempts(fake_redis):
+    user = make_user()
+
+    results = [
+        await block_ip_attempts(user, "2.2.2.2") for _ in range(NEW_IP_MAX_ATTEMPTS + 1)
+    ]
+
+    assert results == [False] * NEW_IP_MAX_ATTEMPTS + [True]
+    count = await fake_redis.get(keyspace.new_ip(user.uid, "2.2.2.2"))
+    assert int(count) == NEW_IP_MAX_ATTEMPTS
+
+
+async def test_known_and_allowed_ips_are_never_counted(fake_redis):
+    user = make_user()
+    await block_ip_attempts(user, "2.2.2.2")
+    await store_allowed_ip(user.uid, "2.2.2.2")
+
+    for _ in range(NEW_IP_MAX_ATTEMPTS + 1):
+        assert not await block_ip_attempts(user, "2.2.2.2")
+        assert not await block_ip_attempts(user, user.ip_address)
+
+    assert await fake_redis.exists(keyspace.new_ip(user.uid, "2.2.2.2")) == 0
+
+
+async def legacy_block_ip_attempts(client, user, new_ip) -> bool:
+    # The new-IP path before BLOCK_IP_ATTEMPTS_SCRIPT: GET, GET, SET
+    if await client.get(keyspace.allowed_ip(user.uid, new_ip)) is not None:
+        return False
+    attempts = int(await client.get(keyspace.new_ip(user.uid, new_ip)) or 0) + 1
+    if attempts > NEW_IP_MAX_ATTEMPTS:
+        return True
+    await client.set(keyspace.new_ip(user.uid, new_ip), attempts, ex=3600)
+    return False
+
+
+async def test_script_saves_round_trips_on_new_ips(fake_redis, monkeypatch):
+    """
+    Benchmark of the new-IP path: one script call against the GET/GET/SET it
+    replaced. Each command pays a simulated network round trip, so the timings
+    printed under `pytest -s` follow the command counts asserted here.
+    """
+    round_trip = 0.001
+    commands = []
+    execute_command = fake_redis.execute_command
+
+    async def timed_execute_command(*args, **options):
+        commands.append(args[0])
+        await anyio.sleep(round_trip)
+        return await execute_command(*args, **options)
+
+    monkeypatch.setattr(fake_redis, "execute_command", timed_execute_command)
+    # Loads the script, so the measured calls all hit EVALSHA
+    await block_ip_attempts(make_user(), "2.2.2.2")
+
+    async def run(check, users):
+        commands.clear()
+        started = time.perf_counter()
+        for user in users:
+            await check(user, "2.2.2.2")
+        return len(commands), time.perf_counter() - started
+
+    users = [make_user() for _ in range(50)]
+    legacy = await run(lambda user, ip: legacy_block_ip_attempts(fake_redis, user, ip), users)
+    script = await run(block_ip_attempts, [make_user() for _ in users])
+
+    print(
+        f"\nnew-IP check x{len(users)}: legacy {legacy[0]} commands in {legacy[1]:.3f}s, "
+        f"script {script[0]} commands in {script[1]:.3f}s"
+    )
+    assert legacy[0] == 3 * len(users)
+    assert script[0] == len(users)
+    assert script[1] < legacy[1]
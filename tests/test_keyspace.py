@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+import src.db.redis as redis_module
+from src.db import keyspace
+from src.db.redis import migrate_legacy_keys
+
+pytestmark = pytest.mark.anyio
+
+
+def test_keys_carry_namespace_and_version():
+    user_id = uuid.uuid4()
+
+    assert keyspace.principal(user_id) == f"cache:v1:principal:{user_id}"
+    assert keyspace.transfer_grant("g") == "sec:v1:transfer_grant:g"
+    assert keyspace.namespace_of(keyspace.principal(user_id)) == keyspace.CACHE
+    assert keyspace.namespace_of("celery-task-meta-1") is None
+    assert keyspace.transfer_grant("g").startswith(
+        keyspace.prefix(keyspace.SECURITY, "transfer_grant")
+    )
+
+
+@pytest.mark.parametrize(
+    "key, target",
+    [
+        ("principal:u1", "cache:v1:principal:u1"),
+        ("new_ip:u1:10.0.0.1", "sec:v1:new_ip:u1:10.0.0.1"),
+        ("allowed:u1:fe80::1", "sec:v1:allowed_ip:u1:fe80::1"),
+        ("6f1c1d9e-7c3e-4c7b-9a43-0b7d5b9d5d10", "sec:v1:revoked_jti:6f1c1d9e-7c3e-4c7b-9a43-0b7d5b9d5d10"),
+        ("celery-task-meta-1", None),
+        ("sec:v1:reset_code:u1", None),
+    ],
+)
+def test_legacy_key_targets(key, target):
+    assert keyspace.legacy_key_target(key) == target
+
+
+@pytest.fixture
+def legacy_source(fake_redis, monkeypatch):
+    """The migration reads REDIS_URL through its own client; share the fake server."""
+    server = fake_redis.connection_pool.connection_kwargs["server"]
+    monkeypatch.setattr(redis_module, "create_redis_client", lambda url: FakeRedis(server=server))
+    monkeypatch.setattr(
+        redis_module,
+        "redis_clients",
+        {keyspace.CACHE: fake_redis, keyspace.SECURITY: fake_redis},
+    )
+    return fake_redis
+
+
+async def test_migration_moves_legacy_keys_and_keeps_ttls(legacy_source):
+    client = legacy_source
+    jti = str(uuid.uuid4())
+    await client.set("reset_code:u1", "123456", ex=600)
+    await client.hset("principal:u1", mapping={"email": '"a@example.com"'})
+    await client.set(jti, "", ex=3600)
+    await client.set("celery-task-meta-1", "{}")
+
+    assert await migrate_legacy_keys(batch_size=2) == {"migrated": 3}
+
+    assert await client.get("sec:v1:reset_code:u1") == b"123456"
+    assert 0 < await client.ttl("sec:v1:reset_code:u1") <= 600
+    assert await client.hget("cache:v1:principal:u1", "email") == b'"a@example.com"'
+    assert await client.zscore(keyspace.JTI_BLOCKLIST_INDEX, jti) is not None
+    assert await client.exists("reset_code:u1", "principal:u1", jti) == 0
+    assert await client.exists("celery-task-meta-1") == 1
+
+    # Nothing is left to move
+    assert await migrate_legacy_keys() == {"migrated": 0}
+
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from src.app.ledger.models import LedgerEntry
+from src.app.ledger.services import LedgerService
+from src.app.transactions.schemas import WithdrawalSchema
+from src.app.transactions.services import TransactionService
+from src.errors import BankAccountNotFound
+
+pytestmark = pytest.mark.anyio
+
+ledger_service = LedgerService()
+transaction_service = TransactionService()
+
+
+async def withdraw(session, user, account, amount):
+    await transaction_service.withdraw_from_account(
+        session, user, WithdrawalSchema(amount=Decimal(amount)), account.account_number
+    )
+
+
+async def test_balance_as_of_reads_the_latest_posting(session, make_account):
+    user, account = await make_account("100.00")
+    await withdraw(session, user, account, "30.00")
+    # Backdate everything so far by a day
+    await session.execute(
+        update(LedgerEntry).values(created_at=LedgerEntry.created_at - timedelta(days=1))
+    )
+    await session.commit()
+    await withdraw(session, user, account, "20.00")
+
+    now = datetime.utcnow()
+    yesterday = await ledger_service.get_balance_as_of(
+        session, user, account.account_number, now - timedelta(hours=1)
+    )
+    today = await ledger_service.get_balance_as_of(
+        session, user, account.account_number, now
+    )
+    before = await ledger_service.get_balance_as_of(
+        session, user, account.account_number, now - timedelta(days=2)
+    )
+
+    assert yesterday.balance == Decimal("70.00")
+    assert today.balance == Decimal("50.00")
+    assert before.balance == Decimal("0.00")
+
+
+async def test_balance_as_of_accepts_aware_datetimes(session, make_account):
+    user, account = await make_account("100.00")
+    await withdraw(session, user, account, "30.00")
+
+    # The same instant, an hour ahead of the last posting, written in UTC+2
+    as_of = datetime.now(timezone(timedelta(hours=2))) + timedelta(hours=1)
+    balance = await ledger_service.get_balance_as_of(
+        session, user, account.account_number, as_of
+    )
+
+    assert balance.balance == Decimal("70.00")
+
+
+async def test_balance_as_of_is_limited_to_own_accounts(session, make_account):
+    user, _ = await make_account()
+    _, other = await make_account("10.00")
+
+    with pytest.raises(BankAccountNotFound):
+        await ledger_service.get_balance_as_of(
+            session, user, other.account_number, datetime.utcnow()
+        )
+
+
+async def test_reconcile_reports_no_drift_after_transfers(session, make_account):
+    user, account = await make_account("100.00")
+    await withdraw(session, user, account, "30.00")
+
+    report = await ledger_service.reconcile(session)
+
+    assert report.drift == []
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from src.app.outbox.models import OutboxMessage
+from src.app.outbox.services import OutboxService
+from src.celery_tasks import celery_app
+
+pytestmark = pytest.mark.anyio
+
+outbox_service = OutboxService()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        celery_app, "send_task", lambda task, kwargs: sent.append((task, kwargs))
+    )
+    return sent
+
+
+async def test_enqueued_task_is_only_sent_after_commit(session, sent):
+    outbox_service.enqueue(session, "send_email", recipients=["a@example.com"])
+    await session.rollback()
+    assert await outbox_service.relay(session, batch_size=10, retention=3600) == 0
+
+    outbox_service.enqueue(session, "send_email", recipients=["b@example.com"])
+    await session.commit()
+    assert await outbox_service.relay(session, batch_size=10, retention=3600) == 1
+
+    assert sent == [("send_email", {"recipients": ["b@example.com"]})]
+    message = (await session.exec(select(OutboxMessage))).one()
+    assert message.dispatched_at is not None
+
+
+async def test_relay_sends_in_order_and_stops_at_a_broker_failure(
+    session, sent, monkeypatch
+):
+    for n in range(3):
+        outbox_service.enqueue(session, "task", n=n)
+    await session.commit()
+
+    broker_down = True
+
+    def send_task(task, kwargs):
+        if broker_down and kwargs["n"] == 1:
+            raise ConnectionError("broker down")
+        sent.append(kwargs["n"])
+
+    monkeypatch.setattr(celery_app, "send_task", send_task)
+    assert await outbox_service.relay(session, batch_size=10, retention=3600) == 1
+
+    broker_down = False
+    assert await outbox_service.relay(session, batch_size=10, retention=3600) == 2
+    assert sent == [0, 1, 2]
+
+
+async def test_relay_purges_old_dispatched_messages(session, sent):
+    session.add(
+        OutboxMessage(
+            task="old",
+            payload={},
+            dispatched_at=datetime.utcnow() - timedelta(hours=2),
+        )
+    )
+    await session.commit()
+
+    await outbox_service.relay(session, batch_size=10, retention=3600)
+
+    assert (await session.exec(select(OutboxMessage))).all() == []
@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.app.auth.schemas import UserRole
+from src.app.transactions.models import TransactionHistory, TransactionStatus
+from src.app.transactions.services import TransactionService
+from src.errors import InvalidCursor
+from src.utils.pagination import decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+service = TransactionService()
+
+
+def test_cursor_round_trip():
+    created_at, uid = datetime(2024, 5, 1, 12, 30, 0, 123456), uuid.uuid4()
+
+    assert decode_cursor(encode_cursor(created_at, uid)) == (created_at, uid)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime.now(), uuid.uuid4())[:-4]])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+async def test_pages_walk_every_transaction_once(session, make_account):
+    user, _ = await make_account()
+    other, _ = await make_account()
+    # Pairs share a timestamp, so pages must break ties on uid
+    start = datetime(2024, 1, 1)
+    for owner in (user, other):
+        session.add_all(
+            TransactionHistory(
+                user_id=owner.uid,
+                domain=owner.domain,
+                amount=Decimal(i + 1),
+                status=TransactionStatus.COMPLETED,
+                created_at=start + timedelta(minutes=i // 2),
+            )
+            for i in range(11)
+        )
+    await session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = await service.get_all_transactions(session, user, limit=3, cursor=cursor)
+        seen.extend(page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert len(seen) == 11
+    assert {t.user_id for t in seen} == {user.uid}
+    keys = [(t.created_at, t.uid) for t in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+async def test_status_filter_and_admin_scope(session, make_account):
+    user, _ = await make_account()
+    admin, _ = await make_account(role=UserRole.ADMIN)
+    session.add_all(
+        TransactionHistory(user_id=user.uid, domain=user.domain, amount=Decimal(1), status=status)
+        for status in (TransactionStatus.PENDING, TransactionStatus.FAILED)
+    )
+    await session.commit()
+
+    page = await service.get_all_transactions(
+        session, admin, limit=10, status=TransactionStatus.FAILED
+    )
+
+    assert [t.status for t in page.items] == [TransactionStatus.FAILED]
+    assert page.next_cursor is None
@@ -0,0 +1,71 @@
+import uuid
+
+import anyio
+import pytest
+
+import src.db.redis as redis_module
+from src.app.auth.models import UserRole
+from src.app.auth.schemas import Principal
+from src.db.redis import PrincipalCache, cache_principal, delete_cached_principal
+
+pytestmark = pytest.mark.anyio
+
+
+def make_principal() -> Principal:
+    return Principal(
+        uid=uuid.uuid4(),
+        email="user@example.com",
+        domain="example.com",
+        role=UserRole.USER,
+        is_blocked=False,
+        has_verified_email=True,
+    )
+
+
+async def wait_until(condition) -> None:
+    with anyio.fail_after(5):
+        while not condition():
+            await anyio.sleep(0.01)
+
+
+def test_entries_are_only_served_while_subscribed():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    principal = make_principal()
+
+    cache.ready = True
+    cache.set("u1", principal, cache.generation)
+    assert cache.get("u1") == principal
+    cache.ready = False
+    assert cache.get("u1") is None
+
+
+def test_lookup_that_raced_an_invalidation_is_not_cached():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    cache.ready = True
+    generation = cache.generation
+
+    cache.pop("u1")
+    cache.set("u1", make_principal(), generation)
+
+    assert cache.get("u1") is None
+
+
+async def test_invalidation_reaches_every_worker(fake_redis, monkeypatch):
+    local, other = PrincipalCache(maxsize=10, ttl=60), PrincipalCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(redis_module, "principal_cache", local)
+    principal = make_principal()
+    key = str(principal.uid)
+    await cache_principal(principal)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(other.listen)
+        await wait_until(lambda: other.ready)
+        other.set(key, principal, other.generation)
+        assert other.get(key) == principal
+
+        await delete_cached_principal(principal.uid)
+
+        await wait_until(lambda: other.get(key) is None)
+        tg.cancel_scope.cancel()
+
+    assert await fake_redis.exists(redis_module.keyspace.principal(key)) == 0
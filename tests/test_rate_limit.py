@@ -0,0 +1,78 @@
+import importlib
+
+import pytest
+from fastapi.requests import Request
+from redis.exceptions import ConnectionError
+
+from src.app.auth.dependencies import RateLimiter
+from src.db.redis import hit_rate_limit
+from src.errors import RateLimitExceeded
+from src.utils.cache import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+# `src.app` is the FastAPI instance, so the package can't be reached by attribute
+dependencies = importlib.import_module("src.app.auth.dependencies")
+
+
+def make_request(host="10.0.0.1", query=b""):
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/auth/login",
+        "query_string": query,
+        "headers": [],
+        "client": (host, 1234),
+    }
+    return Request(scope)
+
+
+@pytest.fixture(autouse=True)
+def fresh_refusals(monkeypatch):
+    monkeypatch.setattr(dependencies.Config, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(dependencies, "refused_clients", TTLCache(maxsize=100, ttl=60))
+
+
+async def test_sliding_window_refuses_past_the_limit(fake_redis):
+    assert [await hit_rate_limit("login:ip:a", 2, 60) for _ in range(2)] == [0, 0]
+
+    wait = await hit_rate_limit("login:ip:a", 2, 60)
+    assert 59 < wait <= 60
+    # Refused requests are not recorded, and other keys have their own window
+    assert await fake_redis.zcard("sec:v1:rate_limit:login:ip:a") == 2
+    assert await hit_rate_limit("login:ip:b", 2, 60) == 0
+
+
+async def test_limiter_raises_with_retry_after(fake_redis):
+    limiter = RateLimiter("login", "1/30")
+    await limiter(make_request())
+
+    with pytest.raises(RateLimitExceeded) as refused:
+        await limiter(make_request())
+    assert refused.value.retry_after == 30
+
+    # The refusal is remembered in-process, so Redis isn't asked again
+    await fake_redis.flushall()
+    with pytest.raises(RateLimitExceeded):
+        await limiter(make_request())
+    await limiter(make_request(host="10.0.0.2"))
+
+
+async def test_domain_scope_shares_one_window_per_domain(fake_redis):
+    limiter = RateLimiter("reset", "1/60", scope="domain")
+    await limiter(make_request("10.0.0.1", b"domain=example.com"))
+
+    with pytest.raises(RateLimitExceeded):
+        await limiter(make_request("10.0.0.2", b"domain=example.com"))
+    await limiter(make_request("10.0.0.2", b"domain=example.org"))
+
+
+async def test_limiter_fails_open_without_redis(fake_redis, monkeypatch):
+    async def unavailable(*args):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(dependencies, "hit_rate_limit", unavailable)
+    limiter = RateLimiter("login", "1/30")
+
+    await limiter(make_request())
+    await limiter(make_request())
@@ -0,0 +1,59 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+import src.db.redis as redis_module
+from src.db.redis import RevokedTokenFilter, add_jti_to_blocklist, token_in_blocklist
+from src.utils.bloom import BloomFilter
+
+pytestmark = pytest.mark.anyio
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    added = [str(uuid.uuid4()) for _ in range(1000)]
+    for item in added:
+        bloom.add(item)
+
+    assert all(item in bloom for item in added)
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10000))
+    assert false_positives < 300  # ~1% expected
+
+
+def test_filter_keeps_two_generations(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(
+        redis_module, "time", SimpleNamespace(monotonic=lambda: clock[0], time=time.time)
+    )
+    revoked = RevokedTokenFilter(capacity=100, error_rate=0.001, generation_length=10)
+
+    revoked.add("old")
+    clock[0] = 10
+    assert revoked.might_contain("old")
+    clock[0] = 20
+    assert not revoked.might_contain("old")
+
+
+async def test_blocklist_is_checked_in_redis_only_on_filter_hits(fake_redis, monkeypatch):
+    revoked = RevokedTokenFilter(capacity=100, error_rate=0.001)
+    monkeypatch.setattr(redis_module, "revoked_tokens", revoked)
+
+    await add_jti_to_blocklist("revoked")
+    assert await token_in_blocklist("revoked")
+
+    revoked.ready = True
+    # Missing from the filter: answered without Redis, even for a stray key
+    await fake_redis.set(redis_module.keyspace.revoked_jti("unseen"), "")
+    assert not await token_in_blocklist("unseen")
+    assert await token_in_blocklist("revoked")
+
+
+async def test_load_restores_unexpired_revocations(fake_redis):
+    await add_jti_to_blocklist("revoked")
+    revoked = RevokedTokenFilter(capacity=100, error_rate=0.001)
+
+    await revoked.load()
+
+    assert revoked.might_contain("revoked")
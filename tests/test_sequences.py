@@ -0,0 +1,49 @@
+import pytest
+
+from src.db.sequences import (
+    CARD_IIN,
+    NumberAllocator,
+    account_number_seq,
+    card_serial_seq,
+    luhn_check_digit,
+    next_card_number,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def luhn_valid(number: str) -> bool:
+    return luhn_check_digit(number[:-1]) == number[-1]
+
+
+@pytest.mark.parametrize(
+    "payload, digit", [("7992739871", "3"), ("453957876362148", "6"), ("0", "0")]
+)
+def test_luhn_check_digit(payload, digit):
+    assert luhn_check_digit(payload) == digit
+
+
+async def test_allocators_hand_out_disjoint_blocks(session):
+    block = account_number_seq.increment
+    first = NumberAllocator(account_number_seq, block_size=block)
+    second = NumberAllocator(account_number_seq, block_size=block)
+
+    numbers = [await first.allocate(session) for _ in range(block + 1)]
+    numbers += [await second.allocate(session) for _ in range(block + 1)]
+
+    assert len(set(numbers)) == 2 * block + 2
+    assert min(numbers) == account_number_seq.start
+    # Two blocks per allocator, one nextval() each
+    next_block = await session.scalar(account_number_seq.next_value())
+    assert next_block == account_number_seq.start + 4 * block
+
+
+async def test_card_numbers_are_16_digit_and_luhn_valid(session, monkeypatch):
+    monkeypatch.setattr("src.db.sequences.card_serials", NumberAllocator(card_serial_seq))
+
+    numbers = [await next_card_number(session) for _ in range(3)]
+
+    assert len(set(numbers)) == 3
+    for number in numbers:
+        assert len(number) == 16 and number.startswith(CARD_IIN)
+        assert luhn_valid(number)
@@ -0,0 +1,36 @@
+import importlib
+
+import pytest
+
+from src.app.auth.schemas import UserCreate
+from src.app.auth.services import UserService
+from src.errors import UserAlreadyExists
+
+pytestmark = pytest.mark.anyio
+
+# `src.app` is the FastAPI instance, so the package can't be reached by attribute
+auth_services = importlib.import_module("src.app.auth.services")
+
+
+async def test_duplicate_signup_is_rejected_before_hashing(
+    session, fake_redis, monkeypatch
+):
+    hashed = []
+
+    async def generate_passwd_hash_async(password):
+        hashed.append(password)
+        return "hash"
+
+    monkeypatch.setattr(auth_services, "generate_passwd_hash_async", generate_passwd_hash_async)
+    user_data = UserCreate(email="signup@example.com", password="password123")
+    service = UserService()
+
+    code, user = await service.register_user(
+        user_data, "1.1.1.1", "user", "example.com", session
+    )
+    assert user.password_hash == "hash"
+    assert code
+
+    with pytest.raises(UserAlreadyExists):
+        await service.register_user(user_data, "1.1.1.1", "user", "example.com", session)
+    assert len(hashed) == 1
@@ -0,0 +1,77 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from src.app.auth.utils import authorize_transfer
+from src.db import keyspace
+from src.db.redis import consume_transfer_grant, refund_transfer_grant, store_transfer_grant
+from src.errors import InsufficientFunds, InvalidTransferGrant
+
+pytestmark = pytest.mark.anyio
+
+
+async def remaining(client, grant):
+    values = await client.hmget(
+        keyspace.transfer_grant(grant), "remaining_minor", "remaining_uses"
+    )
+    return [int(value) for value in values]
+
+
+async def test_grant_is_spent_in_minor_units(fake_redis):
+    user_id = uuid.uuid4()
+    grant = await store_transfer_grant(user_id, Decimal("0.30"), max_uses=3)
+
+    assert await consume_transfer_grant(grant, user_id, Decimal("0.10"))
+    assert await consume_transfer_grant(grant, user_id, Decimal("0.20"))
+    assert await remaining(fake_redis, grant) == [0, 1]
+    assert not await consume_transfer_grant(grant, user_id, Decimal("0.01"))
+
+
+async def test_grant_rejects_other_users_and_exhausted_uses(fake_redis):
+    user_id = uuid.uuid4()
+    grant = await store_transfer_grant(user_id, Decimal("100"), max_uses=1)
+
+    assert not await consume_transfer_grant(grant, uuid.uuid4(), Decimal("1"))
+    assert await consume_transfer_grant(grant, user_id, Decimal("1"))
+    assert not await consume_transfer_grant(grant, user_id, Decimal("1"))
+    assert not await consume_transfer_grant("unknown", user_id, Decimal("1"))
+
+
+async def test_refund_restores_an_exhausted_grant(fake_redis):
+    user_id = uuid.uuid4()
+    grant = await store_transfer_grant(user_id, Decimal("5.00"), max_uses=1)
+    assert await consume_transfer_grant(grant, user_id, Decimal("5.00"))
+
+    assert await refund_transfer_grant(grant, user_id, Decimal("5.00"), uses=1)
+    assert await remaining(fake_redis, grant) == [500, 1]
+    assert not await refund_transfer_grant("unknown", user_id, Decimal("1"))
+
+
+async def test_failed_debit_refunds_the_grant(fake_redis):
+    user_id = uuid.uuid4()
+    user = type("User", (), {"uid": user_id})()
+    grant = await store_transfer_grant(user_id, Decimal("50.00"), max_uses=2)
+
+    with pytest.raises(InsufficientFunds):
+        async with authorize_transfer(user, Decimal("20.00"), None, transfer_grant=grant):
+            raise InsufficientFunds()
+
+    assert await remaining(fake_redis, grant) == [5000, 2]
+
+
+async def test_partial_refund_charges_only_what_was_used(fake_redis):
+    user_id = uuid.uuid4()
+    user = type("User", (), {"uid": user_id})()
+    grant = await store_transfer_grant(user_id, Decimal("50.00"), max_uses=2)
+
+    async with authorize_transfer(user, Decimal("30.00"), None, transfer_grant=grant) as charge:
+        pass
+    await charge.refund(Decimal("12.50"))
+
+    assert charge.amount == Decimal("17.50")
+    assert await remaining(fake_redis, grant) == [3250, 1]
+
+    with pytest.raises(InvalidTransferGrant):
+        async with authorize_transfer(user, Decimal("40.00"), None, transfer_grant=grant):
+            pass
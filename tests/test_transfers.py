@@ -0,0 +1,243 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+from sqlmodel import select
+
+from src.app.auth.models import BankAccount, UserRole
+from src.app.ledger.models import LedgerEntry
+from src.app.transactions.models import (
+    TransactionDailyRollup,
+    TransactionHistory,
+    TransactionStatus,
+)
+from src.app.transactions.schemas import (
+    DomesticTransferSchema,
+    InternationalTransferSchema,
+    WithdrawalSchema,
+)
+from src.app.transactions.services import TransactionService
+from src.app.transactions.settlement import SettlementClient, get_settlement_client
+from src.config.settings import Config
+from src.errors import BankAccountNotFound, InsufficientFunds
+
+pytestmark = pytest.mark.anyio
+
+service = TransactionService()
+
+
+def domestic(amount, recipient="999999999999"):
+    return DomesticTransferSchema(
+        amount=Decimal(amount),
+        recipient_account_number=recipient,
+        recipient_bank_name="Other Bank",
+    )
+
+
+class FakeBank(SettlementClient):
+    """Answers each transfer by amount; exceptions are raised."""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+
+    async def settle(self, transaction):
+        outcome = self.outcomes[transaction.amount]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+async def balance_of(session, account):
+    return await session.scalar(
+        select(BankAccount.balance)
+        .where(BankAccount.uid == account.uid)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def test_domestic_transfer_debits_through_the_ledger(session, make_account):
+    user, account = await make_account("100.00")
+
+    transaction = await service.transfer_to_domestic_account(
+        session, user, domestic("40.10"), account.account_number
+    )
+
+    assert transaction.account_id == account.uid
+    assert await balance_of(session, account) == Decimal("59.90")
+    entries = (await session.exec(select(LedgerEntry.amount))).all()
+    assert sum(entries) == 0
+
+
+async def test_transfer_rejects_overdraft(session, make_account):
+    user, account = await make_account("10.00")
+
+    with pytest.raises(InsufficientFunds):
+        await service.withdraw_from_account(
+            session, user, WithdrawalSchema(amount=Decimal("10.01")), account.account_number
+        )
+    await session.rollback()
+
+    assert await balance_of(session, account) == Decimal("10.00")
+
+
+async def test_users_cannot_debit_another_users_account(session, make_account):
+    user, _ = await make_account("100.00")
+    _, victim = await make_account("100.00")
+
+    with pytest.raises(BankAccountNotFound):
+        await service.transfer_to_domestic_account(
+            session, user, domestic("50.00"), victim.account_number
+        )
+    await session.rollback()
+
+    assert await balance_of(session, victim) == Decimal("100.00")
+
+
+async def test_managers_debit_only_accounts_in_their_domain(session, make_account):
+    manager, _ = await make_account(role=UserRole.MANAGER, domain="bank-a.com")
+    _, own = await make_account("100.00", domain="bank-a.com")
+    _, foreign = await make_account("100.00", domain="bank-b.com")
+
+    await service.transfer_to_domestic_account(
+        session, manager, domestic("30.00"), own.account_number
+    )
+    with pytest.raises(BankAccountNotFound):
+        await service.transfer_to_domestic_account(
+            session, manager, domestic("30.00"), foreign.account_number
+        )
+    await session.rollback()
+
+    assert await balance_of(session, own) == Decimal("70.00")
+    assert await balance_of(session, foreign) == Decimal("100.00")
+
+
+async def test_batch_transfer_accepts_while_the_balance_covers(session, make_account):
+    user, account = await make_account("100.00")
+    transfers = [domestic("60.00"), domestic("50.00"), domestic("40.00")]
+
+    result = await service.batch_transfer(session, user, account.account_number, transfers)
+
+    assert [item.status.value for item in result.items] == ["completed", "rejected", "completed"]
+    assert result.total_debited == Decimal("100.00")
+    assert await balance_of(session, account) == Decimal("0.00")
+    rollup = await session.scalar(
+        select(TransactionDailyRollup.total_transferred).where(
+            TransactionDailyRollup.user_id == user.uid
+        )
+    )
+    assert rollup == Decimal("100.00")
+
+
+async def test_batch_transfer_only_from_own_account(session, make_account):
+    user, _ = await make_account("100.00")
+    _, victim = await make_account("100.00")
+
+    with pytest.raises(BankAccountNotFound):
+        await service.batch_transfer(
+            session, user, victim.account_number, [domestic("50.00")]
+        )
+    await session.rollback()
+
+    assert await balance_of(session, victim) == Decimal("100.00")
+
+
+async def test_batch_transfer_only_from_the_managers_domain(session, make_account):
+    manager, _ = await make_account(role=UserRole.MANAGER, domain="bank-a.com")
+    _, foreign = await make_account("100.00", domain="bank-b.com")
+
+    with pytest.raises(BankAccountNotFound):
+        await service.batch_transfer(
+            session, manager, foreign.account_number, [domestic("50.00")]
+        )
+    await session.rollback()
+
+    assert await balance_of(session, foreign) == Decimal("100.00")
+
+
+async def test_rebuild_daily_rollups_repairs_drift(session, make_account):
+    user, account = await make_account("100.00")
+    await service.withdraw_from_account(
+        session, user, WithdrawalSchema(amount=Decimal("30.00")), account.account_number
+    )
+    await session.execute(
+        update(TransactionDailyRollup).values(total_withdrawn=Decimal("999.00"))
+    )
+    await session.commit()
+
+    assert await service.rebuild_daily_rollups(session) == 1
+
+    rollup = await session.scalar(select(TransactionDailyRollup.total_withdrawn))
+    assert rollup == Decimal("30.00")
+
+
+def international(amount):
+    return InternationalTransferSchema(
+        amount=Decimal(amount),
+        recipient_account_number="GB0000000000",
+        recipient_bank_name="Abroad Bank",
+        sort_code="000000",
+        routing_number="000000000",
+    )
+
+
+async def statuses(session):
+    result = await session.exec(
+        select(TransactionHistory.amount, TransactionHistory.status)
+        .order_by(TransactionHistory.amount)
+        .execution_options(populate_existing=True)
+    )
+    return [(amount, status) for amount, status in result.all()]
+
+
+def test_settlement_client_is_read_from_config(monkeypatch):
+    monkeypatch.setattr(Config, "SETTLEMENT_CLIENT", None)
+    assert get_settlement_client() is None
+
+    monkeypatch.setattr(
+        Config, "SETTLEMENT_CLIENT", "src.app.transactions.settlement:SettlementClient"
+    )
+    assert type(get_settlement_client()) is SettlementClient
+
+
+async def test_settlement_leaves_undecided_transfers_pending(session, make_account):
+    user, account = await make_account("100.00")
+    for amount in ("40.00", "50.00"):
+        await service.transfer_to_international_account(
+            session, user, international(amount), account.account_number
+        )
+    # No answer yet for the first, the bank is unreachable for the second
+    bank = FakeBank({Decimal("40.00"): None, Decimal("50.00"): ConnectionError()})
+
+    settled = await service.settle_international_transfers(session, bank, batch_size=10)
+
+    assert settled == {"completed": 0, "failed": 0, "pending": 2}
+    assert await statuses(session) == [
+        (Decimal("40.00"), TransactionStatus.PENDING),
+        (Decimal("50.00"), TransactionStatus.PENDING),
+    ]
+    assert await balance_of(session, account) == Decimal("10.00")
+
+
+async def test_settlement_completes_and_refunds(session, make_account):
+    user, account = await make_account("100.00")
+    for amount in ("10.00", "25.00"):
+        await service.transfer_to_international_account(
+            session, user, international(amount), account.account_number
+        )
+    # The receiving bank accepts the smaller transfer and rejects the larger
+    bank = FakeBank({Decimal("10.00"): True, Decimal("25.00"): False})
+
+    settled = await service.settle_international_transfers(session, bank, batch_size=10)
+
+    assert settled == {"completed": 1, "failed": 1, "pending": 0}
+    assert await statuses(session) == [
+        (Decimal("10.00"), TransactionStatus.COMPLETED),
+        (Decimal("25.00"), TransactionStatus.FAILED),
+    ]
+    assert await balance_of(session, account) == Decimal("90.00")
+    rollup = await session.scalar(
+        select(TransactionDailyRollup.total_transferred).execution_options(
+            populate_existing=True
+        )
+    )
+    assert rollup == Decimal("10.00")